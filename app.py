@@ -1,5 +1,15 @@
 
 import streamlit as st
+import numpy as np
+import pandas as pd
+
+from definitions.definitions import (ASSET_CLASSES, SIGNAL_TYPES, BENCHMARK_STRATEGIES, TaskGraph, SharedCache,
+                                     FilterIndex, load_data, filter_data, calculate_performance_metrics,
+                                     compare_to_benchmark, generate_line_chart, generate_bar_chart,
+                                     generate_scatter_plot)
+
+# Copy-on-Write lets every session share the cached frames as views instead of deep copies.
+pd.options.mode.copy_on_write = True
 
 st.set_page_config(page_title="QuCreate Streamlit Lab", layout="wide")
 st.sidebar.image("assets/images/company_logo.jpg")
@@ -9,6 +19,101 @@ st.divider()
 
 # Code goes here
 
+@st.cache_resource
+def shared_cache() -> SharedCache:
+    """One cache per server process, shared by every session: each dataset, index and benchmark is held once."""
+    return SharedCache(max_bytes=2 * 1024 ** 3, ttl=6 * 3600)
+
+
+def pair_history(data: pd.DataFrame, pair_id) -> pd.DataFrame:
+    """Returns the rows of one pair indexed by business days."""
+    rows = data[data['pair_id'] == pair_id]
+    return rows.set_index(pd.bdate_range('2020-01-01', periods=len(rows)))
+
+
+def driver_contributions(filtered: pd.DataFrame, top_pairs: int = 20) -> pd.DataFrame:
+    """Splits each top pair's summed returns into the parts driven by its two asset legs and a residual.
+
+    The pair's returns are regressed on the returns of asset1 and asset2; each leg contributes its
+    coefficient times its summed returns and the intercept and residuals make up the rest, so the
+    drivers of a pair add up to its total return.
+    """
+    top = filtered.drop_duplicates('pair_id').head(top_pairs)['pair_id']
+    rows = []
+    for pair_id, pair in filtered[filtered['pair_id'].isin(top)].groupby('pair_id', sort=False, observed=True):
+        legs = pair[['asset1', 'asset2']].pct_change().fillna(0).to_numpy(dtype='float64')
+        pair_returns = pair['pair_returns'].to_numpy(dtype='float64')
+        valid = np.isfinite(pair_returns) & np.isfinite(legs).all(axis=1)
+        design = np.column_stack([legs[valid], np.ones(valid.sum())])
+        coefficients = np.linalg.lstsq(design, pair_returns[valid], rcond=None)[0]
+        leg_contributions = coefficients[:2] * legs[valid].sum(axis=0)
+        total = pair_returns[valid].sum()
+        rows += [(str(pair_id), 'Asset 1', leg_contributions[0]), (str(pair_id), 'Asset 2', leg_contributions[1]),
+                 (str(pair_id), 'Residual', total - leg_contributions.sum())]
+    return pd.DataFrame(rows, columns=['Pair', 'Driver', 'Contribution'])
+
+
+st.sidebar.header("Universe")
+num_rows = st.sidebar.number_input("Rows", min_value=1_000, max_value=10_000_000, value=100_000, step=10_000)
+asset_class = st.sidebar.selectbox("Asset class", ASSET_CLASSES)
+signal_type = st.sidebar.selectbox("Signal type", SIGNAL_TYPES)
+threshold = st.sidebar.slider("Performance threshold (top fraction)", 0.01, 1.0, 0.1)
+strategy = st.sidebar.selectbox("Benchmark strategy", list(BENCHMARK_STRATEGIES))
+strategy_parameters = {
+    "rebalancing_window": {"window": 20},
+    "static_weights": {"weights": [0.5, 0.5]},
+    "calendar_rebalancing": {"frequency": "monthly"},
+    "drift_threshold": {"threshold": 0.05},
+    "inverse_volatility": {"lookback": 60, "window": 20},
+}.get(strategy, {})
+
+cache = shared_cache()
+num_rows = int(num_rows)
+data_key = ('pairs', num_rows, 0)
+
+summary_tab, benchmark_tab, metrics_tab, drivers_tab, scatter_tab = st.tabs(
+    ["Filtered pairs", "Benchmark", "Performance metrics", "Key drivers", "Performance scatter"])
+panels = {
+    'filtered': summary_tab.empty(),
+    'benchmark': benchmark_tab.empty(),
+    'line_chart': metrics_tab.empty(),
+    'bar_chart': drivers_tab.empty(),
+    'scatter_plot': scatter_tab.empty(),
+}
+for panel in panels.values():
+    panel.info("Computing...")
+
+# The dataset stays pinned in the shared cache while this run uses it.
+with cache.lease(data_key, lambda: load_data(num_rows, seed=0, compact=True, schema='pairs')) as data:
+    def benchmark(pair):
+        key = ('benchmark', data_key, int(pair['pair_id'].iloc[0]), strategy, repr(sorted(strategy_parameters.items())))
+        return cache.get(key, lambda: compare_to_benchmark(pair, strategy, strategy_parameters))
+
+    # Independent steps run concurrently; every panel is drawn as soon as its own result arrives.
+    graph = TaskGraph()
+    graph.add('index', cache.get, ('index', data_key), lambda: FilterIndex(data))
+    graph.add('filtered', lambda index: filter_data(data, asset_class, signal_type, threshold, index=index),
+              depends_on=['index'])
+    graph.add('pair', lambda filtered: pair_history(data, filtered['pair_id'].iloc[0]), depends_on=['filtered'])
+    graph.add('benchmark', benchmark, depends_on=['pair'])
+    graph.add('metrics', lambda pair: calculate_performance_metrics(pair['pair_returns'], window=20), depends_on=['pair'])
+    graph.add('line_chart', generate_line_chart, depends_on=['metrics'])
+    graph.add('bar_chart', lambda filtered: generate_bar_chart(driver_contributions(filtered)), depends_on=['filtered'])
+    graph.add('scatter_plot', generate_scatter_plot, 'pair_performance', 'pair_returns', depends_on=['filtered'])
+
+    for result in graph.run():
+        panel = panels.get(result.name)
+        if panel is None:
+            continue
+        if result.error is not None:
+            panel.error(f"{type(result.error).__name__}: {result.error}")
+        elif result.name == 'filtered':
+            panel.dataframe(result.value.head(1_000))
+        elif result.name == 'benchmark':
+            panel.line_chart(result.value)
+        else:
+            panel.plotly_chart(result.value, use_container_width=True)
+
 st.divider()
 st.write("© 2025 QuantUniversity. All Rights Reserved.")
 st.caption("The purpose of this demonstration is solely for educational use and illustration. "
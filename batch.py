@@ -0,0 +1,220 @@
+"""Headless batch runner for the nightly pair screening and benchmarking pipeline.
+
+Reads a columnar pair universe (a Parquet or Feather file, or a partitioned dataset directory
+written by `write_partitioned_dataset`), screens it across all asset classes and signal types,
+and writes the result of one of three jobs:
+
+    screen     filter_data for every asset class and signal type
+    benchmark  screen, then compare the full history of every selected pair against a benchmark strategy
+    summarize  benchmark, then one row of total returns and Sharpe ratios per pair
+
+Throughput (pairs/sec) and peak memory are printed when the job finishes.
+
+Usage:
+    python batch.py screen universe.parquet --output screened.parquet --selectivity 0.1
+    python batch.py benchmark universe/ --output curves.parquet --strategy rebalancing_window --parameters '{"window": 20}'
+    python batch.py summarize universe.parquet --output summary.csv --workers 8 --figures figures
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from definitions.definitions import (ASSET_CLASSES, SIGNAL_TYPES, BENCHMARK_STRATEGIES, PartitionedDataset,
+                                     normalize_pair_schema, screen_universe, compare_to_benchmark_parallel,
+                                     summarize_pair_curves, calculate_performance_metrics, generate_line_chart,
+                                     generate_scatter_plot)
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+JOBS = ['screen', 'benchmark', 'summarize']
+
+# Parameters used when --parameters is not given.
+DEFAULT_PARAMETERS = {
+    "static_weights": {"weights": [0.5, 0.5]},
+    "buy_and_hold": {},
+    "rebalancing_window": {"window": 20},
+    "calendar_rebalancing": {"frequency": "monthly"},
+    "drift_threshold": {"threshold": 0.05},
+    "inverse_volatility": {"lookback": 60, "window": 20},
+}
+
+
+def read_input(path: str, columns: Optional[List[str]] = None):
+    """Opens a partitioned dataset directory, or reads a Parquet/Feather file into a compact DataFrame.
+
+    Files are validated and converted to categorical strings and 32-bit numerics once, here, and
+    keep that layout through screening.
+    """
+    if os.path.isdir(path):
+        return PartitionedDataset(path)
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.parquet', '.pq'):
+        data = pd.read_parquet(path, columns=columns)
+    elif extension in ('.feather', '.arrow'):
+        data = pd.read_feather(path, columns=columns)
+    else:
+        raise ValueError(f"Unsupported input format '{extension}'; use Parquet, Feather or a dataset directory.")
+    return normalize_pair_schema(data, required=['pair_id', 'asset_class', 'signal_type', 'pair_performance'])
+
+
+def write_output(frame: pd.DataFrame, path: str) -> None:
+    """Writes a result as Parquet, Feather or CSV depending on the file extension."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.parquet', '.pq'):
+        frame.to_parquet(path)
+    elif extension in ('.feather', '.arrow'):
+        frame.reset_index(drop=True).to_feather(path)
+    elif extension == '.csv':
+        frame.to_csv(path, index=False)
+    else:
+        raise ValueError(f"Unsupported output format '{extension}'; use Parquet, Feather or CSV.")
+
+
+def pair_histories(data, pair_ids: np.ndarray) -> pd.DataFrame:
+    """Returns every row of the selected pairs, in their original order.
+
+    Screening keeps the top fraction of rows, which can cut a pair's history short; benchmarks
+    are run on the complete histories instead. A dataset directory is read one partition at a time.
+    """
+    if isinstance(data, pd.DataFrame):
+        return data[data['pair_id'].isin(pair_ids)]
+    frames = []
+    for asset_class, signal_type in data.partitions():
+        partition = data.read(asset_class, signal_type)
+        frames.append(partition[partition['pair_id'].isin(pair_ids)])
+    return pd.concat(frames).sort_index(kind='stable') if frames else pd.DataFrame(columns=data.columns)
+
+
+def with_business_dates(histories: pd.DataFrame) -> pd.DataFrame:
+    """Adds a 'Date' column numbering each pair's rows as consecutive business days.
+
+    The pair universe has no timestamps; calendar-based benchmark strategies get the same business
+    day calendar as the app's `pair_history`.
+    """
+    position = histories.groupby('pair_id', observed=True, sort=False).cumcount().to_numpy()
+    calendar = pd.bdate_range('2020-01-01', periods=int(position.max()) + 1 if len(position) else 0)
+    return histories.assign(Date=calendar[position])
+
+
+def image_export_available() -> bool:
+    """Returns whether Plotly can write static images, which needs the kaleido package."""
+    try:
+        import kaleido  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def peak_memory_bytes() -> Optional[int]:
+    """Returns the peak resident memory of this process and its finished workers, or None if unknown."""
+    if resource is None:
+        return None
+    scale = 1 if sys.platform == 'darwin' else 1024  # ru_maxrss is in bytes on macOS, KiB on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) * scale
+
+
+def write_figures(curves: pd.DataFrame, summary: pd.DataFrame, directory: str, figure_format: str,
+                  window: int) -> List[str]:
+    """Writes the Sharpe ratio scatter plot and the rolling metrics of the best pair as static files.
+
+    Image formats need the kaleido package; 'html' writes standalone HTML files instead.
+    """
+    os.makedirs(directory, exist_ok=True)
+    best = summary.loc[summary['sharpe_ratio'].fillna(-np.inf).idxmax(), 'pair_id']
+    values = curves.loc[curves['pair_id'] == best, 'pair_portfolio'].to_numpy()
+    returns = pd.Series(values / np.r_[1.0, values[:-1]] - 1, index=pd.bdate_range('2020-01-01', periods=len(values)))
+
+    figures = {
+        'sharpe_ratios': generate_scatter_plot(summary, 'benchmark_sharpe_ratio', 'sharpe_ratio'),
+        'best_pair_metrics': generate_line_chart(calculate_performance_metrics(returns, window=min(window, len(values))),
+                                                 max_points=2_000),
+    }
+    paths = []
+    for name, figure in figures.items():
+        path = os.path.join(directory, f'{name}.{figure_format}')
+        if figure_format == 'html':
+            figure.write_html(path)
+        else:
+            figure.write_image(path)
+        paths.append(path)
+    return paths
+
+
+def run(args: argparse.Namespace) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """Runs the pipeline up to the stage of the selected job.
+
+    Returns the result of the job, and the benchmark curves of the benchmark and summarize jobs.
+    """
+    data = read_input(args.input)
+    screened = screen_universe(data, args.selectivity, args.asset_classes, args.signal_types, max_workers=args.workers)
+    if args.job == 'screen':
+        return screened, None
+
+    selected = pair_histories(data, screened['pair_id'].unique())
+    if BENCHMARK_STRATEGIES[args.strategy].needs_timestamps and 'Date' not in selected.columns:
+        selected = with_business_dates(selected)
+    curves = compare_to_benchmark_parallel(selected, args.strategy, args.parameters, max_workers=args.workers)
+    if args.job == 'benchmark':
+        return curves, curves
+
+    summary = summarize_pair_curves(curves, periods_per_year=args.periods_per_year, risk_free_rate=args.risk_free_rate)
+    return summary, curves
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('job', choices=JOBS)
+    parser.add_argument('input', help="Parquet or Feather file, or partitioned dataset directory")
+    parser.add_argument('--output', required=True, help="path of the result file (.parquet, .feather or .csv)")
+    parser.add_argument('--selectivity', type=float, default=0.1, help="top fraction kept per asset class and signal type")
+    parser.add_argument('--asset-classes', nargs='+', default=ASSET_CLASSES)
+    parser.add_argument('--signal-types', nargs='+', default=SIGNAL_TYPES)
+    parser.add_argument('--strategy', choices=sorted(BENCHMARK_STRATEGIES), default='rebalancing_window')
+    parser.add_argument('--parameters', type=json.loads,
+                        help="JSON object of benchmark strategy parameters (default: DEFAULT_PARAMETERS of the strategy)")
+    parser.add_argument('--workers', type=int, help="threads for screening and processes for benchmarking (default: CPUs)")
+    parser.add_argument('--periods-per-year', type=int, default=252)
+    parser.add_argument('--risk-free-rate', type=float, default=0.0)
+    parser.add_argument('--figures', help="directory to write figures to (summarize job only)")
+    parser.add_argument('--figure-format', choices=['html', 'png', 'svg', 'pdf'], default='html',
+                        help="png, svg and pdf need the kaleido package")
+    parser.add_argument('--window', type=int, default=20, help="rolling window of the best pair's metrics chart")
+    args = parser.parse_args(argv)
+    if args.parameters is None:
+        args.parameters = DEFAULT_PARAMETERS.get(args.strategy, {})
+    if args.figures and args.figure_format != 'html' and not image_export_available():
+        parser.error(f"--figure-format {args.figure_format} needs the kaleido package; install it or use html")
+
+    start = time.perf_counter()
+    result, curves = run(args)
+    write_output(result, args.output)
+    elapsed = time.perf_counter() - start
+    if args.figures and args.job == 'summarize':
+        for path in write_figures(curves, result, args.figures, args.figure_format, args.window):
+            print(f"wrote {path}")
+
+    pairs = result['pair_id'].nunique() if 'pair_id' in result.columns else len(result)
+    peak = peak_memory_bytes()
+    print(f"{args.job}: {len(result)} rows, {pairs} pairs in {elapsed:.2f} s "
+          f"({pairs / max(elapsed, 1e-9):.1f} pairs/sec), peak memory "
+          f"{'unknown' if peak is None else f'{peak / 2 ** 20:.1f} MiB'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
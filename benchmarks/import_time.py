@@ -0,0 +1,123 @@
+"""Startup-time benchmark for the entry points of definitions/definitions.py.
+
+Runs each entry point in a fresh interpreter under ``python -X importtime``, parses the report and
+records the cumulative import time, the number of modules imported and whether modules that the
+entry point must not pull in (such as Plotly for the numeric core) were imported. Results are
+written as JSON and optionally compared with a stored baseline.
+
+Usage:
+    python benchmarks/import_time.py --output import_times.json
+    python benchmarks/import_time.py --baseline import_times.json --threshold 0.2
+
+The exit status is 1 when an entry point imports a forbidden module or is slower than the baseline.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from statistics import median
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> (code run in a fresh interpreter, top-level packages it must not import)
+Case = Tuple[str, Tuple[str, ...]]
+
+CASES: Dict[str, Case] = {
+    'definitions': ("import definitions.definitions", ('plotly', 'pyarrow.dataset')),
+    'filter_data': ("from definitions.definitions import filter_data", ('plotly',)),
+    'calculate_sharpe_ratio': ("from definitions.definitions import calculate_sharpe_ratio", ('plotly',)),
+    'compare_to_benchmark': ("from definitions.definitions import compare_to_benchmark", ('plotly',)),
+    'charts': ("from definitions.definitions import go; go.Figure", ()),
+}
+
+
+def parse_importtime(report: str) -> Dict[str, int]:
+    """Returns the cumulative import time in microseconds of every module in a ``-X importtime`` report."""
+    modules = {}
+    for line in report.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name[1:].rstrip()] = int(cumulative)    # keeps the indentation that encodes the nesting
+    return modules
+
+
+def measure(code: str, repeat: int) -> Tuple[Dict, List[str]]:
+    """Runs `code` `repeat` times in fresh interpreters; returns a summary and the names of the imported modules."""
+    totals, modules = [], {}
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT,
+                                   capture_output=True, text=True, check=True)
+        modules = parse_importtime(completed.stderr)
+        # Top-level entries (no indentation) are the modules imported directly; their cumulative times add up.
+        totals.append(sum(us for name, us in modules.items() if not name.startswith(' ')))
+
+    slowest = sorted(((us, name.strip()) for name, us in modules.items() if not name.startswith(' ')), reverse=True)[:5]
+    record = {
+        'median_seconds': median(totals) / 1e6,
+        'best_seconds': min(totals) / 1e6,
+        'modules': len(modules),
+        'packages': sorted({name.strip().split('.')[0] for name in modules}),
+        'slowest': [{'module': name, 'seconds': us / 1e6} for us, name in slowest],
+    }
+    return record, [name.strip() for name in modules]
+
+
+def run(cases: List[str], repeat: int) -> Tuple[List[Dict], List[str]]:
+    """Measures the selected entry points and returns the records and the forbidden-import violations."""
+    results, violations = [], []
+    for name in cases:
+        code, forbidden = CASES[name]
+        summary, imported = measure(code, repeat)
+        record = {'case': name, 'code': code, **summary}
+        for module in forbidden:
+            if any(found == module or found.startswith(module + '.') for found in imported):
+                violations.append(f"{name}: imports {module}")
+        print(f"{name:28s} {record['median_seconds']:8.3f} s {record['modules']:6d} modules", flush=True)
+        results.append(record)
+    return results, violations
+
+
+def compare(results: List[Dict], baseline: List[Dict], threshold: float) -> List[str]:
+    """Returns a message for every entry point that is slower than the baseline by more than `threshold`."""
+    reference = {r['case']: r for r in baseline}
+    regressions = []
+    for record in results:
+        base = reference.get(record['case'])
+        if base is None:
+            continue
+        ratio = record['median_seconds'] / max(base['median_seconds'], 1e-9)
+        if ratio > 1 + threshold:
+            regressions.append(f"{record['case']}: {base['median_seconds']:.3f} s -> {record['median_seconds']:.3f} s ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=list(CASES))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="path of the JSON results file")
+    parser.add_argument('--baseline', help="path of a JSON results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed relative slowdown before flagging")
+    args = parser.parse_args(argv)
+
+    results, problems = run(args.cases, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'results': results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems += compare(results, json.load(f)['results'], args.threshold)
+    for message in problems:
+        print(f"REGRESSION {message}")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
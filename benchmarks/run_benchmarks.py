@@ -0,0 +1,191 @@
+"""Benchmark suite for the analytics functions in definitions/definitions.py.
+
+Measures wall time and peak traced memory of every public hot path across scaling input
+sizes, writes the results as JSON and optionally compares them with a stored baseline.
+
+Usage:
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --sizes 1000 100000 --baseline baseline.json --threshold 0.2
+
+The exit status is 1 when a regression against the baseline is found.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from definitions.definitions import (  # noqa: E402
+    calculate_performance_metrics,
+    calculate_sharpe_ratio,
+    calculate_sharpe_ratios,
+    compare_to_benchmark,
+    compare_to_benchmark_batch,
+    compare_to_benchmark_parallel,
+    compute_pair_spreads,
+    filter_data,
+    generate_bar_chart,
+    generate_line_chart,
+    generate_scatter_plot,
+    load_data,
+)
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+DEFAULT_PAIRS = [1, 10, 100, 1_000, 10_000]
+PERIODS_PER_PAIR = 250
+
+
+def _universe(size: int) -> pd.DataFrame:
+    return load_data(size, seed=0, schema='pairs', periods_per_pair=min(size, PERIODS_PER_PAIR))
+
+
+def _metrics_frame(size: int) -> pd.DataFrame:
+    returns = pd.Series(np.random.default_rng(0).normal(0, 0.01, size),
+                        index=pd.date_range('2000-01-01', periods=size, freq='min'))
+    return calculate_performance_metrics(returns, window=min(size, 60))
+
+
+def _contributions(pairs: int, drivers: int = 40) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'Pair': np.repeat([f'pair{i}' for i in range(pairs)], drivers),
+        'Driver': np.tile([f'driver{j}' for j in range(drivers)], pairs),
+        'Contribution': rng.normal(0, 1, pairs * drivers),
+    })
+
+
+def _sharpe_loop(returns: np.ndarray, std_dev: np.ndarray) -> List[float]:
+    return [calculate_sharpe_ratio(float(r), 0.01, float(s)) for r, s in zip(returns, std_dev)]
+
+
+# name -> (dimension, maximum size, setup(size) -> (function, args, kwargs))
+Case = Tuple[str, int, Callable[[int], Tuple[Callable, tuple, dict]]]
+
+CASES: Dict[str, Case] = {
+    'load_data': ('rows', 10_000_000, lambda n: (load_data, (n,), {'seed': 0})),
+    'load_data_pairs': ('rows', 10_000_000, lambda n: (load_data, (n,), {'seed': 0, 'schema': 'pairs'})),
+    'filter_data': ('rows', 10_000_000, lambda n: (filter_data, (_universe(n), 'Equity', 'Momentum', 0.1), {})),
+    'calculate_sharpe_ratio': ('rows', 100_000, lambda n: (
+        _sharpe_loop, (np.random.default_rng(0).normal(0.05, 0.02, n), np.full(n, 0.1)), {})),
+    'calculate_sharpe_ratios': ('rows', 10_000_000, lambda n: (
+        calculate_sharpe_ratios, (np.random.default_rng(0).normal(0.05, 0.02, n), 0.01, np.full(n, 0.1)), {})),
+    'compare_to_benchmark_static': ('rows', 10_000_000, lambda n: (
+        compare_to_benchmark, (_universe(n), 'static_weights', {'weights': [0.5, 0.5]}), {})),
+    'compare_to_benchmark_rebalancing': ('rows', 10_000_000, lambda n: (
+        compare_to_benchmark, (_universe(n), 'rebalancing_window', {'window': 20}), {})),
+    'compare_to_benchmark_inverse_volatility': ('rows', 10_000_000, lambda n: (
+        compare_to_benchmark, (_universe(n), 'inverse_volatility', {'lookback': 60, 'window': 20}), {})),
+    'compare_to_benchmark_drift_threshold': ('rows', 10_000_000, lambda n: (
+        compare_to_benchmark, (_universe(n), 'drift_threshold', {'threshold': 0.05}), {})),
+    'compare_to_benchmark_batch': ('pairs', 10_000, lambda p: (
+        compare_to_benchmark_batch, (load_data(p * PERIODS_PER_PAIR, seed=0, schema='pairs'),
+                                     'rebalancing_window', {'window': 20}), {})),
+    'compare_to_benchmark_parallel': ('pairs', 10_000, lambda p: (
+        compare_to_benchmark_parallel, (load_data(p * PERIODS_PER_PAIR, seed=0, schema='pairs'),
+                                        'rebalancing_window', {'window': 20}), {})),
+    'compute_pair_spreads_ols': ('rows', 10_000_000, lambda n: (compute_pair_spreads, (_universe(n),), {'window': 60})),
+    'compute_pair_spreads_kalman': ('rows', 1_000_000, lambda n: (compute_pair_spreads, (_universe(n),), {'method': 'kalman'})),
+    'generate_line_chart': ('rows', 100_000, lambda n: (generate_line_chart, (_metrics_frame(n),), {})),
+    'generate_line_chart_downsampled': ('rows', 10_000_000, lambda n: (
+        generate_line_chart, (_metrics_frame(n),), {'max_points': 2000, 'webgl': True})),
+    'generate_bar_chart': ('pairs', 10_000, lambda p: (generate_bar_chart, (_contributions(p),), {})),
+    'generate_scatter_plot': ('rows', 10_000_000, lambda n: (generate_scatter_plot, (_universe(n), 'asset1', 'pair_performance'), {})),
+}
+
+
+def measure(function: Callable, args: tuple, kwargs: dict, repeat: int) -> Dict[str, float]:
+    """Runs a function `repeat` times and returns its best and median wall time and peak traced memory."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args, **kwargs)
+        timings.append(time.perf_counter() - start)
+
+    # Memory is traced in a separate run so the tracing overhead does not distort the timings.
+    tracemalloc.start()
+    try:
+        function(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'best_seconds': min(timings), 'median_seconds': float(np.median(timings)), 'peak_memory_bytes': peak}
+
+
+def run(cases: List[str], sizes: List[int], pairs: List[int], repeat: int) -> List[Dict]:
+    """Runs the selected cases for every applicable size and returns one record per measurement."""
+    results = []
+    for name in cases:
+        dimension, max_size, setup = CASES[name]
+        for size in (sizes if dimension == 'rows' else pairs):
+            record = {'case': name, 'dimension': dimension, 'size': size}
+            if size > max_size:
+                record['skipped'] = f"size above the case limit of {max_size}"
+            else:
+                function, args, kwargs = setup(size)
+                record.update(measure(function, args, kwargs, repeat))
+                print(f"{name:36s} {dimension}={size:<10d} {record['median_seconds']:10.4f} s "
+                      f"{record['peak_memory_bytes'] / 2 ** 20:10.1f} MiB", flush=True)
+            results.append(record)
+    return results
+
+
+def compare(results: List[Dict], baseline: List[Dict], threshold: float) -> List[str]:
+    """Returns a message for every measurement that is slower than the baseline by more than `threshold`."""
+    reference = {(r['case'], r['size']): r for r in baseline if 'skipped' not in r}
+    regressions = []
+    for record in results:
+        base = reference.get((record['case'], record['size']))
+        if base is None or 'skipped' in record:
+            continue
+        ratio = record['median_seconds'] / max(base['median_seconds'], 1e-9)
+        if ratio > 1 + threshold:
+            regressions.append(f"{record['case']} {record['dimension']}={record['size']}: "
+                               f"{base['median_seconds']:.4f} s -> {record['median_seconds']:.4f} s ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=sorted(CASES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES, help="row counts for row-scaled cases")
+    parser.add_argument('--pairs', nargs='+', type=int, default=DEFAULT_PAIRS, help="pair counts for pair-scaled cases")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help="path of the JSON results file")
+    parser.add_argument('--baseline', help="path of a JSON results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed relative slowdown before flagging")
+    args = parser.parse_args(argv)
+
+    results = run(args.cases, args.sizes, args.pairs, args.repeat)
+
+    if args.output:
+        report = {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)['results'], args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,84 +1,626 @@
 
+import importlib
+import types
+
+class _LazyModule(types.ModuleType):
+    """Stand-in for a module that is only imported when one of its attributes is first used.
+
+    Keeps Plotly and the profiling modules out of the import of this module, so the numeric
+    functions load without them. Looked-up attributes are cached on the stand-in.
+
+    Args:
+        name: Fully qualified name of the module, e.g. 'plotly.graph_objects'.
+    """
+
+    def __getattr__(self, attr: str):
+        value = getattr(importlib.import_module(self.__name__), attr)
+        setattr(self, attr, value)
+        return value
+
+
+import functools
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
 import pandas as pd
 import numpy as np
 
-def load_data() -> pd.DataFrame:
+cProfile = _LazyModule('cProfile')
+tracemalloc = _LazyModule('tracemalloc')
+
+class MetricsRegistry:
+    """In-process registry of per-function call metrics for the analytics functions.
+
+    Instrumentation is off by default; while disabled an instrumented function only pays for one
+    attribute check. When enabled, every call records its latency and input row count (or, for functions without array inputs
+    such as the data generators, the rows they return), and
+    optionally the peak bytes allocated (through tracemalloc) and a cProfile or pyinstrument trace
+    for calls slower than a threshold. The result caches report their hits and misses here too.
+
+    Attributes:
+        enabled: Whether calls are being recorded.
+        track_memory: Whether peak allocations are traced.
+        profile_threshold: Latency in seconds above which a call's profile is written, or None.
+        profile_dir: Directory the profiles are written to.
+        profiler: 'cprofile' or 'pyinstrument'.
     """
-    Loads a synthetic dataset into a Pandas DataFrame.
 
-    The dataset consists of three columns: 'feature1' (integer), 'feature2' (float), and 'target' (integer).
-    It generates 100 rows of random data.
+    def __init__(self):
+        self.enabled = False
+        self.track_memory = False
+        self.profile_threshold: Optional[float] = None
+        self.profile_dir = '.'
+        self.profiler = 'cprofile'
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _entry(self, name: str) -> Dict[str, float]:
+        entry = self._stats.get(name)
+        if entry is None:
+            entry = self._stats[name] = {'calls': 0, 'total_seconds': 0.0, 'max_seconds': 0.0, 'rows': 0,
+                                         'peak_bytes': 0, 'cache_hits': 0, 'cache_misses': 0, 'profiles': 0}
+        return entry
+
+    def record_cache(self, name: str, hit: bool) -> None:
+        """Counts a cache hit or miss for `name` if instrumentation is enabled."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entry(name)['cache_hits' if hit else 'cache_misses'] += 1
+
+    def call(self, name: str, func: Callable, args: tuple, kwargs: dict):
+        """Runs an instrumented call and records its metrics."""
+        # Memory tracing and profiling only wrap the outermost instrumented call of a thread,
+        # since nested calls would reset the traced peak and clash with the active profiler.
+        outermost = not getattr(self._local, 'active', False)
+        trace_memory = outermost and self.track_memory
+        profile = outermost and self.profile_threshold is not None
+
+        if trace_memory:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+        profiler = self._start_profiler() if profile else None
+
+        self._local.active = True
+        result = None
+        exhausted = False
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+            return result
+        except StopIteration:
+            exhausted = True    # the end of an instrumented iterator (see `iterate`) is not a call
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self._local.active = not outermost
+            peak_bytes = 0
+            if trace_memory:
+                peak_bytes = tracemalloc.get_traced_memory()[1] - baseline
+                if started_tracing:
+                    tracemalloc.stop()
+            dumped = profiler is not None and self._stop_profiler(profiler, name, elapsed)
+
+            # Functions without array inputs, such as data generators, count the rows they return.
+            rows = next((len(value) for value in args + (result,)
+                         if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray))), 0)
+            if not exhausted:
+                with self._lock:
+                    entry = self._entry(name)
+                    entry['calls'] += 1
+                    entry['total_seconds'] += elapsed
+                    entry['max_seconds'] = max(entry['max_seconds'], elapsed)
+                    entry['rows'] += rows
+                    entry['peak_bytes'] = max(entry['peak_bytes'], peak_bytes)
+                    entry['profiles'] += int(dumped)
+
+    def iterate(self, name: str, iterable: Iterable) -> Iterator:
+        """Yields the items of an iterable, recording the production of every item as one call of `name`.
+
+        Used for lazy functions, whose work happens while their result is consumed rather than when
+        they are called.
+        """
+        iterator = iter(iterable)
+        while True:
+            try:
+                item = self.call(name, next, (iterator,), {}) if self.enabled else next(iterator)
+            except StopIteration:
+                return
+            yield item
+
+    def _start_profiler(self):
+        if self.profiler == 'pyinstrument':
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def _stop_profiler(self, profiler, name: str, elapsed: float) -> bool:
+        """Stops a profiler and writes its trace if the call exceeded the threshold."""
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+        else:
+            profiler.stop()
+        if elapsed <= self.profile_threshold:
+            return False
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        stem = os.path.join(self.profile_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{time.perf_counter_ns()}")
+        if isinstance(profiler, cProfile.Profile):
+            profiler.dump_stats(stem + '.prof')
+        else:
+            with open(stem + '.html', 'w') as f:
+                f.write(profiler.output_html())
+        return True
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Returns a copy of the recorded metrics, keyed by function name."""
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._stats.items()}
 
-    Returns:
-        pd.DataFrame: A Pandas DataFrame containing the synthetic dataset.
+    def reset(self) -> None:
+        """Clears the recorded metrics."""
+        with self._lock:
+            self._stats.clear()
+
+
+metrics = MetricsRegistry()
+
+
+def enable_instrumentation(track_memory: bool = False, profile_threshold: Optional[float] = None,
+                           profile_dir: str = '.', profiler: str = 'cprofile') -> None:
+    """Turns on call metrics for the instrumented functions.
+
+    Args:
+        track_memory: If True, record the peak bytes allocated per call with tracemalloc (slow).
+        profile_threshold: If given, profile calls and keep the traces of those slower than this many seconds.
+        profile_dir: Directory the profile traces are written to.
+        profiler: 'cprofile' (.prof files) or 'pyinstrument' (.html files, requires pyinstrument).
+
+    Raises:
+        ValueError: If the profiler is unknown.
+        ImportError: If pyinstrument is requested but not installed.
     """
-    try:
-        # Generate synthetic data
-        num_rows = 100
-        feature1 = np.random.randint(0, 100, num_rows)
-        feature2 = np.random.rand(num_rows)
-        target = np.random.randint(0, 2, num_rows)  # Binary target variable
+    if profiler not in ('cprofile', 'pyinstrument'):
+        raise ValueError("Profiler must be 'cprofile' or 'pyinstrument'.")
+    if profiler == 'pyinstrument' and profile_threshold is not None:
+        import pyinstrument  # noqa: F401  (fail early if it is missing)
+    metrics.track_memory = track_memory
+    metrics.profile_threshold = profile_threshold
+    metrics.profile_dir = profile_dir
+    metrics.profiler = profiler
+    metrics.enabled = True
 
-        # Create a Pandas DataFrame
-        data = {'feature1': feature1, 'feature2': feature2, 'target': target}
-        df = pd.DataFrame(data)
 
-        return df
-    except Exception as e:
-        print(f"An error occurred while loading data: {e}")
-        return pd.DataFrame()  # Return an empty DataFrame in case of an error
+def disable_instrumentation() -> None:
+    """Turns off call metrics; recorded metrics are kept until `metrics.reset()`."""
+    metrics.enabled = False
+
+
+def instrumented(func: Callable) -> Callable:
+    """Decorator that records call metrics for `func` in `metrics` while instrumentation is enabled."""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not metrics.enabled:
+            return func(*args, **kwargs)
+        return metrics.call(name, func, args, kwargs)
+
+    return wrapper
 
 
 import pandas as pd
 import numpy as np
+from typing import Iterator, Optional
+
+ASSET_CLASSES = ['Equity', 'Fixed Income', 'Commodity', 'FX']
+SIGNAL_TYPES = ['Momentum', 'Value', 'Carry', 'Growth']
+
+def _feature_chunk(rng: np.random.Generator, num_rows: int, compact: bool) -> pd.DataFrame:
+    """Generates rows of the synthetic 'feature1', 'feature2', 'target' dataset."""
+    int_dtype = 'int8' if compact else 'int64'
+    float_dtype = 'float32' if compact else 'float64'
+    return pd.DataFrame({
+        'feature1': rng.integers(0, 100, num_rows, dtype=int_dtype),
+        'feature2': rng.random(num_rows, dtype=float_dtype),
+        'target': rng.integers(0, 2, num_rows, dtype=int_dtype),  # Binary target variable
+    })
+
+
+def _pair_universe_chunks(rng: np.random.Generator, num_rows: int, chunk_size: int, periods_per_pair: int,
+                          compact: bool) -> Iterator[pd.DataFrame]:
+    """Generates the synthetic pair universe chunk by chunk.
+
+    Rows are grouped into consecutive blocks of `periods_per_pair` observations per pair.
+    Pair attributes and the last asset log prices are carried across chunk boundaries, so the
+    concatenated chunks form continuous price paths.
+    """
+    float_dtype = 'float32' if compact else 'float64'
+    carried = None  # (asset code, signal code, performance, last log prices) of a pair split across chunks
+
+    for start in range(0, num_rows, chunk_size):
+        rows = np.arange(start, min(start + chunk_size, num_rows))
+        pair_ids = rows // periods_per_pair
+        first_pair = pair_ids[0]
+        num_pairs = pair_ids[-1] - first_pair + 1
+        continues = carried is not None and start % periods_per_pair != 0
+        num_new = num_pairs - int(continues)
+
+        asset_codes = rng.integers(0, len(ASSET_CLASSES), num_new)
+        signal_codes = rng.integers(0, len(SIGNAL_TYPES), num_new)
+        performance = rng.normal(0.05, 0.1, num_new)
+        base_prices = np.log(rng.uniform(20, 200, (num_new, 2)))
+        if continues:
+            asset_codes = np.r_[carried[0], asset_codes]
+            signal_codes = np.r_[carried[1], signal_codes]
+            performance = np.r_[carried[2], performance]
+            base_prices = np.vstack([carried[3], base_prices])
+
+        # Log-price random walks that restart at the base price of every new pair.
+        local_pairs = pair_ids - first_pair
+        steps = rng.normal(0.0002, 0.01, (len(rows), 2))
+        steps[rows % periods_per_pair == 0] = 0
+        walk = np.cumsum(steps, axis=0)
+        pair_starts = np.flatnonzero(np.diff(local_pairs, prepend=-1) != 0)
+        log_prices = walk - (walk - steps)[pair_starts][local_pairs] + base_prices[local_pairs]
+        prices = np.exp(log_prices)
+
+        carried = (asset_codes[-1], signal_codes[-1], performance[-1], log_prices[-1:])
+
+        if compact:
+            asset_class = pd.Categorical.from_codes(asset_codes[local_pairs], categories=ASSET_CLASSES)
+            signal_type = pd.Categorical.from_codes(signal_codes[local_pairs], categories=SIGNAL_TYPES)
+        else:
+            asset_class = np.array(ASSET_CLASSES, dtype=object)[asset_codes[local_pairs]]
+            signal_type = np.array(SIGNAL_TYPES, dtype=object)[signal_codes[local_pairs]]
+
+        yield pd.DataFrame({
+            'pair_id': pair_ids.astype('int32' if compact else 'int64'),
+            'asset_class': asset_class,
+            'signal_type': signal_type,
+            'pair_performance': performance[local_pairs].astype(float_dtype),
+            'asset1': prices[:, 0].astype(float_dtype),
+            'asset2': prices[:, 1].astype(float_dtype),
+            'pair_returns': rng.normal(0.0002, 0.01, len(rows)).astype(float_dtype),
+        }, index=pd.RangeIndex(rows[0], rows[-1] + 1))
+
+
+def _validate_load_arguments(num_rows: int, chunk_size: int, schema: str, periods_per_pair: int) -> None:
+    """Validates the size and schema arguments of `load_data` and `load_data_chunks`."""
+    for name, value in [('num_rows', num_rows), ('chunk_size', chunk_size), ('periods_per_pair', periods_per_pair)]:
+        if not isinstance(value, (int, np.integer)) or isinstance(value, bool):
+            raise TypeError(f"{name} must be an integer.")
+    if num_rows < 0:
+        raise ValueError("num_rows cannot be negative.")
+    if chunk_size < 1 or periods_per_pair < 1:
+        raise ValueError("chunk_size and periods_per_pair must be at least 1.")
+    if schema not in ('features', 'pairs'):
+        raise ValueError("Schema must be 'features' or 'pairs'.")
+
+
+def _generate_chunks(rng: np.random.Generator, num_rows: int, chunk_size: int, schema: str, compact: bool,
+                     periods_per_pair: int) -> Iterator[pd.DataFrame]:
+    """Yields the chunks of a synthetic dataset with validated arguments."""
+    if schema == 'pairs':
+        yield from _pair_universe_chunks(rng, num_rows, chunk_size, periods_per_pair, compact)
+        return
+
+    for start in range(0, num_rows, chunk_size):
+        chunk = _feature_chunk(rng, min(chunk_size, num_rows - start), compact)
+        chunk.index = pd.RangeIndex(start, start + len(chunk))
+        yield chunk
+
+
+def load_data_chunks(num_rows: int = 100, chunk_size: int = 1_000_000, seed: Optional[int] = None,
+                     compact: bool = False, schema: str = 'features', periods_per_pair: int = 252) -> Iterator[pd.DataFrame]:
+    """Generates a synthetic dataset as a sequence of DataFrame chunks.
+
+    Only one chunk is held in memory at a time, so arbitrarily large load-test datasets can be
+    streamed. Chunks carry a RangeIndex continuing from the previous chunk.
+
+    Args:
+        num_rows: Total number of rows to generate.
+        chunk_size: Maximum number of rows per chunk.
+        seed: Seed for `np.random.default_rng`. The same seed and chunk size reproduce the same data.
+        compact: If True, use int8/int32/float32 columns and categorical strings instead of
+            int64/float64 columns and object strings. The 'pairs' schema then has the layout
+            produced by `normalize_pair_schema`, with categories shared by all chunks.
+        schema: 'features' for the 'feature1', 'feature2', 'target' dataset, or 'pairs' for the pair
+            universe with 'pair_id', 'asset_class', 'signal_type', 'pair_performance', 'asset1',
+            'asset2' and 'pair_returns' columns.
+        periods_per_pair: Number of consecutive rows per pair in the 'pairs' schema.
+
+    Returns:
+        Iterator over Pandas DataFrame chunks of at most `chunk_size` rows.
+
+    Raises:
+        TypeError: If num_rows, chunk_size or periods_per_pair is not an integer.
+        ValueError: If a size is out of range or the schema is unknown.
+    """
+    _validate_load_arguments(num_rows, chunk_size, schema, periods_per_pair)
+    chunks = _generate_chunks(np.random.default_rng(seed), num_rows, chunk_size, schema, compact, periods_per_pair)
+    return metrics.iterate('load_data_chunks', chunks)
 
-def load_data() -> pd.DataFrame:
+
+@instrumented
+def load_data(num_rows: int = 100, seed: Optional[int] = None, compact: bool = False, schema: str = 'features',
+              periods_per_pair: int = 252) -> pd.DataFrame:
     """
     Loads a synthetic dataset into a Pandas DataFrame.
 
-    The dataset consists of three columns: 'feature1' (integer), 'feature2' (float), and 'target' (integer).
-    It generates 100 rows of random data.
+    By default the dataset consists of three columns: 'feature1' (integer), 'feature2' (float), and 'target' (integer).
+    With schema='pairs' it is the pair universe used by the filtering and benchmark functions instead
+    (see `load_data_chunks`). It generates 100 rows of random data unless num_rows is given.
+
+    Args:
+        num_rows: Number of rows to generate.
+        seed: Seed for `np.random.default_rng`, for reproducible datasets.
+        compact: If True, use int8/int32/float32 columns and categorical strings.
+        schema: 'features' or 'pairs'.
+        periods_per_pair: Number of consecutive rows per pair in the 'pairs' schema.
 
     Returns:
         pd.DataFrame: A Pandas DataFrame containing the synthetic dataset.
+
+    Raises:
+        TypeError: If a size argument is not an integer.
+        ValueError: If a size argument is out of range or the schema is unknown.
     """
-    try:
-        # Generate synthetic data
-        num_rows = 100
-        feature1 = np.random.randint(0, 100, num_rows)
-        feature2 = np.random.rand(num_rows)
-        target = np.random.randint(0, 2, num_rows)  # Binary target variable
+    _validate_load_arguments(num_rows, max(num_rows, 1), schema, periods_per_pair)
 
-        # Create a Pandas DataFrame
-        data = {'feature1': feature1, 'feature2': feature2, 'target': target}
-        df = pd.DataFrame(data)
+    try:
+        # Generate synthetic data in a single chunk
+        rng = np.random.default_rng(seed)
+        if num_rows == 0:
+            # Generate one row and drop it to keep the columns and dtypes of the schema
+            return next(_generate_chunks(rng, 1, 1, schema, compact, periods_per_pair)).iloc[:0]
 
-        return df
+        return next(_generate_chunks(rng, num_rows, num_rows, schema, compact, periods_per_pair))
     except Exception as e:
         print(f"An error occurred while loading data: {e}")
         return pd.DataFrame()  # Return an empty DataFrame in case of an error
 
 
 import pandas as pd
-from typing import Union
+import numpy as np
+from typing import Dict, List, Mapping, Optional, Sequence
 
-def filter_data(data: pd.DataFrame, asset_class: str, signal_type: str, selectivity_level: Union[int, float]) -> pd.DataFrame:
+STRING_COLUMNS = ['asset_class', 'signal_type', 'Pair', 'Driver']
+NUMERIC_COLUMNS = ['pair_performance', 'asset1', 'asset2', 'pair_returns', 'Contribution']
+SHARED_CATEGORIES: Dict[str, List[str]] = {'asset_class': ASSET_CLASSES, 'signal_type': SIGNAL_TYPES}
+
+def _shared_categorical(column: pd.Series, categories: Sequence) -> pd.Series:
+    """Converts a string column to a categorical whose categories start with `categories`.
+
+    Values outside `categories` are appended in sorted order, so columns normalized with the same
+    categories share one dictionary (and the same codes) and concatenate without falling back to
+    object dtype.
     """
-    Filters the data based on selected asset class, signal type, and selectivity level.
+    values = column.cat.categories if isinstance(column.dtype, pd.CategoricalDtype) else pd.Index(column.dropna().unique())
+    extra = values.difference(pd.Index(categories, dtype=object))
+    dtype = pd.CategoricalDtype(list(categories) + list(extra))
+    return column if column.dtype == dtype else column.astype(dtype)
+
+
+def _downcast_numeric(column: pd.Series, rtol: Optional[float]) -> pd.Series:
+    """Narrows 64-bit integers to int32 if they fit, and 64-bit floats to float32 if they round-trip within rtol."""
+    dtype = column.dtype
+    if not isinstance(dtype, np.dtype) or dtype.itemsize <= 4:
+        return column
+    if dtype.kind in 'iu':
+        bounds = np.iinfo('int32')
+        if column.empty or (column.min() >= bounds.min and column.max() <= bounds.max):
+            return column.astype('int32')
+    elif dtype.kind == 'f' and rtol is not None:
+        values = column.to_numpy()
+        with np.errstate(over='ignore'):
+            narrowed = values.astype('float32')
+        if np.allclose(narrowed, values, rtol=rtol, atol=0.0, equal_nan=True):
+            return pd.Series(narrowed, index=column.index, name=column.name)
+    return column
+
+
+@instrumented
+def normalize_pair_schema(data: pd.DataFrame, required: Sequence[str] = (),
+                          categories: Optional[Mapping[str, Sequence]] = None, rtol: Optional[float] = 1e-6) -> pd.DataFrame:
+    """Validates a pair-universe or contribution DataFrame once and converts it to compact dtypes.
+
+    String columns ('asset_class', 'signal_type', 'Pair', 'Driver' and any other column of strings)
+    become categoricals. 'asset_class' and 'signal_type' share the `ASSET_CLASSES` and `SIGNAL_TYPES`
+    dictionaries, so normalized frames and chunks keep identical categories through filtering and
+    concatenation. 64-bit integers are narrowed to int32 when their range allows, and 64-bit floats
+    to float32 when every value round-trips within `rtol`. The output of ``load_data(..., compact=True)``
+    already has this layout and is returned as it is.
+    The analytics functions upcast these columns to float64 before compounding
+    or other arithmetic, so only storage is narrowed.
+
+    Only converted columns are rebuilt; the input is not modified and, when nothing needs
+    converting, it is returned without a copy.
 
     Args:
-        data: Pandas DataFrame containing the dataset.
-        asset_class: The selected asset class.
-        signal_type: The selected signal type.
-        selectivity_level: The selectivity level (percentage of top-performing pairs, between 0 and 1 inclusive).
+        data: Pandas DataFrame to normalize.
+        required: Columns that must be present.
+        categories: Categories per column to start the dictionaries with, e.g. the categories of a
+            previously normalized chunk. Defaults to `SHARED_CATEGORIES`; values that are not listed
+            are appended.
+        rtol: Relative tolerance of the float32 round trip, or None to keep 64-bit floats.
 
     Returns:
-        Pandas DataFrame containing the filtered data.
-    """
+        Pandas DataFrame with the same columns, index and values in compact dtypes.
 
-    # Input Validation
+    Raises:
+        TypeError: If data is not a Pandas DataFrame, a string column holds non-string values or a
+            numeric column is not numeric.
+        KeyError: If a required column is missing.
+    """
     if not isinstance(data, pd.DataFrame):
         raise TypeError("Data must be a Pandas DataFrame.")
+    for col in required:
+        if col not in data.columns:
+            raise KeyError(f"DataFrame must contain '{col}' column.")
+    shared = dict(SHARED_CATEGORIES, **(categories or {}))
+
+    converted = {}
+    for col in data.columns:
+        column = data[col]
+        kind = pd.api.types.infer_dtype(column, skipna=True)
+        if col in NUMERIC_COLUMNS and not pd.api.types.is_numeric_dtype(column):
+            raise TypeError(f"Column '{col}' must be numeric.")
+        if col in STRING_COLUMNS and kind not in ('string', 'categorical', 'empty'):
+            raise TypeError(f"Column '{col}' must contain strings.")
+
+        if kind == 'string' or (kind == 'categorical' and col in shared):
+            result = _shared_categorical(column, shared.get(col, []))
+        elif pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+            result = _downcast_numeric(column, rtol)
+        else:
+            continue
+        if result is not column:
+            converted[col] = result
+
+    if not converted:
+        return data
+    # A shallow copy shares the unchanged columns; assigning a column replaces it only in the copy.
+    normalized = data.copy(deep=False)
+    for col, result in converted.items():
+        normalized[col] = result
+    return normalized
+
+
+import pandas as pd
+import numpy as np
+from typing import Dict, Optional, Tuple, Union
+
+def _top_k_positions(values: np.ndarray, k: int) -> np.ndarray:
+    """Returns the positions of the k largest values, ordered from largest to smallest.
+
+    Produces the same order as a stable descending sort followed by taking the first k
+    entries (ties keep their original order, NaN values come last), but uses partial
+    selection so only the k selected values are sorted.
+
+    Args:
+        values: 1-D float array.
+        k: Number of positions to return.
+
+    Returns:
+        Integer array of at most k positions into `values`.
+    """
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    missing = np.isnan(values)
+    valid = np.flatnonzero(~missing)
+    if k >= len(valid):
+        ordered = valid[np.argsort(-values[valid], kind='stable')]
+        return np.concatenate([ordered, np.flatnonzero(missing)[:k - len(valid)]])
+
+    valid_values = values[valid]
+    threshold = -np.partition(-valid_values, k - 1)[k - 1]
+    above = valid[valid_values > threshold]
+    ties = valid[valid_values == threshold][:k - len(above)]
+    selected = np.sort(np.concatenate([above, ties]))
+    return selected[np.argsort(-values[selected], kind='stable')]
+
+
+def _lower_codes(column: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """Factorizes a string column by its lower-cased values; missing values get code -1.
+
+    Categorical columns are lower-cased per category and their codes remapped, so no per-row
+    strings are created.
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        category_codes, uniques = pd.factorize(column.cat.categories.str.lower())
+        return np.r_[category_codes, -1][column.cat.codes.to_numpy()], uniques
+    return pd.factorize(column.str.lower())
+
+
+def _case_insensitive_matches(column: pd.Series, value: str) -> np.ndarray:
+    """Returns a boolean mask of the rows of a string column equal to value, ignoring case."""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        matching = np.r_[(column.cat.categories.str.lower() == value.lower()), False]
+        return matching[column.cat.codes.to_numpy()]
+    return (column.str.lower() == value.lower()).to_numpy(dtype=bool, na_value=False)
+
+
+class FilterIndex:
+    """Precomputed lookup of row positions by (asset class, signal type) for `filter_data`.
+
+    Built once over a dataset, it stores the lower-cased categories as integer codes and, for
+    every (asset_class, signal_type) group, the row positions sorted by descending
+    'pair_performance' (ties in row order, NaN last). Filtering then reduces to a dictionary
+    lookup and a slice.
+
+    Args:
+        data: Pandas DataFrame with 'asset_class' and 'signal_type' columns and, normally,
+            a 'pair_performance' column.
+
+    Raises:
+        TypeError: If data is not a Pandas DataFrame.
+        KeyError: If the 'asset_class' or 'signal_type' column is missing.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        if not isinstance(data, pd.DataFrame):
+            raise TypeError("Data must be a Pandas DataFrame.")
+
+        asset_codes, asset_classes = _lower_codes(data['asset_class'])
+        signal_codes, signal_types = _lower_codes(data['signal_type'])
+
+        self.num_rows = len(data)
+        self.asset_codes = asset_codes
+        self.signal_codes = signal_codes
+        self.asset_classes = list(asset_classes)
+        self.signal_types = list(signal_types)
+        self.has_performance = 'pair_performance' in data.columns
+
+        # Rows with a missing category never match a query and are left out of the groups.
+        in_group = (asset_codes >= 0) & (signal_codes >= 0)
+        group_codes = np.where(in_group, asset_codes * len(signal_types) + signal_codes, -1)
+        if self.has_performance:
+            performance = data['pair_performance'].to_numpy(dtype='float64', na_value=np.nan)
+            order = np.lexsort((-performance, group_codes))
+        else:
+            order = np.argsort(group_codes, kind='stable')
+        order = order[in_group[order]]
+
+        sorted_codes = group_codes[order]
+        starts = np.flatnonzero(np.diff(sorted_codes, prepend=-1) != 0)
+        ends = np.append(starts[1:], len(order))
+
+        self.sorted_positions = order
+        self.groups: Dict[Tuple[str, str], slice] = {}
+        for start, end in zip(starts, ends):
+            asset_code, signal_code = divmod(int(sorted_codes[start]), len(signal_types))
+            self.groups[(self.asset_classes[asset_code], self.signal_types[signal_code])] = slice(int(start), int(end))
+
+    def positions(self, asset_class: str, signal_type: str) -> np.ndarray:
+        """Returns the row positions of a group, best 'pair_performance' first.
+
+        Args:
+            asset_class: The selected asset class (case-insensitive).
+            signal_type: The selected signal type (case-insensitive).
+
+        Returns:
+            Integer array of row positions; empty if the group does not exist.
+        """
+        group = self.groups.get((asset_class.lower(), signal_type.lower()))
+        if group is None:
+            return np.empty(0, dtype=np.intp)
+        return self.sorted_positions[group]
+
+
+def _validate_filter_arguments(asset_class: str, signal_type: str, selectivity_level: Union[int, float]) -> None:
+    """Validates the query arguments shared by `filter_data` and its cached and on-disk variants."""
     if not isinstance(asset_class, str):
         raise TypeError("Asset class must be a string.")
     if not isinstance(signal_type, str):
@@ -88,69 +630,363 @@ def filter_data(data: pd.DataFrame, asset_class: str, signal_type: str, selectiv
     if not 0 <= selectivity_level <= 1:
         raise ValueError("Selectivity level must be between 0 and 1 (inclusive).")
 
-    # Create a copy of the DataFrame to avoid modifying the original
-    filtered_df = data.copy()
 
-    # Case-insensitive filtering
-    if not filtered_df.empty:
-        try:
-            filtered_df = filtered_df[filtered_df['asset_class'].str.lower() == asset_class.lower()]
-            filtered_df = filtered_df[filtered_df['signal_type'].str.lower() == signal_type.lower()]
-        except KeyError:
-            return pd.DataFrame()
+@instrumented
+def filter_data(data: pd.DataFrame, asset_class: str, signal_type: str, selectivity_level: Union[int, float],
+                index: Optional[FilterIndex] = None) -> pd.DataFrame:
+    """
+    Filters the data based on selected asset class, signal type, and selectivity level.
+
+    Args:
+        data: Pandas DataFrame containing the dataset, or a PartitionedDataset to query on disk.
+        asset_class: The selected asset class.
+        signal_type: The selected signal type.
+        selectivity_level: The selectivity level (percentage of top-performing pairs, between 0 and 1 inclusive).
+        index: Optional FilterIndex built over `data`; when given, the matching rows are looked up
+            instead of scanning the string columns.
+
+    Returns:
+        Pandas DataFrame containing the filtered data.
+    """
 
-    # Handle empty DataFrame
-    if filtered_df.empty:
-        return filtered_df
+    if isinstance(data, PartitionedDataset):
+        # This call is the one recorded; the dataset's own instrumented method would record it again
+        return PartitionedDataset.filter_data.__wrapped__(data, asset_class, signal_type, selectivity_level)
 
-    try:
-        # Sort by pair performance in descending order
-        if 'pair_performance' in filtered_df.columns:
-            filtered_df = filtered_df.sort_values(by='pair_performance', ascending=False)
-        else:
+    # Input Validation
+    if not isinstance(data, pd.DataFrame):
+        raise TypeError("Data must be a Pandas DataFrame.")
+    _validate_filter_arguments(asset_class, signal_type, selectivity_level)
+    if index is not None:
+        if not isinstance(index, FilterIndex):
+            raise TypeError("Index must be a FilterIndex.")
+        if index.num_rows != len(data):
+            raise ValueError("Index was built for a different number of rows than the DataFrame.")
+
+    if data.empty:
+        return data.copy()
+
+    if index is not None:
+        positions = index.positions(asset_class, signal_type)
+        if len(positions) == 0:
+            return data.iloc[:0]
+        if not index.has_performance:
             raise KeyError("The 'pair_performance' column is missing in the DataFrame.")
+        return data.iloc[positions[:int(len(positions) * selectivity_level)]]
 
-        # Calculate the number of top-performing pairs to select
-        num_to_select = int(len(filtered_df) * selectivity_level)
+    # Case-insensitive filtering, combined into a single row selection
+    try:
+        asset_matches = _case_insensitive_matches(data['asset_class'], asset_class)
+        signal_matches = _case_insensitive_matches(data['signal_type'], signal_type)
+    except KeyError:
+        return pd.DataFrame()
 
-        # Select the top-performing pairs
-        filtered_df = filtered_df.head(num_to_select)
+    positions = np.flatnonzero(asset_matches & signal_matches)
 
-        return filtered_df
+    # Handle empty selection
+    if len(positions) == 0:
+        return data.iloc[:0]
 
-    except KeyError as e:
-        raise e
+    if 'pair_performance' not in data.columns:
+        raise KeyError("The 'pair_performance' column is missing in the DataFrame.")
 
+    # Calculate the number of top-performing pairs to select
+    num_to_select = int(len(positions) * selectivity_level)
 
-def calculate_sharpe_ratio(returns: float, risk_free_rate: float, std_dev: float) -> float:
-    """Calculates the Sharpe Ratio of a portfolio.
+    # Select the top-performing pairs, best first
+    # Only the matching rows are converted, so compact float32 columns are not upcast as a whole.
+    performance = data['pair_performance'].iloc[positions].to_numpy(dtype='float64', na_value=np.nan)
+    return data.iloc[positions[_top_k_positions(performance, num_to_select)]]
 
-    The Sharpe ratio is a measure of risk-adjusted return. It is calculated as the
-    difference between the portfolio's return and the risk-free rate, divided by the
-    portfolio's standard deviation.
+
+import hashlib
+import weakref
+from collections import OrderedDict
+import pandas as pd
+import numpy as np
+from typing import Dict, Optional, Tuple, Union
+
+@instrumented
+def dataset_fingerprint(data: pd.DataFrame) -> str:
+    """Computes a content fingerprint of a DataFrame.
+
+    The fingerprint covers the shape, column names, dtypes, index and values, so equal
+    frames get equal fingerprints even when they are different objects. Hashing is
+    vectorized by `pd.util.hash_pandas_object`.
 
     Args:
-        returns: Average portfolio return (as a decimal, e.g., 0.10 for 10%).
-        risk_free_rate: Risk-free rate (as a decimal, e.g., 0.02 for 2%).
-        std_dev: Portfolio standard deviation (as a decimal, e.g., 0.05 for 5%).
+        data: Pandas DataFrame to fingerprint.
 
     Returns:
-        Sharpe Ratio (float).
+        Hex digest string identifying the contents of `data`.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((data.shape, list(data.columns), [str(dtype) for dtype in data.dtypes])).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class FilterCache:
+    """Bounded LRU cache of `filter_data` results.
+
+    Results are keyed by the dataset fingerprint and the normalized filter arguments
+    (lower-cased asset class and signal type, selectivity level as float). Fingerprints are
+    remembered per DataFrame object, so repeated calls with the same frame do not rehash it;
+    frames passed to the cache must therefore not be modified in place. Cached results are
+    shared between callers and must be treated as read-only.
+
+    Args:
+        max_entries: Maximum number of cached results.
+        max_bytes: Maximum total memory of the cached results, in bytes.
+
+    Attributes:
+        hits: Number of calls answered from the cache.
+        misses: Number of calls that ran `filter_data`.
+    """
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 256 * 1024 ** 2):
+        if max_entries < 1:
+            raise ValueError("Maximum number of entries must be at least 1.")
+        if max_bytes < 0:
+            raise ValueError("Maximum size in bytes cannot be negative.")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.current_bytes = 0
+        self._entries: "OrderedDict[Tuple, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._fingerprints: Dict[int, Tuple[weakref.ref, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _fingerprint(self, data: pd.DataFrame) -> str:
+        cached = self._fingerprints.get(id(data))
+        if cached is not None and cached[0]() is data:
+            return cached[1]
+        fingerprint = dataset_fingerprint(data)
+        key = id(data)
+        self._fingerprints[key] = (weakref.ref(data, lambda _, key=key: self._fingerprints.pop(key, None)), fingerprint)
+        return fingerprint
+
+    def filter_data(self, data: pd.DataFrame, asset_class: str, signal_type: str, selectivity_level: Union[int, float],
+                    index: Optional[FilterIndex] = None) -> pd.DataFrame:
+        """Returns the cached result of `filter_data`, computing and storing it on a miss.
+
+        Arguments and errors are the same as for `filter_data`; invalid calls are never cached.
+        """
+        if not (isinstance(data, pd.DataFrame) and isinstance(asset_class, str) and isinstance(signal_type, str)
+                and isinstance(selectivity_level, (int, float))):
+            return filter_data(data, asset_class, signal_type, selectivity_level, index=index)
+
+        key = (self._fingerprint(data), asset_class.lower(), signal_type.lower(), float(selectivity_level))
+        entry = self._entries.get(key)
+        metrics.record_cache('filter_data', entry is not None)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        result = filter_data(data, asset_class, signal_type, selectivity_level, index=index)
+        size = int(result.memory_usage(index=True, deep=True).sum())
+        if size <= self.max_bytes:
+            self._entries[key] = (result, size)
+            self.current_bytes += size
+            self._evict()
+        return result
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+
+    def clear(self) -> None:
+        """Removes all cached results and resets the hit and miss counters."""
+        self._entries.clear()
+        self._fingerprints.clear()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the hit and miss counters and the current cache occupancy."""
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries), 'bytes': self.current_bytes}
+
+
+import os
+import shutil
+import pandas as pd
+import numpy as np
+from typing import Iterable, List, Optional, Tuple, Union
+
+PARTITION_COLUMNS = ['asset_class', 'signal_type']
+ROW_COLUMN = '_row'
+
+def _import_pyarrow():
+    """Imports pyarrow and pyarrow.dataset, which the on-disk dataset store requires."""
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+    except ImportError as e:
+        raise ImportError("The partitioned dataset store requires pyarrow (pip install pyarrow).") from e
+    return pa, ds
+
+
+def _hive_partitioning(pa, ds):
+    return ds.partitioning(pa.schema([(col, pa.string()) for col in PARTITION_COLUMNS]), flavor='hive')
+
+
+@instrumented
+def write_partitioned_dataset(data: Union[pd.DataFrame, Iterable[pd.DataFrame]], path: str, overwrite: bool = False) -> int:
+    """Writes a dataset to a Parquet directory partitioned by 'asset_class' and 'signal_type'.
+
+    Accepts a single DataFrame or an iterable of chunks (e.g. from `load_data_chunks`), so
+    datasets larger than memory can be written. A '_row' column records each row's position in
+    the written dataset, which lets reads restore the original row order.
+
+    Args:
+        data: Pandas DataFrame or iterable of DataFrame chunks with 'asset_class' and 'signal_type' columns.
+        path: Directory to write the dataset to.
+        overwrite: If True, an existing directory at `path` is removed first.
+
+    Returns:
+        Number of rows written.
 
     Raises:
-        TypeError: If any of the inputs are not of type float or int.
-        ZeroDivisionError: If the standard deviation is zero.
+        FileExistsError: If `path` exists and is not empty and overwrite is False.
+        KeyError: If a chunk is missing a partition column.
+        ImportError: If pyarrow is not installed.
     """
+    pa, ds = _import_pyarrow()
 
-    if not all(isinstance(arg, (float, int)) for arg in [returns, risk_free_rate, std_dev]):
-        raise TypeError("Inputs must be numeric (float or int).")
+    if os.path.isdir(path) and os.listdir(path):
+        if not overwrite:
+            raise FileExistsError(f"Dataset directory '{path}' already exists and is not empty.")
+        shutil.rmtree(path)
 
-    if std_dev == 0:
-        raise ZeroDivisionError("Standard deviation cannot be zero.")
+    chunks = [data] if isinstance(data, pd.DataFrame) else data
+    partitioning = _hive_partitioning(pa, ds)
+    num_rows = 0
+    for number, chunk in enumerate(chunks):
+        for col in PARTITION_COLUMNS:
+            if col not in chunk.columns:
+                raise KeyError(f"DataFrame must contain '{col}' column.")
+        if chunk.empty:
+            continue
 
-    return float((returns - risk_free_rate) / std_dev)
+        table = pa.Table.from_pandas(chunk.assign(**{ROW_COLUMN: np.arange(num_rows, num_rows + len(chunk))}),
+                                     preserve_index=False)
+        for col in PARTITION_COLUMNS:
+            table = table.set_column(table.schema.get_field_index(col), col, table[col].cast(pa.string()))
+
+        ds.write_dataset(table, path, format='parquet', partitioning=partitioning,
+                         basename_template=f'part-{number}-{{i}}.parquet', existing_data_behavior='overwrite_or_ignore')
+        num_rows += len(chunk)
+
+    return num_rows
+
+
+class PartitionedDataset:
+    """Read access to a Parquet dataset written by `write_partitioned_dataset`.
+
+    Queries prune partitions by 'asset_class' and 'signal_type' and read only the requested
+    columns, so a query for one group touches only that group's files. Rows come back in their
+    original order, indexed by their position in the written dataset.
 
+    Args:
+        path: Directory of the dataset.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+    """
 
+    def __init__(self, path: str):
+        pa, ds = _import_pyarrow()
+        self.path = path
+        self._dataset = ds.dataset(path, format='parquet', partitioning=_hive_partitioning(pa, ds))
+
+        metadata = self._dataset.schema.pandas_metadata or {}
+        names = [col['name'] for col in metadata.get('columns', [])] or self._dataset.schema.names
+        self.columns: List[str] = [name for name in names if name != ROW_COLUMN and name in self._dataset.schema.names]
+
+    def partitions(self) -> List[Tuple[Optional[str], Optional[str]]]:
+        """Returns the distinct (asset_class, signal_type) partition values of the dataset."""
+        _, ds = _import_pyarrow()
+        keys = set()
+        for fragment in self._dataset.get_fragments():
+            values = ds.get_partition_keys(fragment.partition_expression)
+            keys.add(tuple(values.get(col) for col in PARTITION_COLUMNS))
+        return sorted(keys, key=lambda key: tuple('' if value is None else value for value in key))
+
+    def read(self, asset_class: Optional[str] = None, signal_type: Optional[str] = None,
+             columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Reads the rows of the matching partitions.
+
+        Args:
+            asset_class: Asset class to read (case-insensitive), or None for all.
+            signal_type: Signal type to read (case-insensitive), or None for all.
+            columns: Columns to read, or None for all.
+
+        Returns:
+            Pandas DataFrame with the selected rows and columns in their original order.
+
+        Raises:
+            KeyError: If a requested column does not exist.
+        """
+        pa, ds = _import_pyarrow()
+        columns = list(self.columns if columns is None else columns)
+        for col in columns:
+            if col not in self.columns:
+                raise KeyError(f"Column '{col}' is not in the dataset.")
+
+        # Partition values are matched case-insensitively, then pushed down as exact filters.
+        partitions = self.partitions()
+        expression = None
+        for position, (col, value) in enumerate(zip(PARTITION_COLUMNS, [asset_class, signal_type])):
+            if value is None:
+                continue
+            stored = {key[position] for key in partitions if key[position] is not None}
+            matches = pa.array(sorted(v for v in stored if v.lower() == value.lower()), type=pa.string())
+            condition = ds.field(col).isin(matches)
+            expression = condition if expression is None else expression & condition
+
+        table = self._dataset.to_table(columns=columns + [ROW_COLUMN], filter=expression)
+        frame = table.to_pandas()
+        frame = frame.sort_values(ROW_COLUMN, kind='stable')
+        frame.index = pd.Index(frame.pop(ROW_COLUMN).to_numpy())
+        return frame
+
+    @instrumented
+    def filter_data(self, asset_class: str, signal_type: str, selectivity_level: Union[int, float],
+                    columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Runs `filter_data` against the stored dataset, reading only the matching partition.
+
+        The read and the filtering are recorded as one `filter_data` call.
+
+        Args:
+            asset_class: The selected asset class.
+            signal_type: The selected signal type.
+            selectivity_level: The selectivity level (percentage of top-performing pairs, between 0 and 1 inclusive).
+            columns: Columns to return, or None for all. Only these columns and the ones needed
+                for filtering are read.
+
+        Returns:
+            Pandas DataFrame containing the filtered data, as `filter_data` would return it for the
+            full dataset.
+        """
+        _validate_filter_arguments(asset_class, signal_type, selectivity_level)
+
+        read_columns = None
+        if columns is not None:
+            required = [col for col in PARTITION_COLUMNS + ['pair_performance'] if col in self.columns]
+            read_columns = list(dict.fromkeys(list(columns) + required))
+        result = filter_data.__wrapped__(self.read(asset_class, signal_type, read_columns), asset_class, signal_type,
+                                         selectivity_level)
+        return result if columns is None else result[list(columns)]
+
+
+@instrumented
 def calculate_sharpe_ratio(returns: float, risk_free_rate: float, std_dev: float) -> float:
     """Calculates the Sharpe Ratio of a portfolio.
 
@@ -180,22 +1016,231 @@ def calculate_sharpe_ratio(returns: float, risk_free_rate: float, std_dev: float
     return float((returns - risk_free_rate) / std_dev)
 
 
+import functools
+import pandas as pd
+import numpy as np
+from typing import List, Union
+
+ArrayLike = Union[float, int, np.ndarray, pd.Series, pd.DataFrame]
+
+def _align_labels(args: List[ArrayLike]) -> List[ArrayLike]:
+    """Aligns the pandas inputs on their labels with an outer join, as pandas arithmetic does.
+
+    A Series is matched against the columns of a DataFrame, the axis NumPy broadcasts it along.
+    Missing labels become NaN; other inputs are returned unchanged.
+    """
+    frames = [arg for arg in args if isinstance(arg, pd.DataFrame)]
+    series = [arg for arg in args if isinstance(arg, pd.Series)]
+    if len(frames) + len(series) < 2:
+        return args
+    index = functools.reduce(pd.Index.union, [frame.index for frame in frames]) if frames else None
+    columns = functools.reduce(pd.Index.union, [frame.columns for frame in frames] + [s.index for s in series])
+
+    aligned = []
+    for arg in args:
+        if isinstance(arg, pd.DataFrame) and not (arg.index.equals(index) and arg.columns.equals(columns)):
+            arg = arg.reindex(index=index, columns=columns)
+        elif isinstance(arg, pd.Series) and not arg.index.equals(columns):
+            arg = arg.reindex(columns)
+        aligned.append(arg)
+    return aligned
+
+@instrumented
+def calculate_sharpe_ratios(returns: ArrayLike, risk_free_rate: ArrayLike, std_dev: ArrayLike) -> Union[np.ndarray, pd.Series, pd.DataFrame]:
+    """Calculates Sharpe Ratios element-wise for arrays of portfolios.
+
+    Vectorized counterpart of `calculate_sharpe_ratio`. The inputs are broadcast against
+    each other with NumPy rules, so a single risk-free rate or a per-date column can be
+    combined with a full (dates, pairs) grid of returns and volatilities. Pandas inputs are
+    first aligned on their labels (see `_align_labels`), so their order does not matter.
+
+    Args:
+        returns: Average portfolio returns (as decimals).
+        risk_free_rate: Risk-free rates (as decimals).
+        std_dev: Portfolio standard deviations (as decimals).
+
+    Returns:
+        Array of Sharpe Ratios with the broadcast shape of the inputs. If one of the inputs is a
+        pandas Series or DataFrame with that shape, the result is returned with its index and columns.
+        Entries with a zero standard deviation are NaN.
+
+    Raises:
+        TypeError: If any of the inputs are not numeric.
+        ValueError: If the input shapes cannot be broadcast together, or pandas inputs have
+            duplicate labels.
+    """
+
+    returns, risk_free_rate, std_dev = _align_labels([returns, risk_free_rate, std_dev])
+    arrays = []
+    for arg in [returns, risk_free_rate, std_dev]:
+        values = np.asarray(arg)
+        if values.dtype.kind not in 'iuf':
+            raise TypeError("Inputs must be numeric (float or int).")
+        arrays.append(values.astype('float64', copy=False))
+
+    returns_array, risk_free_array, std_dev_array = np.broadcast_arrays(*arrays)
+
+    sharpe = np.asarray(np.subtract(returns_array, risk_free_array))
+    np.divide(sharpe, std_dev_array, out=sharpe, where=std_dev_array != 0)
+    sharpe[std_dev_array == 0] = np.nan
+
+    for arg in [returns, std_dev, risk_free_rate]:
+        if isinstance(arg, (pd.Series, pd.DataFrame)) and arg.shape == sharpe.shape:
+            if isinstance(arg, pd.Series):
+                return pd.Series(sharpe, index=arg.index, name=arg.name)
+            return pd.DataFrame(sharpe, index=arg.index, columns=arg.columns)
+
+    return sharpe
+
+
+import pandas as pd
+import numpy as np
+from typing import Optional, Tuple
+
+def _rolling_mean_std(values: np.ndarray, window: Optional[int], min_periods: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Computes rolling or expanding means and sample standard deviations along axis 0.
+
+    Uses running sums of the values and their squares, so every window costs O(1) regardless of
+    its size. The values are centred on their overall mean first to keep the running sums small
+    and avoid cancellation in the variance. NaN values are ignored and do not count towards
+    `min_periods`.
+
+    Args:
+        values: Array with time along axis 0.
+        window: Number of observations per window, or None for an expanding window.
+        min_periods: Minimum number of valid observations required for a result.
+
+    Returns:
+        Tuple of (mean, std) arrays with the shape of `values`, NaN where fewer than
+        `min_periods` observations are available (std also needs at least two).
+    """
+    values = np.asarray(values, dtype='float64')
+    valid = ~np.isnan(values)
+    center = np.nanmean(values, axis=0) if valid.any() else 0.0
+    centered = np.where(valid, values - center, 0.0)
+
+    counts = np.cumsum(valid, axis=0, dtype='float64')
+    sums = np.cumsum(centered, axis=0)
+    squares = np.cumsum(centered * centered, axis=0)
+
+    if window is not None and window < len(values):
+        counts[window:] = counts[window:] - counts[:-window]
+        sums[window:] = sums[window:] - sums[:-window]
+        squares[window:] = squares[window:] - squares[:-window]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = sums / counts
+        variance = (squares - sums * mean) / (counts - 1)
+    std = np.sqrt(np.clip(variance, 0.0, None))
+
+    mean = np.where(counts >= min_periods, mean + center, np.nan)
+    std = np.where((counts >= min_periods) & (counts >= 2), std, np.nan)
+    return mean, std
+
+
+@instrumented
+def calculate_performance_metrics(returns: pd.Series, window: Optional[int] = None, risk_free_rate: float = 0.0,
+                                  min_periods: Optional[int] = None) -> pd.DataFrame:
+    """Calculates rolling or expanding average returns, volatility and Sharpe ratios over time.
+
+    The result has the 'Date', 'Average Returns', 'Volatility' and 'Sharpe Ratio' columns
+    expected by `generate_line_chart`, and is computed in a single O(n) pass for any window size.
+
+    Args:
+        returns: Pandas Series of period returns indexed by datetime.
+        window: Number of periods in the rolling window, or None for expanding metrics.
+        risk_free_rate: Per-period risk-free rate (as a decimal) used for the Sharpe ratio.
+        min_periods: Minimum number of observations required for a value. Defaults to `window`
+            for rolling metrics and 2 for expanding metrics.
+
+    Returns:
+        Pandas DataFrame with columns 'Date', 'Average Returns', 'Volatility' and 'Sharpe Ratio'.
+        Periods with too few observations are NaN, and so is the Sharpe ratio of zero-volatility periods.
+
+    Raises:
+        TypeError: If returns is not a numeric Series with a datetime index, or window is not an integer.
+        ValueError: If window or min_periods is smaller than 1.
+    """
+
+    if not isinstance(returns, pd.Series):
+        raise TypeError("Returns must be a Pandas Series.")
+    if not pd.api.types.is_datetime64_any_dtype(returns.index):
+        raise TypeError("Returns must be indexed by datetime.")
+    if not pd.api.types.is_numeric_dtype(returns):
+        raise TypeError("Returns must be numeric.")
+    if window is not None:
+        if not isinstance(window, int):
+            raise TypeError("Window must be an integer.")
+        if window < 1:
+            raise ValueError("Window must be at least 1.")
+    if min_periods is None:
+        min_periods = window if window is not None else 2
+    if min_periods < 1:
+        raise ValueError("Minimum periods must be at least 1.")
+
+    mean, std = _rolling_mean_std(returns.to_numpy(dtype='float64', na_value=np.nan), window, min_periods)
+
+    return pd.DataFrame({
+        'Date': returns.index,
+        'Average Returns': mean,
+        'Volatility': std,
+        'Sharpe Ratio': calculate_sharpe_ratios(mean, risk_free_rate, std),
+    })
+
+
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from typing import Dict, Union
+import numpy as np
+go = _LazyModule('plotly.graph_objects')
+from typing import Dict, Optional, Union
+
+def _minmax_downsample_indices(values: np.ndarray, max_points: int) -> np.ndarray:
+    """Selects at most `max_points` positions that preserve the visual envelope of a series.
+
+    The series is split into max_points // 2 equal buckets and the positions of the minimum and
+    maximum of every bucket are kept, so peaks and troughs survive the downsampling. NaN values
+    are never selected unless a whole bucket is NaN.
 
-def generate_line_chart(data: pd.DataFrame) -> go.Figure:
+    Args:
+        values: 1-D numeric array.
+        max_points: Maximum number of positions to return (at least 2).
+
+    Returns:
+        Sorted integer array of selected positions.
+    """
+    n = len(values)
+    if n <= max_points:
+        return np.arange(n)
+
+    num_buckets = max_points // 2
+    bucket_size = -(-n // num_buckets)
+    num_buckets = -(-n // bucket_size)
+    padded = np.full(num_buckets * bucket_size, np.nan)
+    padded[:n] = values
+    buckets = padded.reshape(num_buckets, bucket_size)
+
+    offsets = np.arange(num_buckets) * bucket_size
+    lows = np.argmin(np.where(np.isnan(buckets), np.inf, buckets), axis=1) + offsets
+    highs = np.argmax(np.where(np.isnan(buckets), -np.inf, buckets), axis=1) + offsets
+    selected = np.unique(np.concatenate([lows, highs]))
+    return selected[selected < n]
+
+
+@instrumented
+def generate_line_chart(data: pd.DataFrame, max_points: Optional[int] = None, webgl: bool = False) -> 'go.Figure':
     """Generates a line chart of average returns, volatility, and Sharpe ratios over time.
 
     Arguments:
         data: Pandas DataFrame containing the data with columns 'Date', 'Average Returns', 'Volatility', and 'Sharpe Ratio'.  'Date' column should be datetime.
+        max_points: If given, each series is downsampled server-side to at most this many points, keeping the
+            minimum and maximum of every bucket.
+        webgl: If True, the traces are rendered with WebGL (`go.Scattergl`).
 
     Output:
-        Plotly figure object representing the line chart.
+        Plotly figure object representing the line chart. By default the x values are date strings; when
+        max_points or webgl is set (large-data mode) they are kept as native datetime arrays.
 
     Raises:
-        ValueError: If the input DataFrame is empty.
+        ValueError: If the input DataFrame is empty or max_points is smaller than 2.
         KeyError: If the DataFrame is missing required columns ('Date', 'Average Returns', 'Volatility', 'Sharpe Ratio').
         TypeError: If the 'Date' column is not datetime or if data columns are not numeric.
     """
@@ -216,11 +1261,25 @@ def generate_line_chart(data: pd.DataFrame) -> go.Figure:
         if not pd.api.types.is_numeric_dtype(data[col]):
             raise TypeError(f"The '{col}' column must be numeric.")
 
+    if max_points is not None and max_points < 2:
+        raise ValueError("max_points must be at least 2.")
+
     fig = go.Figure()
 
-    fig.add_trace(go.Scatter(x=data['Date'], y=data['Average Returns'], mode='lines', name='Average Returns'))
-    fig.add_trace(go.Scatter(x=data['Date'], y=data['Volatility'], mode='lines', name='Volatility'))
-    fig.add_trace(go.Scatter(x=data['Date'], y=data['Sharpe Ratio'], mode='lines', name='Sharpe Ratio'))
+    if max_points is None and not webgl:
+        fig.add_trace(go.Scatter(x=data['Date'], y=data['Average Returns'], mode='lines', name='Average Returns'))
+        fig.add_trace(go.Scatter(x=data['Date'], y=data['Volatility'], mode='lines', name='Volatility'))
+        fig.add_trace(go.Scatter(x=data['Date'], y=data['Sharpe Ratio'], mode='lines', name='Sharpe Ratio'))
+    else:
+        trace_type = go.Scattergl if webgl else go.Scatter
+        dates = data['Date'].to_numpy()
+        for col in numeric_columns:
+            values = data[col].to_numpy(dtype='float64', na_value=np.nan)
+            if max_points is not None:
+                selected = _minmax_downsample_indices(values, max_points)
+                fig.add_trace(trace_type(x=dates[selected], y=values[selected], mode='lines', name=col))
+            else:
+                fig.add_trace(trace_type(x=dates, y=values, mode='lines', name=col))
 
     fig.update_layout(
         title='Performance Metrics Over Time',
@@ -230,31 +1289,37 @@ def generate_line_chart(data: pd.DataFrame) -> go.Figure:
     )
     
     # Convert x-axis values to strings for consistent testing
-    for i in range(len(fig.data)):
-        fig.data[i].x = data['Date'].astype(str).tolist()
+    if max_points is None and not webgl:
+        for i in range(len(fig.data)):
+            fig.data[i].x = data['Date'].astype(str).tolist()
 
 
     return fig
 
 
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from typing import Dict, List
+import numpy as np
+go = _LazyModule('plotly.graph_objects')
+from typing import Dict, List, Optional
 
 
-def generate_bar_chart(data: pd.DataFrame) -> go.Figure:
+@instrumented
+def generate_bar_chart(data: pd.DataFrame, top_n: Optional[int] = None, other_label: str = 'Other') -> 'go.Figure':
     """
     Generates a bar chart showing the contributions of each key driver to the overall pair portfolio return.
 
     Arguments:
         data: Pandas DataFrame containing the data with columns 'Pair', 'Driver', and 'Contribution'.
+            Rows without a 'Pair' (NaN or None) are left out.
+        top_n: If given, only the top_n pairs with the largest total absolute contribution get their own
+            trace; the contributions of all other pairs are summed per driver into a single trace.
+        other_label: Name of the aggregated trace when top_n is used.
 
     Output:
         Plotly figure object representing the bar chart.
 
     Raises:
-        ValueError: If the input DataFrame is empty.
+        ValueError: If the input DataFrame is empty, no row has a 'Pair' or top_n is smaller than 1.
         KeyError: If the input DataFrame is missing required columns ('Pair', 'Driver', 'Contribution').
         TypeError: If the 'Contribution' column is not numeric.
     """
@@ -270,14 +1335,38 @@ def generate_bar_chart(data: pd.DataFrame) -> go.Figure:
     if not pd.api.types.is_numeric_dtype(data['Contribution']):
         raise TypeError("Contribution column must be numeric.")
 
-    # Group the data by 'Pair' and then create a bar chart for each pair
-    pairs = data['Pair'].unique()
-    fig = go.Figure()
-
-    for pair in pairs:
-        pair_data = data[data['Pair'] == pair]
-        fig.add_trace(go.Bar(x=pair_data['Driver'], y=pair_data['Contribution'], name=pair))
+    if top_n is not None and top_n < 1:
+        raise ValueError("top_n must be at least 1.")
+
+    # Group the rows by 'Pair' in one pass: a stable sort by pair code makes every pair's
+    # rows a contiguous slice, with pairs in order of first appearance.
+    codes, pairs = pd.factorize(data['Pair'])
+    if (codes < 0).any():
+        data, codes = data[codes >= 0], codes[codes >= 0]
+        if data.empty:
+            raise ValueError("Input DataFrame has no rows with a 'Pair'.")
+    order = np.argsort(codes, kind='stable')
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(pairs)))])
+    drivers = data['Driver'].to_numpy()[order]
+    contributions = data['Contribution'].to_numpy()[order]
+
+    shown = np.ones(len(pairs), dtype=bool)
+    if top_n is not None and top_n < len(pairs):
+        totals = np.bincount(codes, weights=np.abs(data['Contribution'].to_numpy(dtype='float64', na_value=0.0)),
+                             minlength=len(pairs))
+        shown[:] = False
+        shown[np.argsort(-totals, kind='stable')[:top_n]] = True
+
+    traces = [go.Bar(x=drivers[bounds[i]:bounds[i + 1]], y=contributions[bounds[i]:bounds[i + 1]], name=pairs[i])
+              for i in np.flatnonzero(shown)]
+
+    if not shown.all():
+        tail = data[~shown[codes]]
+        other = tail.groupby('Driver', sort=False, observed=True)['Contribution'].sum()
+        traces.append(go.Bar(x=other.index.to_numpy(), y=other.to_numpy(), name=other_label))
 
+    fig = go.Figure()
+    fig.add_traces(traces)
 
     fig.update_layout(
         barmode='group',
@@ -290,69 +1379,41 @@ def generate_bar_chart(data: pd.DataFrame) -> go.Figure:
 
 
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from typing import Dict, List
-
+import numpy as np
+go = _LazyModule('plotly.graph_objects')
+from typing import Optional, Union
 
-def generate_bar_chart(data: pd.DataFrame) -> go.Figure:
-    """
-    Generates a bar chart showing the contributions of each key driver to the overall pair portfolio return.
+def _density_heatmap(x_data: pd.Series, y_data: pd.Series, bins: int) -> 'go.Heatmap':
+    """Aggregates points into a 2-D histogram heatmap trace, ignoring non-finite values."""
+    x_values = x_data.to_numpy(dtype='float64', na_value=np.nan)
+    y_values = y_data.to_numpy(dtype='float64', na_value=np.nan)
+    finite = np.isfinite(x_values) & np.isfinite(y_values)
+    counts, x_edges, y_edges = np.histogram2d(x_values[finite], y_values[finite], bins=bins)
 
-    Arguments:
-        data: Pandas DataFrame containing the data with columns 'Pair', 'Driver', and 'Contribution'.
+    # Empty bins are left transparent; the heatmap is indexed [y, x].
+    z = np.where(counts == 0, np.nan, counts).T
+    return go.Heatmap(x=(x_edges[:-1] + x_edges[1:]) / 2, y=(y_edges[:-1] + y_edges[1:]) / 2, z=z,
+                      colorscale='Viridis', colorbar={'title': 'Count'})
 
-    Output:
-        Plotly figure object representing the bar chart.
 
-    Raises:
-        ValueError: If the input DataFrame is empty.
-        KeyError: If the input DataFrame is missing required columns ('Pair', 'Driver', 'Contribution').
-        TypeError: If the 'Contribution' column is not numeric.
+@instrumented
+def generate_scatter_plot(data: pd.DataFrame, x_axis: str, y_axis: str, webgl_threshold: Optional[int] = 100_000,
+                          density_threshold: Optional[int] = 1_000_000, bins: int = 200) -> 'go.Figure':
     """
+    Generates a scatter plot visualizing correlations between key drivers and pair portfolio performance.
 
-    if data.empty:
-        raise ValueError("Input DataFrame is empty.")
-
-    required_columns = ['Pair', 'Driver', 'Contribution']
-    for col in required_columns:
-        if col not in data.columns:
-            raise KeyError(f"Missing required column: {col}")
-
-    if not pd.api.types.is_numeric_dtype(data['Contribution']):
-        raise TypeError("Contribution column must be numeric.")
-
-    # Group the data by 'Pair' and then create a bar chart for each pair
-    pairs = data['Pair'].unique()
-    fig = go.Figure()
-
-    for pair in pairs:
-        pair_data = data[data['Pair'] == pair]
-        fig.add_trace(go.Bar(x=pair_data['Driver'], y=pair_data['Contribution'], name=pair))
-
-
-    fig.update_layout(
-        barmode='group',
-        title='Contribution of Each Driver to Pair Portfolio Return',
-        xaxis_title='Driver',
-        yaxis_title='Contribution'
-    )
-
-    return fig
-
-
-import pandas as pd
-import plotly.graph_objects as go
-from typing import Union
-
-def generate_scatter_plot(data: pd.DataFrame, x_axis: str, y_axis: str) -> go.Figure:
-    """
-    Generates a scatter plot visualizing correlations between key drivers and pair portfolio performance.
+    The rendering adapts to the number of points: above `webgl_threshold` the markers are drawn with
+    WebGL (`go.Scattergl`), and above `density_threshold` the points are aggregated on the server into a
+    2-D histogram heatmap, so the figure size depends on the number of bins instead of the number of rows.
 
     Args:
         data: Pandas DataFrame containing the data.
         x_axis: Feature for x-axis
         y_axis: Feature for y-axis
+        webgl_threshold: Number of points above which WebGL is used, or None to never use it.
+        density_threshold: Number of points above which a density heatmap is drawn, or None to never
+            aggregate. Only applies when both axes are numeric.
+        bins: Number of bins per axis of the density heatmap.
 
     Returns:
         Plotly figure object representing the scatter plot.
@@ -366,7 +1427,13 @@ def generate_scatter_plot(data: pd.DataFrame, x_axis: str, y_axis: str) -> go.Fi
         try:
             x_data = data[x_axis]
             y_data = data[y_axis]
-            fig.add_trace(go.Scatter(x=x_data, y=y_data, mode='markers'))
+            numeric = pd.api.types.is_numeric_dtype(x_data) and pd.api.types.is_numeric_dtype(y_data)
+            if density_threshold is not None and len(data) > density_threshold and numeric:
+                fig.add_trace(_density_heatmap(x_data, y_data, bins))
+            elif webgl_threshold is not None and len(data) > webgl_threshold:
+                fig.add_trace(go.Scattergl(x=x_data.to_numpy(), y=y_data.to_numpy(), mode='markers'))
+            else:
+                fig.add_trace(go.Scatter(x=x_data, y=y_data, mode='markers'))
             fig.update_layout(
                 xaxis_title=x_axis,
                 yaxis_title=y_axis,
@@ -387,18 +1454,624 @@ def generate_scatter_plot(data: pd.DataFrame, x_axis: str, y_axis: str) -> go.Fi
     return fig
 
 
+from collections import OrderedDict
+import pandas as pd
+import numpy as np
+go = _LazyModule('plotly.graph_objects')
+from typing import Callable, Dict, Optional, Tuple
+
+def _append_trace_points(fig: 'go.Figure', delta: 'go.Figure') -> bool:
+    """Appends the x/y points of `delta`'s traces to the matching traces of `fig`.
+
+    Returns False, leaving `fig` untouched, if the two figures do not have the same trace layout.
+    """
+    if len(fig.data) != len(delta.data):
+        return False
+    for trace, new in zip(fig.data, delta.data):
+        if trace.type != new.type or trace.name != new.name or trace.type not in ('scatter', 'scattergl'):
+            return False
+
+    with fig.batch_update():
+        for trace, new in zip(fig.data, delta.data):
+            for axis in ('x', 'y'):
+                old_values, new_values = trace[axis], new[axis]
+                if isinstance(old_values, tuple) and isinstance(new_values, tuple):
+                    trace[axis] = old_values + new_values
+                else:
+                    trace[axis] = np.concatenate([np.asarray(old_values), np.asarray(new_values)])
+    return True
+
+
+class FigureCache:
+    """Bounded LRU cache of figures built by the chart generators.
+
+    Figures are keyed by the generator, a content fingerprint of the input frame
+    (`dataset_fingerprint`) and the generator's keyword arguments. When `generate_line_chart` is
+    called on a frame that only grew by appended rows since the last call with the same
+    arguments, the new rows are charted on their own and appended to the cached traces instead of
+    rebuilding the whole figure. The serialized figure JSON is cached alongside each figure.
+
+    Cached figures are shared between callers and updated in place by incremental appends, so they
+    must be treated as read-only.
+
+    Args:
+        max_entries: Maximum number of cached figures.
+
+    Attributes:
+        hits: Number of calls answered from the cache.
+        misses: Number of calls that rebuilt a figure.
+        incremental_updates: Number of calls answered by appending rows to a cached figure.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        if max_entries < 1:
+            raise ValueError("Maximum number of entries must be at least 1.")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.incremental_updates = 0
+        self._entries: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self._latest: Dict[Tuple, Tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _entry(self, generator: Callable[..., 'go.Figure'], data: pd.DataFrame, kwargs: dict) -> Dict:
+        arguments = (getattr(generator, '__qualname__', repr(generator)), tuple(sorted(kwargs.items())))
+        fingerprint = dataset_fingerprint(data)
+        key = arguments + (fingerprint,)
+
+        entry = self._entries.get(key)
+        metrics.record_cache(arguments[0], entry is not None)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        entry = self._extend_latest(generator, data, kwargs, arguments)
+        if entry is None:
+            self.misses += 1
+            entry = {'figure': generator(data, **kwargs), 'json': None}
+        else:
+            self.incremental_updates += 1
+
+        self._entries[key] = entry
+        self._latest[arguments] = (len(data), fingerprint, key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def _extend_latest(self, generator, data: pd.DataFrame, kwargs: dict, arguments: Tuple) -> Optional[Dict]:
+        """Grows the latest figure for these arguments if `data` only appended rows to its input."""
+        if generator is not generate_line_chart or kwargs.get('max_points') is not None:
+            return None
+        latest = self._latest.get(arguments)
+        if latest is None:
+            return None
+        num_rows, fingerprint, key = latest
+        if key not in self._entries or len(data) <= num_rows or dataset_fingerprint(data.iloc[:num_rows]) != fingerprint:
+            return None
+
+        entry = self._entries.pop(key)
+        if not _append_trace_points(entry['figure'], generator(data.iloc[num_rows:], **kwargs)):
+            return None
+        entry['json'] = None
+        return entry
+
+    def get(self, generator: Callable[..., 'go.Figure'], data: pd.DataFrame, **kwargs) -> 'go.Figure':
+        """Returns the figure `generator(data, **kwargs)`, from the cache when possible.
+
+        Args:
+            generator: Chart generator, e.g. `generate_line_chart`.
+            data: Input DataFrame of the generator.
+            **kwargs: Keyword arguments of the generator; their values must be hashable.
+
+        Returns:
+            Plotly figure object.
+        """
+        return self._entry(generator, data, kwargs)['figure']
+
+    def get_json(self, generator: Callable[..., 'go.Figure'], data: pd.DataFrame, **kwargs) -> str:
+        """Returns the serialized JSON of `generator(data, **kwargs)`, from the cache when possible."""
+        entry = self._entry(generator, data, kwargs)
+        if entry['json'] is None:
+            if metrics.enabled:
+                entry['json'] = metrics.call('figure_to_json', entry['figure'].to_json, (), {})
+            else:
+                entry['json'] = entry['figure'].to_json()
+        return entry['json']
+
+    def clear(self) -> None:
+        """Removes all cached figures and resets the counters."""
+        self._entries.clear()
+        self._latest.clear()
+        self.hits = 0
+        self.misses = 0
+        self.incremental_updates = 0
+
+
 import pandas as pd
+import sys
 import numpy as np
+from typing import Callable, Dict, Optional, Tuple
+
+def _forward_fill(prices: np.ndarray) -> np.ndarray:
+    """Replaces missing prices with the last observed price along axis 0; leading NaNs stay missing."""
+    missing = np.isnan(prices)
+    if not missing.any():
+        return prices
+    rows = np.arange(prices.shape[0]).reshape((-1,) + (1,) * (prices.ndim - 1))
+    last_observed = np.maximum.accumulate(np.where(missing, 0, rows), axis=0)
+    return np.take_along_axis(prices, last_observed, axis=0)
+
+
+def _price_returns(prices: np.ndarray) -> np.ndarray:
+    """Computes simple period returns of a price array along axis 0.
+
+    Equivalent to ``pct_change(fill_method='pad').fillna(0)`` on each column (the pandas < 3
+    default): missing prices are forward-filled first, so a move across a gap is counted in
+    the period where the price reappears. The first row, missing periods and returns before
+    the first observed price are zero.
+
+    Args:
+        prices: Array of prices with time along axis 0.
+
+    Returns:
+        Array of returns with the same shape as `prices`.
+    """
+    prices = _forward_fill(np.asarray(prices, dtype='float64'))
+    returns = np.zeros_like(prices)
+    if prices.shape[0] > 1:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns[1:] = prices[1:] / prices[:-1] - 1
+    return np.nan_to_num(returns, nan=0.0, posinf=np.inf, neginf=-np.inf)
+
+
+def _block_growth(growth: np.ndarray, window: int) -> np.ndarray:
+    """Computes each leg's growth since the last rebalance, before every period.
+
+    Blocks of `window` consecutive periods start at the first period; within a block the
+    growth factors are compounded sequentially, and every block starts again from 1.
+
+    Args:
+        growth: Array of shape (n, ..., k) with the growth factors (1 + return) of each period.
+        window: Number of periods between rebalances.
+
+    Returns:
+        Array with the shape of `growth`.
+    """
+    n = growth.shape[0]
+    if n == 0:
+        return np.ones_like(growth)
+
+    window = min(window, n)
+    num_blocks = -(-n // window)
+    padding = num_blocks * window - n
+    if padding:
+        pad_shape = (padding,) + growth.shape[1:]
+        growth = np.concatenate([growth, np.ones(pad_shape)])
+    blocks = growth.reshape((num_blocks, window) + growth.shape[1:])
+
+    values = np.ones_like(blocks)
+    values[:, 1:] = np.cumprod(blocks[:, :-1], axis=1)
+    return values.reshape((num_blocks * window,) + growth.shape[1:])[:n]
+
+
+def _drifted_weights(leg_growth: np.ndarray, target_weights: np.ndarray) -> np.ndarray:
+    """Converts each leg's growth since the last rebalance into the weights currently held.
+
+    Any weight not allocated to the assets is held as cash with a zero return.
+    """
+    values = leg_growth * target_weights
+    portfolio_value = values.sum(axis=-1, keepdims=True) + (1 - target_weights.sum(axis=-1, keepdims=True))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return values / portfolio_value
+
+
+def _rebalancing_window_weights(asset_returns: np.ndarray, target_weights: np.ndarray, window: int) -> np.ndarray:
+    """Computes the asset weights held over each period for a periodically rebalanced portfolio.
+
+    The portfolio is reset to `target_weights` at row 0 and every `window` rows after it.
+    Between rebalances the weights drift with the relative performance of the assets; any
+    weight not allocated to the assets is treated as cash earning zero.
+
+    Args:
+        asset_returns: Array of shape (n, ..., k) with period returns of the k assets, time along axis 0.
+        target_weights: Array of length k with the weights restored at every rebalance.
+        window: Number of periods between rebalances.
+
+    Returns:
+        Array with the same shape as `asset_returns` holding the weights applied to each period's returns.
+    """
+    target_weights = np.asarray(target_weights, dtype='float64')
+    weights = np.empty_like(asset_returns)
+    weights[0] = target_weights
+
+    # Period i (i >= 1) belongs to the block that started at the last rebalance row <= i - 1,
+    # so blocks are formed over the growth factors of periods 1..n-1.
+    weights[1:] = _drifted_weights(_block_growth(1 + asset_returns[1:], window), target_weights)
+    return weights
+
+
+@instrumented
+def rebalancing_window_returns(asset1: np.ndarray, asset2: np.ndarray, window: int, weights=(0.5, 0.5)) -> np.ndarray:
+    """Computes the period returns of a two-asset benchmark rebalanced every `window` periods.
+
+    Runs in a single vectorized pass over the price arrays. Inputs may be 1-D price series or
+    2-D arrays with time along axis 0 and one column per pair.
+
+    Args:
+        asset1: Prices of the first asset.
+        asset2: Prices of the second asset, same shape as `asset1`.
+        window: Number of periods between rebalances (1 rebalances every period).
+        weights: Target weights [weight_asset1, weight_asset2] restored at each rebalance.
+
+    Returns:
+        NumPy array of benchmark returns with the same shape as `asset1`. The first return is zero.
+
+    Raises:
+        ValueError: If the price arrays differ in shape or the window is smaller than 1.
+    """
+    asset1 = np.asarray(asset1, dtype='float64')
+    asset2 = np.asarray(asset2, dtype='float64')
+    if asset1.shape != asset2.shape:
+        raise ValueError("Asset price arrays must have the same shape.")
+    if window < 1:
+        raise ValueError("Window must be at least 1.")
+
+    asset_returns = np.stack([_price_returns(asset1), _price_returns(asset2)], axis=-1)
+    period_weights = _rebalancing_window_weights(asset_returns, np.asarray(weights, dtype='float64'), window)
+    return (period_weights * asset_returns).sum(axis=-1)
 
+
+def _validate_weights(weights) -> None:
+    """Validates a [weight_asset1, weight_asset2] benchmark weights list."""
+    if not isinstance(weights, list):
+        raise TypeError("Weights must be a list.")
+
+    if len(weights) != 2:
+        raise ValueError("Weights list must contain two elements.")
+
+    if not all(isinstance(w, (int, float)) for w in weights):
+        raise TypeError("Weights must be numeric values.")
+
+
+def _window_parameter(benchmark_parameters: dict, key: str, strategy: str, default: Optional[int] = None) -> int:
+    """Reads and validates a positive integer number of periods from the benchmark parameters."""
+    if key not in benchmark_parameters:
+        if default is None:
+            raise KeyError(f"Benchmark parameters must contain '{key}' for {strategy} strategy.")
+        return default
+
+    value = benchmark_parameters[key]
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise TypeError(f"{key.capitalize()} must be an integer.")
+
+    if value < 1:
+        raise ValueError(f"{key.capitalize()} must be at least 1.")
+    return value
+
+
+def _scheduled_weights(asset_returns: np.ndarray, rebalance: np.ndarray, target_weights: np.ndarray) -> np.ndarray:
+    """Computes the asset weights held over each period for an arbitrary rebalancing schedule.
+
+    Each leg's growth since the last rebalance is compounded in log space, so schedules that differ
+    between the columns of a panel are handled in one vectorized pass.
+
+    Args:
+        asset_returns: Array of shape (n, ..., k) with period returns of the k assets, time along axis 0.
+        rebalance: Boolean array of shape (n, ...); True where the portfolio is reset to the target
+            weights at the close of that row. Row 0 is always a rebalance.
+        target_weights: Target weights, broadcastable to the shape of `asset_returns`.
+
+    Returns:
+        Array with the same shape as `asset_returns` holding the weights applied to each period's returns.
+    """
+    n = asset_returns.shape[0]
+    targets = np.broadcast_to(np.asarray(target_weights, dtype='float64'), asset_returns.shape)
+    weights = np.empty_like(asset_returns)
+    weights[:1] = targets[:1]
+    if n < 2:
+        return weights
+
+    rows = np.arange(n).reshape((n,) + (1,) * (rebalance.ndim - 1))
+    last_rebalance = np.maximum.accumulate(np.where(rebalance, rows, 0), axis=0)
+    # Period i is held from the close of row i - 1, so it uses the last rebalance at or before that row.
+    rebalance_rows = np.broadcast_to(last_rebalance[:-1, ..., None], (n - 1,) + asset_returns.shape[1:])
+
+    log_value = np.zeros_like(asset_returns)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_value[1:] = np.cumsum(np.log1p(asset_returns[1:]), axis=0)
+        leg_growth = np.exp(log_value[:-1] - np.take_along_axis(log_value, rebalance_rows, axis=0))
+    weights[1:] = _drifted_weights(leg_growth, np.take_along_axis(targets, rebalance_rows, axis=0))
+    return weights
+
+
+BENCHMARK_STRATEGIES: Dict[str, type] = {}
+
+
+def register_benchmark_strategy(name: str) -> Callable[[type], type]:
+    """Class decorator registering a `BenchmarkStrategy` subclass under a strategy name.
+
+    Args:
+        name: Name used to select the strategy in `compare_to_benchmark` and its variants.
+
+    Raises:
+        ValueError: If the name is already registered.
+    """
+    def register(cls: type) -> type:
+        if name in BENCHMARK_STRATEGIES:
+            raise ValueError(f"Benchmark strategy '{name}' is already registered.")
+        cls.name = name
+        BENCHMARK_STRATEGIES[name] = cls
+        return cls
+
+    return register
+
+
+class BenchmarkStrategy:
+    """Base class of the benchmark strategies.
+
+    A strategy validates its parameters once when it is created and then turns the period returns
+    of the two assets into the matrix of weights held over every period, in one vectorized pass.
+    Subclasses implement `weights` and are made available by name with `register_benchmark_strategy`.
+
+    Args:
+        benchmark_parameters: Parameters of the strategy.
+
+    Attributes:
+        name: Registered name of the strategy.
+        target_weights: Array [weight_asset1, weight_asset2] restored at each rebalance.
+        window: Number of periods between rebalances for strategies on a fixed schedule, or None.
+            Only strategies with a window can be updated incrementally by `BenchmarkTracker`.
+        needs_timestamps: Whether `weights` requires the observation timestamps.
+
+    Raises:
+        KeyError: If required parameters are missing.
+        TypeError: If the parameters have invalid types.
+        ValueError: If a parameter is out of range.
+    """
+    name = None
+    window: Optional[int] = None
+    needs_timestamps = False
+    requires_weights = False
+
+    def __init__(self, benchmark_parameters: dict):
+        if self.requires_weights and "weights" not in benchmark_parameters:
+            raise KeyError(f"Benchmark parameters must contain 'weights' for {self.name} strategy.")
+        weights = benchmark_parameters.get("weights", [0.5, 0.5])
+        _validate_weights(weights)
+        self.target_weights = np.asarray(weights, dtype='float64')
+
+    def weights(self, asset_returns: np.ndarray, timestamps: Optional[np.ndarray] = None) -> np.ndarray:
+        """Computes the weights held over each period.
+
+        Args:
+            asset_returns: Array of shape (n, ..., 2) with the period returns of both assets, time
+                along axis 0; the first row holds zeros.
+            timestamps: datetime64 array of shape (n, ...) with the observation times, if required.
+
+        Returns:
+            Array with the shape of `asset_returns`.
+        """
+        raise NotImplementedError
+
+    def returns(self, asset_returns: np.ndarray, timestamps: Optional[np.ndarray] = None) -> np.ndarray:
+        """Computes the benchmark period returns, an array of shape (n, ...)."""
+        return (self.weights(asset_returns, timestamps) * asset_returns).sum(axis=-1)
+
+
+@register_benchmark_strategy("static_weights")
+class StaticWeightsStrategy(BenchmarkStrategy):
+    """Holds the target weights in every period (parameters: "weights").
+
+    Matches the original ``weights[0] * asset1.pct_change().fillna(0) + ...`` formula, including
+    its padding of missing prices (see `_price_returns`).
+    """
+    window = 1
+    requires_weights = True
+
+    def weights(self, asset_returns, timestamps=None):
+        return np.broadcast_to(self.target_weights, asset_returns.shape)
+
+
+@register_benchmark_strategy("rebalancing_window")
+class RebalancingWindowStrategy(BenchmarkStrategy):
+    """Rebalances every `window` periods and drifts in between (parameters: "window", optional "weights")."""
+
+    def __init__(self, benchmark_parameters: dict):
+        self.window = _window_parameter(benchmark_parameters, "window", self.name)
+        super().__init__(benchmark_parameters)
+
+    def weights(self, asset_returns, timestamps=None):
+        return _rebalancing_window_weights(asset_returns, self.target_weights, self.window)
+
+
+@register_benchmark_strategy("buy_and_hold")
+class BuyAndHoldStrategy(BenchmarkStrategy):
+    """Invests the target weights at the first observation and never rebalances (parameters: optional "weights")."""
+    window = sys.maxsize
+
+    def weights(self, asset_returns, timestamps=None):
+        return _rebalancing_window_weights(asset_returns, self.target_weights, self.window)
+
+
+@register_benchmark_strategy("calendar_rebalancing")
+class CalendarRebalancingStrategy(BenchmarkStrategy):
+    """Rebalances at the last observation of every month or quarter.
+
+    Parameters: "frequency" ('monthly' or 'quarterly'), optional "weights".
+    """
+    needs_timestamps = True
+
+    def __init__(self, benchmark_parameters: dict):
+        if "frequency" not in benchmark_parameters:
+            raise KeyError(f"Benchmark parameters must contain 'frequency' for {self.name} strategy.")
+        if benchmark_parameters["frequency"] not in ('monthly', 'quarterly'):
+            raise ValueError("Frequency must be 'monthly' or 'quarterly'.")
+        self.frequency = benchmark_parameters["frequency"]
+        super().__init__(benchmark_parameters)
+
+    def weights(self, asset_returns, timestamps=None):
+        if timestamps is None:
+            raise ValueError(f"The {self.name} strategy requires timestamps.")
+        months = np.asarray(timestamps, dtype='datetime64[ns]').astype('datetime64[M]').astype('int64')
+        periods = months // 3 if self.frequency == 'quarterly' else months
+
+        rebalance = np.ones(periods.shape, dtype=bool)
+        rebalance[:-1] = periods[1:] != periods[:-1]
+        rebalance[0] = True             # the target weights are invested at the first close
+        return _scheduled_weights(asset_returns, rebalance, self.target_weights)
+
+
+@register_benchmark_strategy("inverse_volatility")
+class InverseVolatilityStrategy(BenchmarkStrategy):
+    """Rebalances every `window` periods to weights proportional to each asset's inverse volatility.
+
+    The volatility is the standard deviation of the last `lookback` returns. Until `lookback` returns
+    are available, or if an asset's volatility is zero, the fallback "weights" are used.
+
+    Parameters: "lookback" (default 63), "window" (default 21), optional "weights".
+    """
+
+    def __init__(self, benchmark_parameters: dict):
+        self.lookback = _window_parameter(benchmark_parameters, "lookback", self.name, default=63)
+        self.rebalance_window = _window_parameter(benchmark_parameters, "window", self.name, default=21)
+        super().__init__(benchmark_parameters)
+
+    def weights(self, asset_returns, timestamps=None):
+        n = asset_returns.shape[0]
+        history = asset_returns.copy()
+        history[:1] = np.nan        # the first return is a placeholder, not an observation
+        _, volatility = _rolling_mean_std(history, self.lookback, self.lookback)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inverse = 1 / volatility
+            targets = inverse / inverse.sum(axis=-1, keepdims=True)
+        usable = np.isfinite(targets).all(axis=-1, keepdims=True)
+        targets = np.where(usable, targets, self.target_weights)
+
+        weights = np.empty_like(asset_returns)
+        weights[:1] = targets[:1]
+        if n > 1:
+            rows = (np.arange(n - 1) // self.rebalance_window) * self.rebalance_window
+            weights[1:] = _drifted_weights(_block_growth(1 + asset_returns[1:], self.rebalance_window), targets[rows])
+        return weights
+
+
+@register_benchmark_strategy("drift_threshold")
+class DriftThresholdStrategy(BenchmarkStrategy):
+    """Lets the weights drift and rebalances once any weight is more than `threshold` away from its target.
+
+    The schedule depends on the path, so each column is scanned sequentially; the periods between
+    two rebalances are processed as one vectorized block and the scan costs O(n) overall.
+
+    Parameters: "threshold" (absolute weight deviation, e.g. 0.05), optional "weights".
+    """
+
+    def __init__(self, benchmark_parameters: dict):
+        if "threshold" not in benchmark_parameters:
+            raise KeyError(f"Benchmark parameters must contain 'threshold' for {self.name} strategy.")
+        threshold = benchmark_parameters["threshold"]
+        if not isinstance(threshold, (int, float)):
+            raise TypeError("Threshold must be a numeric value.")
+        if threshold <= 0:
+            raise ValueError("Threshold must be positive.")
+        self.threshold = float(threshold)
+        super().__init__(benchmark_parameters)
+
+    def _column_weights(self, asset_returns: np.ndarray) -> np.ndarray:
+        n = len(asset_returns)
+        growth = 1 + asset_returns
+        weights = np.empty_like(asset_returns)
+        weights[0] = self.target_weights
+
+        start, lookahead = 0, 16
+        while start < n - 1:
+            # Weights drifted by each leg's growth since the rebalance at row `start`, at every later close.
+            stop = min(n, start + 1 + lookahead)
+            drifted = _drifted_weights(np.cumprod(growth[start + 1:stop], axis=0), self.target_weights)
+            breaches = np.flatnonzero((np.abs(drifted - self.target_weights) > self.threshold).any(axis=-1))
+            if not breaches.size and stop < n:
+                lookahead *= 2
+                continue
+
+            end = start + 1 + breaches[0] if breaches.size else n - 1
+            weights[start + 1] = self.target_weights
+            weights[start + 2:end + 1] = drifted[:end - start - 1]
+            lookahead = max(16, 2 * (end - start))
+            start = end
+        return weights
+
+    def weights(self, asset_returns, timestamps=None):
+        columns = asset_returns.reshape(asset_returns.shape[0], -1, asset_returns.shape[-1])
+        weights = np.stack([self._column_weights(columns[:, j]) for j in range(columns.shape[1])], axis=1)
+        return weights.reshape(asset_returns.shape)
+
+
+def _benchmark_strategy(columns, benchmark_strategy: str, benchmark_parameters: dict) -> BenchmarkStrategy:
+    """Creates a registered benchmark strategy and checks the available columns.
+
+    Args:
+        columns: Column names (or mapping keys) available in the input data.
+        benchmark_strategy: Name of a strategy in `BENCHMARK_STRATEGIES`.
+        benchmark_parameters: Parameters for the benchmark strategy.
+
+    Returns:
+        The validated BenchmarkStrategy.
+
+    Raises:
+        ValueError: If the benchmark strategy is invalid or a parameter is out of range.
+        KeyError: If required parameters or the 'asset1'/'asset2' columns are missing.
+        TypeError: If the benchmark parameters have invalid types.
+    """
+    if benchmark_strategy not in BENCHMARK_STRATEGIES:
+        supported = ', '.join(f"'{name}'" for name in BENCHMARK_STRATEGIES)
+        raise ValueError(f"Invalid benchmark strategy. Supported strategies are {supported}.")
+
+    strategy = BENCHMARK_STRATEGIES[benchmark_strategy](benchmark_parameters)
+
+    if 'asset1' not in columns or 'asset2' not in columns:
+        raise KeyError(f"DataFrame must contain 'asset1' and 'asset2' columns for {benchmark_strategy} strategy.")
+
+    return strategy
+
+
+def _frame_timestamps(data: pd.DataFrame) -> np.ndarray:
+    """Returns the observation times of a frame, from its 'Date' column or its DatetimeIndex."""
+    if 'Date' in data.columns:
+        return data['Date'].to_numpy(dtype='datetime64[ns]')
+    if isinstance(data.index, pd.DatetimeIndex):
+        return data.index.to_numpy(dtype='datetime64[ns]')
+    raise ValueError("DataFrame must have a 'Date' column or a DatetimeIndex for calendar-based benchmark strategies.")
+
+
+def _asset_returns(asset1: np.ndarray, asset2: np.ndarray) -> np.ndarray:
+    """Stacks the period returns of both assets along a new last axis."""
+    asset1 = np.asarray(asset1, dtype='float64')
+    asset2 = np.asarray(asset2, dtype='float64')
+    if asset1.shape != asset2.shape:
+        raise ValueError("Asset price arrays must have the same shape.")
+    return np.stack([_price_returns(asset1), _price_returns(asset2)], axis=-1)
+
+
+@instrumented
 def compare_to_benchmark(data: pd.DataFrame, benchmark_strategy: str, benchmark_parameters: dict) -> pd.DataFrame:
     """Compares the signal-driven pair portfolio performance against a benchmark strategy.
 
     Args:
         data: Pandas DataFrame containing the data, must contain 'pair_returns' column.
-        benchmark_strategy: The selected benchmark strategy ("static_weights", "rebalancing_window").
+        benchmark_strategy: The selected benchmark strategy, any name registered in `BENCHMARK_STRATEGIES`.
         benchmark_parameters: Parameters for the benchmark strategy.
             For "static_weights": {"weights": [weight_asset1, weight_asset2]}
-            For "rebalancing_window": {"window": window_size}
+            For "rebalancing_window": {"window": window_size, "weights": [weight_asset1, weight_asset2]}
+                ("weights" is optional and defaults to [0.5, 0.5]; window_size 1 rebalances every period)
+            For "buy_and_hold": {"weights": [weight_asset1, weight_asset2]} (optional)
+            For "calendar_rebalancing": {"frequency": "monthly" | "quarterly", "weights": [...]}
+                (needs a 'Date' column or a DatetimeIndex)
+            For "inverse_volatility": {"lookback": 63, "window": 21, "weights": [...]} (all optional;
+                "weights" is used until enough history is available)
+            For "drift_threshold": {"threshold": max_weight_deviation, "weights": [...]}
 
     Returns:
         Pandas DataFrame containing the performance of both the pair portfolio and the benchmark strategy.
@@ -416,158 +2089,1311 @@ def compare_to_benchmark(data: pd.DataFrame, benchmark_strategy: str, benchmark_
     if 'pair_returns' not in data.columns:
         raise KeyError("DataFrame must contain 'pair_returns' column.")
 
-    if benchmark_strategy == "static_weights":
-        if "weights" not in benchmark_parameters:
-            raise KeyError("Benchmark parameters must contain 'weights' for static_weights strategy.")
+    strategy = _benchmark_strategy(data.columns, benchmark_strategy, benchmark_parameters)
+    timestamps = _frame_timestamps(data) if strategy.needs_timestamps else None
+
+    asset_returns = _asset_returns(data['asset1'].to_numpy(dtype='float64', na_value=np.nan),
+                                   data['asset2'].to_numpy(dtype='float64', na_value=np.nan))
+    benchmark_returns = strategy.returns(asset_returns, timestamps)
 
-        weights = benchmark_parameters["weights"]
+    # Returns are compounded in float64 even when the frame holds compact float32 columns.
+    pair_returns = data['pair_returns'].to_numpy(dtype='float64', na_value=np.nan)
 
-        if not isinstance(weights, list):
-            raise TypeError("Weights must be a list.")
+    return pd.DataFrame({
+        'pair_portfolio': _cumulative_returns(pair_returns),
+        'benchmark': _cumulative_returns(benchmark_returns)
+    }, index=data.index)
 
-        if len(weights) != 2:
-            raise ValueError("Weights list must contain two elements.")
-            
-        if not all(isinstance(w, (int, float)) for w in weights):
-            raise TypeError("Weights must be numeric values.")
 
-        if 'asset1' not in data.columns or 'asset2' not in data.columns:
-             raise KeyError("DataFrame must contain 'asset1' and 'asset2' columns for static weights strategy.")
+import pandas as pd
+import numpy as np
+from typing import Mapping, NamedTuple, Union
 
-        asset1_returns = data['asset1'].pct_change().fillna(0)
-        asset2_returns = data['asset2'].pct_change().fillna(0)
+class BenchmarkCurves(NamedTuple):
+    """Cumulative pair-portfolio and benchmark curves for a batch of pairs.
 
-        benchmark_returns = weights[0] * asset1_returns + weights[1] * asset2_returns
+    Curve arrays have shape (pairs, time). Pairs with a shorter history than the longest one
+    are padded with NaN past their own length.
 
-    elif benchmark_strategy == "rebalancing_window":
-        if "window" not in benchmark_parameters:
-            raise KeyError("Benchmark parameters must contain 'window' for rebalancing_window strategy.")
+    Attributes:
+        pair_ids: Identifier of each pair, one per row of the curve arrays.
+        lengths: Number of observations of each pair.
+        pair_portfolio: Cumulative value of each pair portfolio.
+        benchmark: Cumulative value of each pair's benchmark.
+    """
+    pair_ids: np.ndarray
+    lengths: np.ndarray
+    pair_portfolio: np.ndarray
+    benchmark: np.ndarray
 
-        window = benchmark_parameters["window"]
+    def to_frame(self, pair_column: str = 'pair_id') -> pd.DataFrame:
+        """Flattens the curves into a long-format DataFrame ordered by pair, then time.
 
-        if not isinstance(window, int):
-            raise TypeError("Window must be an integer.")
-            
-        if 'asset1' not in data.columns or 'asset2' not in data.columns:
-             raise KeyError("DataFrame must contain 'asset1' and 'asset2' columns for rebalancing window strategy.")
-
-        benchmark_returns = pd.Series(index=data.index, dtype='float64')
-        
-        for i in range(len(data)):
-            if i < window:
-                asset1_returns = data['asset1'].iloc[:i+1].pct_change().fillna(0)
-                asset2_returns = data['asset2'].iloc[:i+1].pct_change().fillna(0)
-                
-                weights = [0.5, 0.5]
-                benchmark_returns.iloc[i] = weights[0] * asset1_returns.iloc[-1] + weights[1] * asset2_returns.iloc[-1]
-            else:
-                asset1_returns = data['asset1'].iloc[i-window+1:i+1].pct_change().fillna(0)
-                asset2_returns = data['asset2'].iloc[i-window+1:i+1].pct_change().fillna(0)
-                
-                weights = [0.5, 0.5]
-                benchmark_returns.iloc[i] = weights[0] * asset1_returns.iloc[-1] + weights[1] * asset2_returns.iloc[-1]
-    else:
-        raise ValueError("Invalid benchmark strategy. Supported strategies are 'static_weights' and 'rebalancing_window'.")
+        Args:
+            pair_column: Name of the pair identifier column.
 
-    pair_portfolio_cumulative = (1 + data['pair_returns']).cumprod()
-    benchmark_cumulative = (1 + benchmark_returns).cumprod()
+        Returns:
+            Pandas DataFrame with columns pair_column, 'pair_portfolio' and 'benchmark'.
+        """
+        mask = np.arange(self.pair_portfolio.shape[1]) < self.lengths[:, None]
+        return pd.DataFrame({
+            pair_column: np.repeat(self.pair_ids, self.lengths),
+            'pair_portfolio': self.pair_portfolio[mask],
+            'benchmark': self.benchmark[mask],
+        })
 
-    result_df = pd.DataFrame({
-        'pair_portfolio': pair_portfolio_cumulative,
-        'benchmark': benchmark_cumulative
-    })
 
-    return result_df.fillna(1)
+def _cumulative_returns(returns: np.ndarray, axis: int = 0) -> np.ndarray:
+    """Compounds returns along an axis, matching ``(1 + returns).cumprod().fillna(1)``.
+
+    Missing returns are skipped when compounding and reported as 1.
+    """
+    returns = np.asarray(returns, dtype='float64')
+    missing = np.isnan(returns)
+    cumulative = np.cumprod(1 + np.where(missing, 0.0, returns), axis=axis)
+    cumulative[missing] = 1.0
+    return cumulative
+
 
+def _long_to_panel(data: pd.DataFrame, pair_column: str, columns) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+    """Scatters long-format rows into NaN-padded (pairs, time) arrays.
 
+    Pairs are ordered by first appearance and rows keep their input order within a pair.
+    """
+    codes, pair_ids = pd.factorize(data[pair_column], sort=False)
+    if (codes < 0).any():
+        raise ValueError(f"Column '{pair_column}' cannot contain missing pair identifiers.")
+
+    positions = pd.Series(codes).groupby(codes, sort=False).cumcount().to_numpy()
+    lengths = np.bincount(codes, minlength=len(pair_ids))
+
+    panel = {}
+    for col in columns:
+        if pd.api.types.is_datetime64_any_dtype(data[col]):
+            values = np.full((len(pair_ids), lengths.max()), np.datetime64('NaT'), dtype='datetime64[ns]')
+            values[codes, positions] = data[col].to_numpy(dtype='datetime64[ns]')
+        else:
+            values = np.full((len(pair_ids), lengths.max()), np.nan)
+            values[codes, positions] = data[col].to_numpy(dtype='float64', na_value=np.nan)
+        panel[col] = values
+    return np.asarray(pair_ids), lengths, panel
+
+
+@instrumented
+def compare_to_benchmark_batch(data: Union[pd.DataFrame, Mapping[str, np.ndarray]], benchmark_strategy: str,
+                               benchmark_parameters: dict, pair_column: str = 'pair_id') -> BenchmarkCurves:
+    """Compares many pair portfolios against a benchmark strategy in one vectorized call.
+
+    Produces, for every pair, the same curves as `compare_to_benchmark` but validates the
+    parameters once and computes all pairs together, so the cost grows with the total number
+    of rows instead of the number of pairs.
+
+    Args:
+        data: Either a long-format DataFrame with columns pair_column, 'asset1', 'asset2' and
+            'pair_returns' (rows in time order within each pair), or a mapping from 'asset1',
+            'asset2' and 'pair_returns' to 2-D arrays of shape (pairs, time). Calendar-based
+            strategies also need a 'Date' column, or a 'Date' array of shape (time,) or (pairs, time).
+        benchmark_strategy: The selected benchmark strategy, any name registered in `BENCHMARK_STRATEGIES`.
+        benchmark_parameters: Parameters for the benchmark strategy, as for `compare_to_benchmark`.
+        pair_column: Name of the pair identifier column for long-format input.
+
+    Returns:
+        BenchmarkCurves holding the cumulative pair-portfolio and benchmark arrays of all pairs.
+
+    Raises:
+        ValueError: If the input is empty, the panel arrays differ in shape or the benchmark strategy is invalid.
+        KeyError: If the required columns are missing or if required parameters are missing.
+        TypeError: If the benchmark parameters have invalid types.
+    """
+    columns = ['asset1', 'asset2', 'pair_returns']
+
+    if isinstance(data, pd.DataFrame):
+        if data.empty:
+            raise ValueError("Input DataFrame cannot be empty.")
+        if pair_column not in data.columns:
+            raise KeyError(f"DataFrame must contain '{pair_column}' column.")
+        if 'pair_returns' not in data.columns:
+            raise KeyError("DataFrame must contain 'pair_returns' column.")
+        strategy = _benchmark_strategy(data.columns, benchmark_strategy, benchmark_parameters)
+        if strategy.needs_timestamps and 'Date' not in data.columns:
+            raise KeyError(f"DataFrame must contain 'Date' column for {benchmark_strategy} strategy.")
+        pair_ids, lengths, panel = _long_to_panel(data, pair_column, columns + ['Date'] * strategy.needs_timestamps)
+        timestamps = panel.pop('Date', None)
+    else:
+        if 'pair_returns' not in data:
+            raise KeyError("Panel must contain 'pair_returns' array.")
+        strategy = _benchmark_strategy(data.keys(), benchmark_strategy, benchmark_parameters)
+        if strategy.needs_timestamps and 'Date' not in data:
+            raise KeyError(f"Panel must contain 'Date' array for {benchmark_strategy} strategy.")
+        timestamps = np.asarray(data['Date'], dtype='datetime64[ns]') if strategy.needs_timestamps else None
+        panel = {col: np.asarray(data[col], dtype='float64') for col in columns}
+        shape = panel['pair_returns'].shape
+        if len(shape) != 2 or any(values.shape != shape for values in panel.values()):
+            raise ValueError("Panel arrays must be 2-D with identical (pairs, time) shapes.")
+        if shape[0] == 0 or shape[1] == 0:
+            raise ValueError("Input panel cannot be empty.")
+        pair_ids = np.arange(shape[0])
+        lengths = np.full(shape[0], shape[1])
+
+    # The engine works with time along axis 0, so the panels are passed transposed; a shared
+    # 1-D timeline is broadcast across the pairs.
+    if timestamps is not None:
+        timestamps = np.broadcast_to(timestamps, panel['asset1'].shape).T
+    benchmark_returns = strategy.returns(_asset_returns(panel['asset1'].T, panel['asset2'].T), timestamps)
+    pair_portfolio = _cumulative_returns(panel['pair_returns'], axis=1)
+    benchmark = _cumulative_returns(benchmark_returns, axis=0).T
+
+    padding = np.arange(pair_portfolio.shape[1]) >= lengths[:, None]
+    if padding.any():
+        pair_portfolio[padding] = np.nan
+        benchmark[padding] = np.nan
+
+    return BenchmarkCurves(pair_ids, lengths, pair_portfolio, benchmark)
+
+
+import os
+import json
 import pandas as pd
 import numpy as np
+from typing import List, Mapping, Optional
 
-def compare_to_benchmark(data: pd.DataFrame, benchmark_strategy: str, benchmark_parameters: dict) -> pd.DataFrame:
-    """Compares the signal-driven pair portfolio performance against a benchmark strategy.
+def write_price_panel(path: str, timestamps, prices: Mapping[str, np.ndarray], dtype: str = 'float64') -> None:
+    """Writes a price panel as memory-mappable NumPy files.
+
+    The panel directory holds 'timestamps.npy' (datetime64[ns]) shared by all assets, one
+    contiguous '<asset>.npy' array per asset and a 'panel.json' manifest listing the assets.
 
     Args:
-        data: Pandas DataFrame containing the data, must contain 'pair_returns' column.
-        benchmark_strategy: The selected benchmark strategy ("static_weights", "rebalancing_window").
-        benchmark_parameters: Parameters for the benchmark strategy.
-            For "static_weights": {"weights": [weight_asset1, weight_asset2]}
-            For "rebalancing_window": {"window": window_size}
+        path: Directory to write the panel to; it is created if needed.
+        timestamps: Timestamps of the observations, convertible to datetime64[ns].
+        prices: Mapping from asset name to a 1-D price array with one value per timestamp.
+        dtype: Storage dtype of the prices, 'float64' or 'float32'.
+
+    Raises:
+        ValueError: If the dtype is unsupported, an asset name is not a valid file name or a price
+            array does not match the timestamps.
+    """
+    if dtype not in ('float64', 'float32'):
+        raise ValueError("Dtype must be 'float64' or 'float32'.")
+
+    timestamps = np.asarray(pd.to_datetime(timestamps), dtype='datetime64[ns]')
+    for asset, values in prices.items():
+        if not asset or os.sep in asset or asset in ('timestamps', '.', '..'):
+            raise ValueError(f"Invalid asset name '{asset}'.")
+        if np.shape(values) != timestamps.shape:
+            raise ValueError(f"Prices of '{asset}' must have one value per timestamp.")
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, 'timestamps.npy'), timestamps)
+    for asset, values in prices.items():
+        array = np.lib.format.open_memmap(os.path.join(path, f'{asset}.npy'), mode='w+', dtype=dtype, shape=timestamps.shape)
+        array[:] = values
+        array.flush()
+        del array
+    with open(os.path.join(path, 'panel.json'), 'w') as f:
+        json.dump({'assets': list(prices), 'dtype': dtype, 'length': len(timestamps)}, f)
+
+
+class PricePanel:
+    """Read-only, memory-mapped view of a price panel written by `write_price_panel`.
+
+    Arrays are opened with ``mmap_mode='r'``, so the data is paged in on demand and processes
+    opening the same panel share the operating system's page cache instead of holding private
+    copies.
+
+    Args:
+        path: Directory of the panel.
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, 'panel.json')) as f:
+            manifest = json.load(f)
+        self.path = path
+        self.assets: List[str] = manifest['assets']
+        self.dtype: str = manifest['dtype']
+        self.timestamps: np.ndarray = np.load(os.path.join(path, 'timestamps.npy'), mmap_mode='r')
+        self._arrays = {}
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def prices(self, asset: str) -> np.ndarray:
+        """Returns the memory-mapped price array of an asset.
+
+        Raises:
+            KeyError: If the asset is not in the panel.
+        """
+        if asset not in self.assets:
+            raise KeyError(f"Asset '{asset}' is not in the price panel.")
+        if asset not in self._arrays:
+            self._arrays[asset] = np.load(os.path.join(self.path, f'{asset}.npy'), mmap_mode='r')
+        return self._arrays[asset]
+
+
+@instrumented
+def compare_to_benchmark_panel(panel: PricePanel, asset1: str, asset2: str, pair_returns, benchmark_strategy: str,
+                               benchmark_parameters: dict, start: Optional[int] = None, end: Optional[int] = None) -> pd.DataFrame:
+    """Compares a pair portfolio against a benchmark computed from a memory-mapped price panel.
+
+    The asset prices are sliced straight from the memory maps; float64 panels are consumed by the
+    benchmark engine without copying, float32 panels are upcast one slice at a time.
+
+    Args:
+        panel: PricePanel holding the asset prices.
+        asset1: Name of the first asset in the panel.
+        asset2: Name of the second asset in the panel.
+        pair_returns: Pair portfolio returns for the rows start:end of the panel.
+        benchmark_strategy: The selected benchmark strategy, any name registered in `BENCHMARK_STRATEGIES`.
+        benchmark_parameters: Parameters for the benchmark strategy, as for `compare_to_benchmark`.
+        start: First panel row to use (default 0).
+        end: End panel row, exclusive (default: the panel length).
 
     Returns:
-        Pandas DataFrame containing the performance of both the pair portfolio and the benchmark strategy.
-        Columns: 'pair_portfolio', 'benchmark'
+        Pandas DataFrame indexed by the panel timestamps with columns 'pair_portfolio' and 'benchmark'.
 
     Raises:
-        ValueError: If the input DataFrame is empty or if the benchmark strategy is invalid.
-        KeyError: If the required columns are missing in the DataFrame or if required parameters are missing.
+        ValueError: If the selected range is empty, pair_returns has the wrong length or the benchmark strategy is invalid.
+        KeyError: If an asset is missing from the panel or required parameters are missing.
+        TypeError: If the benchmark parameters have invalid types.
+    """
+    window_slice = slice(start, end)
+    timestamps = panel.timestamps[window_slice]
+    if len(timestamps) == 0:
+        raise ValueError("Selected panel range cannot be empty.")
+
+    pair_returns = np.asarray(pair_returns, dtype='float64')
+    if pair_returns.shape != timestamps.shape:
+        raise ValueError("pair_returns must have one value per selected panel row.")
+
+    strategy = _benchmark_strategy(['asset1', 'asset2'], benchmark_strategy, benchmark_parameters)
+    asset_returns = _asset_returns(panel.prices(asset1)[window_slice], panel.prices(asset2)[window_slice])
+    benchmark_returns = strategy.returns(asset_returns, np.asarray(timestamps))
+
+    return pd.DataFrame({
+        'pair_portfolio': _cumulative_returns(pair_returns),
+        'benchmark': _cumulative_returns(benchmark_returns),
+    }, index=pd.DatetimeIndex(timestamps))
+
+
+import pandas as pd
+import numpy as np
+from typing import Tuple
+
+class BenchmarkTracker:
+    """Incremental version of `compare_to_benchmark` for continuously arriving prices.
+
+    The tracker keeps the last observed asset prices, each leg's growth since the last rebalance and the
+    running cumulative values, so `update` costs O(len(new_rows)). Feeding the rows of a frame in
+    any number of batches yields exactly the curves `compare_to_benchmark` returns for the whole frame.
+
+    Args:
+        benchmark_strategy: The selected benchmark strategy; strategies on a fixed schedule
+            ("static_weights", "rebalancing_window", "buy_and_hold") are supported.
+        benchmark_parameters: Parameters for the benchmark strategy, as for `compare_to_benchmark`.
+
+    Raises:
+        ValueError: If the benchmark strategy is invalid or cannot be updated incrementally.
+        KeyError: If required parameters are missing.
         TypeError: If the benchmark parameters have invalid types.
     """
 
+    def __init__(self, benchmark_strategy: str, benchmark_parameters: dict):
+        strategy = _benchmark_strategy(['asset1', 'asset2'], benchmark_strategy, benchmark_parameters)
+        if strategy.window is None:
+            raise ValueError(f"The {benchmark_strategy} strategy cannot be updated incrementally.")
+        self.benchmark_strategy = benchmark_strategy
+        self.weights = strategy.target_weights
+        self.window = strategy.window
+        self.num_rows = 0
+        self.last_prices = None
+        self.block_periods = 0              # periods already compounded in the current rebalancing block
+        self.block_growth = np.ones(2)      # growth of each leg over those periods
+        self.pair_portfolio = 1.0
+        self.benchmark = 1.0
+
+    def _benchmark_returns(self, asset_returns: np.ndarray) -> np.ndarray:
+        if self.benchmark_strategy == "static_weights":
+            return self.weights[0] * asset_returns[:, 0] + self.weights[1] * asset_returns[:, 1]
+
+        growth = 1 + asset_returns
+        n = len(growth)
+
+        # Periods that complete the block in progress continue from its carried growth; the
+        # remaining periods start fresh blocks exactly as in the batch engine.
+        head = min(self.window - self.block_periods, n) if self.block_periods else 0
+        leg_growth = np.concatenate([
+            np.cumprod(np.vstack([self.block_growth[None], growth[:head - 1]]), axis=0)[:head],
+            _block_growth(growth[head:], self.window),
+        ])
+
+        periods = self.block_periods + n
+        if periods % self.window == 0:
+            self.block_growth = np.ones(2)
+        elif periods < self.window:
+            self.block_growth = np.cumprod(np.vstack([self.block_growth[None], growth]), axis=0)[-1]
+        else:
+            self.block_growth = np.cumprod(growth[-(periods % self.window):], axis=0)[-1]
+        self.block_periods = periods % self.window
+
+        return (_drifted_weights(leg_growth, self.weights) * asset_returns).sum(axis=-1)
+
+    @staticmethod
+    def _compound(start: float, returns: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Compounds returns from a running value like ``cumprod().fillna(1)``; returns the curve and the new value."""
+        missing = np.isnan(returns)
+        curve = np.cumprod(np.r_[start, 1 + np.where(missing, 0.0, returns)])[1:]
+        end = curve[-1]
+        curve[missing] = 1.0
+        return curve, end
+
+    def update(self, new_rows: pd.DataFrame) -> pd.DataFrame:
+        """Processes newly arrived rows.
+
+        Args:
+            new_rows: Pandas DataFrame with 'asset1', 'asset2' and 'pair_returns' columns, in time order.
+
+        Returns:
+            Pandas DataFrame with the 'pair_portfolio' and 'benchmark' values of the new rows, indexed like `new_rows`.
+
+        Raises:
+            KeyError: If a required column is missing.
+        """
+        for col in ['asset1', 'asset2', 'pair_returns']:
+            if col not in new_rows.columns:
+                raise KeyError(f"DataFrame must contain '{col}' column.")
+        if new_rows.empty:
+            return pd.DataFrame({'pair_portfolio': [], 'benchmark': []}, index=new_rows.index, dtype='float64')
+
+        prices = np.column_stack([new_rows['asset1'].to_numpy(dtype='float64', na_value=np.nan),
+                                  new_rows['asset2'].to_numpy(dtype='float64', na_value=np.nan)])
+        if self.last_prices is None:
+            asset_returns = _price_returns(prices)
+            benchmark_returns = np.r_[0.0, self._benchmark_returns(asset_returns[1:])]
+        else:
+            prices = np.vstack([self.last_prices[None], prices])
+            asset_returns = _price_returns(prices)[1:]
+            benchmark_returns = self._benchmark_returns(asset_returns)
+        # Missing prices are forward-filled as in the batch engine, so the last observed price is carried.
+        self.last_prices = _forward_fill(prices)[-1]
+        self.num_rows += len(new_rows)
+
+        pair_returns = new_rows['pair_returns'].to_numpy(dtype='float64', na_value=np.nan)
+        pair_curve, self.pair_portfolio = self._compound(self.pair_portfolio, pair_returns)
+        benchmark_curve, self.benchmark = self._compound(self.benchmark, benchmark_returns)
+
+        return pd.DataFrame({'pair_portfolio': pair_curve, 'benchmark': benchmark_curve}, index=new_rows.index)
+
+
+import os
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+shared_memory = _LazyModule('multiprocessing.shared_memory')
+
+def _column_values(data: pd.DataFrame, col: str) -> np.ndarray:
+    """Returns a column as float64; datetime columns keep their nanosecond bit patterns."""
+    if pd.api.types.is_datetime64_any_dtype(data[col]):
+        return data[col].to_numpy(dtype='datetime64[ns]').view('float64')
+    return data[col].to_numpy(dtype='float64', na_value=np.nan)
+
+
+def _benchmark_rows(values: np.ndarray, results: np.ndarray, offsets: np.ndarray, strategy: BenchmarkStrategy) -> None:
+    """Computes the benchmark curves of consecutive pairs stored back to back in long format.
+
+    Args:
+        values: Array of shape (3, rows) holding the 'asset1', 'asset2' and 'pair_returns' rows, plus
+            the 'Date' bit patterns as a fourth row for strategies that need timestamps.
+        results: Array of shape (2, rows) receiving the 'pair_portfolio' and 'benchmark' values.
+        offsets: Row boundaries of the pairs, [start_pair_0, ..., end_pair_last].
+        strategy: The validated benchmark strategy.
+    """
+    start, end = offsets[0], offsets[-1]
+    lengths = np.diff(offsets)
+    codes = np.repeat(np.arange(len(lengths)), lengths)
+    positions = np.arange(end - start) - np.repeat(offsets[:-1] - start, lengths)
+
+    # Pairs are padded to a common length with time along axis 0; the engine is causal, so the
+    # padding never affects the values that are kept.
+    panel = np.full((3, lengths.max(), len(lengths)), np.nan)
+    panel[:, positions, codes] = values[:3, start:end]
+    timestamps = None
+    if strategy.needs_timestamps:
+        timestamps = np.full(panel.shape[1:], np.datetime64('NaT'), dtype='datetime64[ns]')
+        timestamps[positions, codes] = values[3, start:end].view('datetime64[ns]')
+
+    benchmark_returns = strategy.returns(_asset_returns(panel[0], panel[1]), timestamps)
+    results[0, start:end] = _cumulative_returns(panel[2])[positions, codes]
+    results[1, start:end] = _cumulative_returns(benchmark_returns)[positions, codes]
+
+
+def _benchmark_shard(inputs_name: str, outputs_name: str, shape: Tuple[int, int], offsets: np.ndarray,
+                     strategy: BenchmarkStrategy) -> None:
+    """Process-pool task: attaches to the shared input and output blocks and fills in one shard of pairs."""
+    inputs = shared_memory.SharedMemory(name=inputs_name)
+    outputs = shared_memory.SharedMemory(name=outputs_name)
+    try:
+        _benchmark_rows(np.ndarray(shape, dtype='float64', buffer=inputs.buf),
+                        np.ndarray((2, shape[1]), dtype='float64', buffer=outputs.buf),
+                        offsets, strategy)
+    finally:
+        inputs.close()
+        outputs.close()
+
+
+def _shard_offsets(offsets: np.ndarray, num_shards: int) -> List[np.ndarray]:
+    """Splits pair row boundaries into contiguous shards holding roughly equal numbers of rows."""
+    targets = np.linspace(0, offsets[-1], num_shards + 1)[1:-1]
+    cuts = np.unique(np.r_[0, np.searchsorted(offsets, targets), len(offsets) - 1])
+    return [offsets[lo:hi + 1] for lo, hi in zip(cuts[:-1], cuts[1:])]
+
+
+def _benchmark_shards_in_pool(data: pd.DataFrame, columns: List[str], order: np.ndarray, shards: List[np.ndarray],
+                              strategy: BenchmarkStrategy, max_workers: int) -> np.ndarray:
+    """Runs the shards on a process pool, passing the rows through shared memory blocks."""
+    num_rows = len(order)
+    inputs = shared_memory.SharedMemory(create=True, size=len(columns) * num_rows * 8)
+    outputs = shared_memory.SharedMemory(create=True, size=2 * num_rows * 8)
+    try:
+        values = np.ndarray((len(columns), num_rows), dtype='float64', buffer=inputs.buf)
+        try:
+            for row, col in enumerate(columns):
+                values[row] = _column_values(data, col)[order]
+        finally:
+            del values      # views must be released before the blocks are closed
+
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(shards))) as pool:
+            futures = [pool.submit(_benchmark_shard, inputs.name, outputs.name, (len(columns), num_rows), shard, strategy)
+                       for shard in shards]
+            for future in futures:
+                future.result()
+
+        return np.ndarray((2, num_rows), dtype='float64', buffer=outputs.buf).copy()
+    finally:
+        inputs.close()
+        inputs.unlink()
+        outputs.close()
+        outputs.unlink()
+
+
+@instrumented
+def compare_to_benchmark_parallel(data: pd.DataFrame, benchmark_strategy: str, benchmark_parameters: dict,
+                                  pair_column: str = 'pair_id', max_workers: Optional[int] = None,
+                                  shards_per_worker: int = 4) -> pd.DataFrame:
+    """Compares many pair portfolios against a benchmark strategy on a pool of worker processes.
+
+    The rows are grouped by pair and copied once into a shared memory block; workers attach to it
+    by name, compute contiguous shards of pairs and write their curves into a second shared block,
+    so no DataFrame or price array is pickled between processes. The result is identical to
+    ``compare_to_benchmark_batch(data, ...).to_frame(pair_column)`` whatever the number of workers.
+
+    Args:
+        data: Long-format DataFrame with columns pair_column, 'asset1', 'asset2' and 'pair_returns'
+            (rows in time order within each pair), plus 'Date' for calendar-based strategies.
+        benchmark_strategy: The selected benchmark strategy, any name registered in `BENCHMARK_STRATEGIES`.
+        benchmark_parameters: Parameters for the benchmark strategy, as for `compare_to_benchmark`.
+        pair_column: Name of the pair identifier column.
+        max_workers: Number of worker processes (default: the number of CPUs). With 1 the pairs are
+            computed in the calling process.
+        shards_per_worker: Number of shards queued per worker, to balance pairs of uneven length.
+
+    Returns:
+        Pandas DataFrame with columns pair_column, 'pair_portfolio' and 'benchmark', ordered by pair
+        (first appearance) and then by time.
+
+    Raises:
+        ValueError: If the input DataFrame is empty, a pair identifier is missing, the worker counts
+            are smaller than 1 or the benchmark strategy is invalid.
+        KeyError: If the required columns are missing or if required parameters are missing.
+        TypeError: If the benchmark parameters have invalid types.
+    """
     if data.empty:
         raise ValueError("Input DataFrame cannot be empty.")
-
+    if pair_column not in data.columns:
+        raise KeyError(f"DataFrame must contain '{pair_column}' column.")
     if 'pair_returns' not in data.columns:
         raise KeyError("DataFrame must contain 'pair_returns' column.")
+    strategy = _benchmark_strategy(data.columns, benchmark_strategy, benchmark_parameters)
+    if strategy.needs_timestamps and 'Date' not in data.columns:
+        raise KeyError(f"DataFrame must contain 'Date' column for {benchmark_strategy} strategy.")
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers < 1 or shards_per_worker < 1:
+        raise ValueError("Number of workers and shards per worker must be at least 1.")
+
+    codes, pair_ids = pd.factorize(data[pair_column], sort=False)
+    if (codes < 0).any():
+        raise ValueError(f"Column '{pair_column}' cannot contain missing pair identifiers.")
+    order = np.argsort(codes, kind='stable')
+    lengths = np.bincount(codes, minlength=len(pair_ids))
+    offsets = np.r_[0, np.cumsum(lengths)]
+    num_rows = len(order)
+
+    shards = _shard_offsets(offsets, min(len(pair_ids), max_workers * shards_per_worker))
+    columns = ['asset1', 'asset2', 'pair_returns'] + ['Date'] * strategy.needs_timestamps
+    if max_workers == 1 or len(shards) == 1:
+        values = np.stack([_column_values(data, col)[order] for col in columns])
+        results = np.empty((2, num_rows))
+        for shard in shards:
+            _benchmark_rows(values, results, shard, strategy)
+    else:
+        results = _benchmark_shards_in_pool(data, columns, order, shards, strategy, max_workers)
 
-    if benchmark_strategy == "static_weights":
-        if "weights" not in benchmark_parameters:
-            raise KeyError("Benchmark parameters must contain 'weights' for static_weights strategy.")
+    return pd.DataFrame({pair_column: np.repeat(np.asarray(pair_ids), lengths),
+                         'pair_portfolio': results[0], 'benchmark': results[1]})
 
-        weights = benchmark_parameters["weights"]
 
-        if not isinstance(weights, list):
-            raise TypeError("Weights must be a list.")
+import pandas as pd
+import numpy as np
+from typing import NamedTuple, Optional
 
-        if len(weights) != 2:
-            raise ValueError("Weights list must contain two elements.")
-            
-        if not all(isinstance(w, (int, float)) for w in weights):
-            raise TypeError("Weights must be numeric values.")
+class HedgeRatios(NamedTuple):
+    """Hedge ratio estimates of the regression asset1 = intercept + hedge_ratio * asset2.
 
-        if 'asset1' not in data.columns or 'asset2' not in data.columns:
-             raise KeyError("DataFrame must contain 'asset1' and 'asset2' columns for static weights strategy.")
+    Both arrays have the shape of the price arrays, with time along axis 0; the estimate at row t
+    uses the prices up to and including row t.
 
-        asset1_returns = data['asset1'].pct_change().fillna(0)
-        asset2_returns = data['asset2'].pct_change().fillna(0)
+    Attributes:
+        hedge_ratio: Units of asset2 hedging one unit of asset1.
+        intercept: Regression intercept.
+    """
+    hedge_ratio: np.ndarray
+    intercept: np.ndarray
 
-        benchmark_returns = weights[0] * asset1_returns + weights[1] * asset2_returns
 
-    elif benchmark_strategy == "rebalancing_window":
-        if "window" not in benchmark_parameters:
-            raise KeyError("Benchmark parameters must contain 'window' for rebalancing_window strategy.")
+def _price_pair(asset1, asset2):
+    """Converts two price arrays to float64 and checks that their shapes match."""
+    asset1 = np.asarray(asset1, dtype='float64')
+    asset2 = np.asarray(asset2, dtype='float64')
+    if asset1.shape != asset2.shape:
+        raise ValueError("Asset price arrays must have the same shape.")
+    if asset1.ndim == 0 or len(asset1) == 0:
+        raise ValueError("Asset price arrays cannot be empty.")
+    return asset1, asset2
 
-        window = benchmark_parameters["window"]
 
-        if not isinstance(window, int):
-            raise TypeError("Window must be an integer.")
-            
-        if 'asset1' not in data.columns or 'asset2' not in data.columns:
-             raise KeyError("DataFrame must contain 'asset1' and 'asset2' columns for rebalancing window strategy.")
-
-        benchmark_returns = pd.Series(index=data.index, dtype='float64')
-        
-        for i in range(len(data)):
-            if i < window:
-                asset1_returns = data['asset1'].iloc[:i+1].pct_change().fillna(0)
-                asset2_returns = data['asset2'].iloc[:i+1].pct_change().fillna(0)
-                
-                weights = [0.5, 0.5]
-                benchmark_returns.iloc[i] = weights[0] * asset1_returns.iloc[-1] + weights[1] * asset2_returns.iloc[-1]
-            else:
-                asset1_returns = data['asset1'].iloc[i-window+1:i+1].pct_change().fillna(0)
-                asset2_returns = data['asset2'].iloc[i-window+1:i+1].pct_change().fillna(0)
-                
-                weights = [0.5, 0.5]
-                benchmark_returns.iloc[i] = weights[0] * asset1_returns.iloc[-1] + weights[1] * asset2_returns.iloc[-1]
+@instrumented
+def rolling_ols_hedge_ratios(asset1, asset2, window: int, min_periods: Optional[int] = None) -> HedgeRatios:
+    """Estimates hedge ratios by ordinary least squares over a rolling window.
+
+    Uses running sums of the prices, their squares and cross products, so each window costs O(1)
+    instead of one regression per window. The prices are centred on their overall means first to
+    keep the running sums small. Rows where either price is missing are skipped.
+
+    Args:
+        asset1: Prices of the first asset (the regressand), time along axis 0; 2-D arrays hold one pair per column.
+        asset2: Prices of the second asset (the regressor), same shape as `asset1`.
+        window: Number of observations per regression.
+        min_periods: Minimum number of valid observations required for an estimate (default: `window`).
+
+    Returns:
+        HedgeRatios, NaN where fewer than `min_periods` observations (or no variation in asset2) are available.
+
+    Raises:
+        ValueError: If the price arrays are empty or differ in shape, or if the window or min_periods is smaller than 2.
+    """
+    y, x = _price_pair(asset1, asset2)
+    min_periods = window if min_periods is None else min_periods
+    if window < 2 or min_periods < 2:
+        raise ValueError("Window and min_periods must be at least 2.")
+
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x_center = np.nanmean(np.where(valid, x, np.nan), axis=0) if valid.any() else 0.0
+    y_center = np.nanmean(np.where(valid, y, np.nan), axis=0) if valid.any() else 0.0
+    xc = np.where(valid, x - x_center, 0.0)
+    yc = np.where(valid, y - y_center, 0.0)
+
+    sums = np.cumsum(np.stack([valid.astype('float64'), xc, yc, xc * xc, xc * yc]), axis=1)
+    if window < len(x):
+        sums[:, window:] = sums[:, window:] - sums[:, :-window]
+    counts, sum_x, sum_y, sum_xx, sum_xy = sums
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_x = sum_x / counts
+        mean_y = sum_y / counts
+        hedge_ratio = (sum_xy - sum_x * mean_y) / (sum_xx - sum_x * mean_x)
+    intercept = (mean_y + y_center) - hedge_ratio * (mean_x + x_center)
+
+    usable = (counts >= min_periods) & np.isfinite(hedge_ratio)
+    return HedgeRatios(np.where(usable, hedge_ratio, np.nan), np.where(usable, intercept, np.nan))
+
+
+def _kalman_single_pair(y: np.ndarray, x: np.ndarray, state_variance: float, observation_variance: float) -> HedgeRatios:
+    """Runs the hedge ratio Kalman filter of one pair on Python floats, avoiding per-step array overhead."""
+    beta = alpha = p_bb = p_ba = p_aa = 0.0
+    hedge_ratio = np.empty_like(x)
+    intercept = np.empty_like(x)
+    for t, (xt, yt) in enumerate(zip(x.tolist(), y.tolist())):
+        p_bb += state_variance
+        p_aa += state_variance
+        if xt == xt and yt == yt:       # both prices observed (not NaN)
+            ph_b = p_bb * xt + p_ba
+            ph_a = p_ba * xt + p_aa
+            innovation_variance = xt * ph_b + ph_a + observation_variance
+            k_b = ph_b / innovation_variance
+            k_a = ph_a / innovation_variance
+            error = yt - (beta * xt + alpha)
+            beta += k_b * error
+            alpha += k_a * error
+            p_bb, p_ba, p_aa = p_bb - k_b * ph_b, p_ba - k_b * ph_a, p_aa - k_a * ph_a
+        hedge_ratio[t] = beta
+        intercept[t] = alpha
+    return HedgeRatios(hedge_ratio, intercept)
+
+
+@instrumented
+def kalman_hedge_ratios(asset1, asset2, delta: float = 1e-4, observation_variance: float = 1e-3) -> HedgeRatios:
+    """Estimates time-varying hedge ratios with a Kalman filter.
+
+    The hedge ratio and intercept follow a random walk with covariance ``delta / (1 - delta) * I``,
+    observed through asset1 = intercept + hedge_ratio * asset2 + noise. The filter is a single O(n)
+    pass over time; each step updates all pairs at once with the 2x2 covariance written out
+    explicitly. Rows where either price is missing leave the estimate unchanged.
+
+    Args:
+        asset1: Prices of the first asset (the observation), time along axis 0; 2-D arrays hold one pair per column.
+        asset2: Prices of the second asset, same shape as `asset1`.
+        delta: Adaptation rate of the state, between 0 and 1; larger values track changes faster.
+        observation_variance: Variance of the observation noise.
+
+    Returns:
+        HedgeRatios holding the filtered state after each row.
+
+    Raises:
+        ValueError: If the price arrays are empty or differ in shape, or a filter parameter is out of range.
+    """
+    y, x = _price_pair(asset1, asset2)
+    if not 0 < delta < 1:
+        raise ValueError("Delta must be between 0 and 1.")
+    if observation_variance <= 0:
+        raise ValueError("Observation variance must be positive.")
+
+    state_variance = delta / (1 - delta)
+    if x.ndim == 1:
+        return _kalman_single_pair(y, x, state_variance, observation_variance)
+
+    beta = np.zeros(x.shape[1:])
+    alpha = np.zeros(x.shape[1:])
+    # Entries of the symmetric state covariance [[p_bb, p_ba], [p_ba, p_aa]].
+    p_bb, p_ba, p_aa = np.zeros(x.shape[1:]), np.zeros(x.shape[1:]), np.zeros(x.shape[1:])
+
+    hedge_ratio = np.empty_like(x)
+    intercept = np.empty_like(x)
+    for t in range(len(x)):
+        p_bb = p_bb + state_variance
+        p_aa = p_aa + state_variance
+        xt, yt = x[t], y[t]
+        observed = ~(np.isnan(xt) | np.isnan(yt))
+        xt = np.where(observed, xt, 0.0)
+
+        # Gain K = P h' / (h P h' + Ve) for the observation vector h = [x_t, 1].
+        ph_b = p_bb * xt + p_ba
+        ph_a = p_ba * xt + p_aa
+        innovation_variance = xt * ph_b + ph_a + observation_variance
+        k_b = np.where(observed, ph_b / innovation_variance, 0.0)
+        k_a = np.where(observed, ph_a / innovation_variance, 0.0)
+        error = np.where(observed, yt - (beta * xt + alpha), 0.0)
+
+        beta = beta + k_b * error
+        alpha = alpha + k_a * error
+        p_bb, p_ba, p_aa = p_bb - k_b * ph_b, p_ba - k_b * ph_a, p_aa - k_a * ph_a
+        hedge_ratio[t] = beta
+        intercept[t] = alpha
+
+    return HedgeRatios(hedge_ratio, intercept)
+
+
+def _lagged(values: np.ndarray) -> np.ndarray:
+    """Shifts an array by one row along axis 0, filling the first row with NaN."""
+    shifted = np.full_like(values, np.nan)
+    shifted[1:] = values[:-1]
+    return shifted
+
+
+@instrumented
+def hedged_pair_returns(asset1, asset2, hedge_ratio) -> np.ndarray:
+    """Computes the returns of a pair position long one unit of asset1 and short `hedge_ratio` units of asset2.
+
+    The position held over period t is set at the close of row t - 1 from that row's hedge ratio, so
+    the returns carry no look-ahead. Each period's profit is divided by the gross exposure
+    ``|asset1| + |hedge_ratio * asset2|`` at the start of the period.
+
+    Args:
+        asset1: Prices of the first asset, time along axis 0.
+        asset2: Prices of the second asset, same shape as `asset1`.
+        hedge_ratio: Hedge ratio of each row, broadcastable to the prices.
+
+    Returns:
+        NumPy array of period returns with the shape of the prices; NaN where no position is held
+        (the first row, hedge ratio warm-up and rows next to a missing price).
+
+    Raises:
+        ValueError: If the price arrays are empty or differ in shape.
+    """
+    y, x = _price_pair(asset1, asset2)
+    hedge = _lagged(np.broadcast_to(np.asarray(hedge_ratio, dtype='float64'), x.shape).copy())
+    profit = np.full_like(x, np.nan)
+    profit[1:] = np.diff(y, axis=0) - hedge[1:] * np.diff(x, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = profit / (np.abs(_lagged(y)) + np.abs(hedge * _lagged(x)))
+    return np.where(np.isfinite(returns), returns, np.nan)
+
+
+@instrumented
+def compute_pair_spreads(data: pd.DataFrame, method: str = 'rolling_ols', window: int = 60,
+                         zscore_window: Optional[int] = None, pair_column: Optional[str] = None,
+                         delta: float = 1e-4, observation_variance: float = 1e-3) -> pd.DataFrame:
+    """Computes hedge ratios, spreads, z-scores and hedged pair returns for one or many pairs.
+
+    Args:
+        data: Pandas DataFrame with 'asset1' and 'asset2' price columns in time order; with
+            pair_column, rows of several pairs in long format (time order within each pair).
+        method: 'rolling_ols' or 'kalman'.
+        window: Regression window of the rolling OLS estimate.
+        zscore_window: Rolling window of the spread z-score (default: `window`).
+        pair_column: Name of the pair identifier column for long-format input, or None for a single pair.
+        delta: Adaptation rate of the Kalman filter.
+        observation_variance: Observation noise variance of the Kalman filter.
+
+    Returns:
+        Pandas DataFrame indexed like `data` with columns 'hedge_ratio', 'intercept', 'spread'
+        (asset1 - intercept - hedge_ratio * asset2), 'zscore' and 'pair_returns'. The
+        'pair_returns' column is 0 where no position is held, so it can be assigned to `data` and
+        passed to `compare_to_benchmark` without resetting the curve.
+
+    Raises:
+        ValueError: If the input DataFrame is empty, the method is invalid or a window is out of range.
+        KeyError: If the required columns are missing.
+    """
+    if data.empty:
+        raise ValueError("Input DataFrame cannot be empty.")
+    for col in ['asset1', 'asset2'] + ([pair_column] if pair_column is not None else []):
+        if col not in data.columns:
+            raise KeyError(f"DataFrame must contain '{col}' column.")
+    if method not in ('rolling_ols', 'kalman'):
+        raise ValueError("Method must be 'rolling_ols' or 'kalman'.")
+    zscore_window = window if zscore_window is None else zscore_window
+    if zscore_window < 2:
+        raise ValueError("Z-score window must be at least 2.")
+
+    if pair_column is None:
+        asset1 = data['asset1'].to_numpy(dtype='float64', na_value=np.nan)
+        asset2 = data['asset2'].to_numpy(dtype='float64', na_value=np.nan)
     else:
-        raise ValueError("Invalid benchmark strategy. Supported strategies are 'static_weights' and 'rebalancing_window'.")
+        # Pairs become columns of NaN-padded (time, pairs) arrays; padding only follows a pair's
+        # last row, so it never enters the estimates that are kept.
+        _, lengths, panel = _long_to_panel(data, pair_column, ['asset1', 'asset2'])
+        codes = pd.factorize(data[pair_column], sort=False)[0]
+        positions = pd.Series(codes).groupby(codes, sort=False).cumcount().to_numpy()
+        asset1, asset2 = panel['asset1'].T, panel['asset2'].T
+
+    if method == 'rolling_ols':
+        estimates = rolling_ols_hedge_ratios(asset1, asset2, window)
+    else:
+        estimates = kalman_hedge_ratios(asset1, asset2, delta, observation_variance)
+
+    spread = asset1 - estimates.intercept - estimates.hedge_ratio * asset2
+    mean, std = _rolling_mean_std(spread, zscore_window, zscore_window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        zscore = (spread - mean) / std
+    columns = {
+        'hedge_ratio': estimates.hedge_ratio,
+        'intercept': estimates.intercept,
+        'spread': spread,
+        'zscore': np.where(np.isfinite(zscore), zscore, np.nan),
+        # compare_to_benchmark reports missing returns as a level of 1, so periods without a
+        # position are flat periods instead
+        'pair_returns': np.nan_to_num(hedged_pair_returns(asset1, asset2, estimates.hedge_ratio), nan=0.0),
+    }
+
+    if pair_column is not None:
+        columns = {name: values[positions, codes] for name, values in columns.items()}
+    return pd.DataFrame(columns, index=data.index)
+
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, NamedTuple, Optional, Sequence
+
+class TaskResult(NamedTuple):
+    """Outcome of one task of a `TaskGraph`.
+
+    Attributes:
+        name: Name of the task.
+        value: Return value of the task, or None if it failed or was skipped.
+        error: Exception raised by the task or by one of its dependencies, or None.
+        seconds: Wall time the task ran for (0 for skipped tasks).
+    """
+    name: str
+    value: Any
+    error: Optional[BaseException]
+    seconds: float
 
-    pair_portfolio_cumulative = (1 + data['pair_returns']).cumprod()
-    benchmark_cumulative = (1 + benchmark_returns).cumprod()
 
-    result_df = pd.DataFrame({
-        'pair_portfolio': pair_portfolio_cumulative,
-        'benchmark': benchmark_cumulative
-    })
+class TaskGraph:
+    """Runs named tasks on a thread pool, each as soon as the tasks it depends on have finished.
+
+    Independent tasks, such as loading data, building figures and computing benchmarks for
+    different tabs, run concurrently, and `run` yields every result as soon as it is ready, so a
+    caller can render each panel without waiting for the others. NumPy and pandas release the GIL
+    in their heavy kernels, which is where the concurrency pays off.
+
+    Args:
+        max_workers: Number of worker threads (default: chosen by ThreadPoolExecutor).
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers
+        self._tasks: Dict[str, tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def add(self, name: str, func: Callable, *args, depends_on: Sequence[str] = (), **kwargs) -> 'TaskGraph':
+        """Adds a task computing ``func(*dependency_results, *args, **kwargs)``.
+
+        The results of the `depends_on` tasks are passed first, in order. Dependencies must be added
+        before the tasks that use them, which also rules out cycles.
+
+        Args:
+            name: Unique name of the task.
+            func: Function to run.
+            *args: Further positional arguments of `func`.
+            depends_on: Names of the tasks whose results `func` receives.
+            **kwargs: Keyword arguments of `func`.
+
+        Returns:
+            The graph itself, so calls can be chained.
+
+        Raises:
+            ValueError: If the name is already taken.
+            KeyError: If a dependency has not been added.
+        """
+        if name in self._tasks:
+            raise ValueError(f"Task '{name}' already exists.")
+        for dependency in depends_on:
+            if dependency not in self._tasks:
+                raise KeyError(f"Unknown dependency '{dependency}' of task '{name}'.")
+        self._tasks[name] = (func, args, kwargs, tuple(depends_on))
+        return self
+
+    @staticmethod
+    def _call(func: Callable, args: tuple, kwargs: dict):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs), None, time.perf_counter() - start
+        except Exception as error:
+            return None, error, time.perf_counter() - start
+
+    def run(self) -> Iterator[TaskResult]:
+        """Runs the tasks and yields their results in completion order.
+
+        A failing task does not stop the others; its exception is reported in its TaskResult and in
+        those of the tasks depending on it, which are skipped.
+        """
+        pending = dict(self._tasks)
+        done: Dict[str, TaskResult] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            while pending or running:
+                # Submitting or skipping a task can unlock others, so scan until nothing changes.
+                ready = [name for name, task in pending.items() if all(d in done for d in task[3])]
+                while ready:
+                    for name in ready:
+                        func, args, kwargs, depends_on = pending.pop(name)
+                        failed = next((done[d] for d in depends_on if done[d].error is not None), None)
+                        if failed is not None:
+                            done[name] = TaskResult(name, None, failed.error, 0.0)
+                            yield done[name]
+                        else:
+                            inputs = tuple(done[d].value for d in depends_on) + args
+                            running[pool.submit(self._call, func, inputs, kwargs)] = name
+                    ready = [name for name, task in pending.items() if all(d in done for d in task[3])]
+
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    done[name] = TaskResult(name, *future.result())
+                    yield done[name]
+
+    def results(self) -> Dict[str, TaskResult]:
+        """Runs the tasks and returns all results keyed by task name."""
+        return {result.name: result for result in self.run()}
+
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+def _copy_on_write() -> bool:
+    """Whether pandas' Copy-on-Write is active (always from pandas 3.0, opt-in before)."""
+    return int(pd.__version__.split('.')[0]) >= 3 or pd.options.mode.copy_on_write is True
+
+
+def _read_only_view(value: Any) -> Any:
+    """Returns a view of a cached value that cannot modify the shared original.
+
+    NumPy arrays become non-writeable views. pandas objects are shallow copies when Copy-on-Write
+    is active, since writing to them then copies the data first; without it a shallow copy would
+    write into the shared frame, so they are deep copies (enable ``pd.options.mode.copy_on_write``
+    to share them without copying). Tuples, including NamedTuples such as BenchmarkCurves, are
+    converted element by element. Other objects are returned as they are and must be treated as
+    read-only.
+    """
+    if isinstance(value, np.ndarray):
+        view = value.view()
+        view.flags.writeable = False
+        return view
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=not _copy_on_write())
+    if isinstance(value, tuple):
+        items = [_read_only_view(item) for item in value]
+        return type(value)(*items) if hasattr(value, '_fields') else tuple(items)
+    return value
+
+
+def _object_nbytes(value: Any) -> int:
+    """Estimates the memory held by a cached value."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, tuple):
+        return sum(_object_nbytes(item) for item in value)
+    if hasattr(value, '__dict__'):
+        return sum(_object_nbytes(item) for item in vars(value).values()) or sys.getsizeof(value)
+    return sys.getsizeof(value)
+
+
+class _SharedEntry:
+    """Slot of a `SharedCache` value with its reference count and refresh state."""
+    __slots__ = ('loader', 'value', 'size', 'refs', 'loaded_at', 'stale', 'refreshing', 'ready', 'error')
+
+    def __init__(self, loader: Callable[[], Any]):
+        self.loader = loader
+        self.value = None
+        self.size = 0
+        self.refs = 0
+        self.loaded_at = 0.0
+        self.stale = False
+        self.refreshing = False
+        self.ready = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class SharedCache:
+    """Process-wide, thread-safe cache of datasets, filter indexes and benchmark results.
+
+    Meant to be created once per server process (e.g. with ``st.cache_resource``) and shared by all
+    sessions, so every value is loaded and held once however many sessions use it:
+
+    - Concurrent requests for a missing key wait for a single load instead of loading it again.
+    - Callers receive read-only views (see `_read_only_view`), never the shared object itself.
+    - `lease` pins a value while it is in use; when the cache exceeds `max_bytes`, only values with
+      no active lease are evicted, least recently used first. Values obtained with `get` are not
+      pinned: evicting one only drops the cache's reference (the caller's view stays valid, but is
+      no longer counted in `current_bytes`), so use `lease` for values held across a whole run.
+    - Invalidated or expired values keep being served while a background thread reloads them,
+      and are swapped in once the reload succeeds.
+
+    Args:
+        max_bytes: Memory budget of the unpinned values, in bytes.
+        ttl: Age in seconds after which a value is refreshed in the background, or None.
+
+    Attributes:
+        hits: Number of requests answered from the cache.
+        misses: Number of requests that loaded the value.
+        evictions: Number of values evicted to stay within `max_bytes`.
+        refreshes: Number of completed background reloads.
+    """
+
+    def __init__(self, max_bytes: int = 1024 ** 3, ttl: Optional[float] = None):
+        if max_bytes < 0:
+            raise ValueError("Maximum size in bytes cannot be negative.")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("TTL must be positive.")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self.current_bytes = 0
+        self._entries: "OrderedDict[Hashable, _SharedEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def _acquire(self, key: Hashable, loader: Callable[[], Any], pin: bool) -> Tuple[_SharedEntry, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            owner = entry is None
+            if owner:
+                entry = self._entries[key] = _SharedEntry(loader)
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            if pin:
+                entry.refs += 1
+        metrics.record_cache('shared_cache', not owner)
+
+        if owner:
+            try:
+                value = loader()
+            except Exception as error:
+                with self._lock:
+                    self._entries.pop(key, None)
+                entry.error = error
+                entry.ready.set()
+                raise
+            with self._lock:
+                self._store(entry, value)
+                entry.ready.set()
+                self._evict()
+        else:
+            entry.ready.wait()
+            if entry.error is not None:
+                raise entry.error
+
+        # The value is read before a refresh is started, so a stale request gets the value it saw.
+        value = entry.value
+        expired = self.ttl is not None and time.monotonic() - entry.loaded_at > self.ttl
+        if entry.stale or expired:
+            self._schedule_refresh(key, entry)
+        return entry, value
+
+    def _store(self, entry: _SharedEntry, value: Any) -> None:
+        size = _object_nbytes(value)
+        self.current_bytes += size - entry.size
+        entry.value, entry.size = value, size
+        entry.loaded_at = time.monotonic()
+        entry.stale = False
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Returns a read-only view of the value of `key`, calling `loader()` to load it if it is missing.
+
+        Args:
+            key: Hashable key identifying the value, e.g. ('pairs', num_rows, seed).
+            loader: Function without arguments that produces the value; it is also used for refreshes.
+
+        Returns:
+            A read-only view of the cached value. The value is not pinned and may be evicted while
+            the view is still in use; see `lease`.
+
+        Raises:
+            Exception: Whatever `loader` raises; failed loads are not cached.
+        """
+        return _read_only_view(self._acquire(key, loader, pin=False)[1])
+
+    @contextmanager
+    def lease(self, key: Hashable, loader: Callable[[], Any]) -> Iterator[Any]:
+        """Context manager yielding a read-only view of a value that stays pinned until the block exits.
+
+        Arguments and errors are the same as for `get`.
+        """
+        entry, value = self._acquire(key, loader, pin=True)
+        try:
+            yield _read_only_view(value)
+        finally:
+            with self._lock:
+                entry.refs -= 1
+                self._evict()
+
+    def _evict(self) -> None:
+        """Evicts unpinned values, least recently used first, until the cache fits `max_bytes`."""
+        for key in list(self._entries):
+            if self.current_bytes <= self.max_bytes:
+                break
+            entry = self._entries[key]
+            if entry.refs == 0 and entry.ready.is_set():
+                del self._entries[key]
+                self.current_bytes -= entry.size
+                self.evictions += 1
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Marks one value (or all values) as outdated; they are reloaded in the background on their next request."""
+        with self._lock:
+            entries = self._entries.values() if key is None else [self._entries[key]] if key in self._entries else []
+            for entry in entries:
+                entry.stale = True
+
+    def _schedule_refresh(self, key: Hashable, entry: _SharedEntry) -> None:
+        with self._lock:
+            if entry.refreshing:
+                return
+            entry.refreshing = True
+        thread = threading.Thread(target=self._refresh, args=(key, entry), name=f'SharedCache refresh {key!r}', daemon=True)
+        self._threads.add(thread)
+        thread.start()
+
+    def _refresh(self, key: Hashable, entry: _SharedEntry) -> None:
+        try:
+            value = entry.loader()
+        except Exception:
+            value = None
+            failed = True
+        else:
+            failed = False
+        with self._lock:
+            # Views handed out earlier keep the previous value alive; the entry simply points to the new one.
+            if not failed and self._entries.get(key) is entry:
+                self._store(entry, value)
+                self.refreshes += 1
+                self._evict()
+            entry.refreshing = False
+            self._threads.discard(threading.current_thread())
+
+    def wait_for_refreshes(self, timeout: Optional[float] = None) -> None:
+        """Blocks until the background reloads started so far have finished."""
+        for thread in list(self._threads):
+            thread.join(timeout)
+
+    def clear(self) -> None:
+        """Removes all values that are neither pinned by a lease nor still loading."""
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.refs == 0 and entry.ready.is_set():
+                    del self._entries[key]
+                    self.current_bytes -= entry.size
 
-    return result_df.fillna(1)
+
+import pandas as pd
+import numpy as np
+from typing import Optional, Sequence, Union
+
+@instrumented
+def screen_universe(data: pd.DataFrame, selectivity_level: Union[int, float], asset_classes: Optional[Sequence[str]] = None,
+                    signal_types: Optional[Sequence[str]] = None, index: Optional[FilterIndex] = None,
+                    max_workers: Optional[int] = None) -> pd.DataFrame:
+    """Runs `filter_data` for every combination of asset class and signal type and stacks the results.
+
+    For a DataFrame a FilterIndex is built once (unless given) and shared by all combinations; for a
+    PartitionedDataset each combination reads only its own partition, and the reads run concurrently
+    on a `TaskGraph`.
+
+    Args:
+        data: Pandas DataFrame containing the dataset, or a PartitionedDataset to query on disk.
+        selectivity_level: The selectivity level (percentage of top-performing pairs, between 0 and 1 inclusive).
+        asset_classes: Asset classes to screen (default: `ASSET_CLASSES`).
+        signal_types: Signal types to screen (default: `SIGNAL_TYPES`).
+        index: Optional FilterIndex built over `data`.
+        max_workers: Number of threads screening combinations concurrently.
+
+    Returns:
+        Pandas DataFrame with the rows selected for every combination, in combination order and
+        keeping their original index.
+
+    Raises:
+        TypeError: If data is neither a DataFrame nor a PartitionedDataset.
+        ValueError: If the selectivity level is out of range.
+        KeyError: If required columns are missing.
+    """
+    if not isinstance(data, (pd.DataFrame, PartitionedDataset)):
+        raise TypeError("Data must be a Pandas DataFrame or a PartitionedDataset.")
+    combinations = [(asset_class, signal_type)
+                    for asset_class in (ASSET_CLASSES if asset_classes is None else asset_classes)
+                    for signal_type in (SIGNAL_TYPES if signal_types is None else signal_types)]
+    for asset_class, signal_type in combinations:
+        _validate_filter_arguments(asset_class, signal_type, selectivity_level)
+    if isinstance(data, pd.DataFrame) and index is None and not data.empty:
+        index = FilterIndex(data)
+
+    graph = TaskGraph(max_workers)
+    for combination in combinations:
+        graph.add(combination, filter_data, data, *combination, selectivity_level, index=index)
+    results = graph.results()
+
+    frames = []
+    for combination in combinations:
+        if results[combination].error is not None:
+            raise results[combination].error
+        frames.append(results[combination].value)
+    if not frames:
+        return data.iloc[:0] if isinstance(data, pd.DataFrame) else pd.DataFrame(columns=data.columns)
+    return pd.concat(frames)
+
+
+@instrumented
+def summarize_pair_curves(curves: pd.DataFrame, pair_column: str = 'pair_id', periods_per_year: int = 252,
+                          risk_free_rate: float = 0.0) -> pd.DataFrame:
+    """Summarizes the pair-portfolio and benchmark curves of many pairs with annualized Sharpe ratios.
+
+    Period returns are recovered from the cumulative curves of `compare_to_benchmark_parallel` or
+    ``compare_to_benchmark_batch(...).to_frame()`` (which start from a value of 1) and reduced per
+    pair in one vectorized pass. Each pair's rows are put in index order first, so the curves may
+    arrive in any row order.
+
+    Args:
+        curves: Long-format DataFrame with columns pair_column, 'pair_portfolio' and 'benchmark',
+            indexed in time order within each pair (as the curve functions return them).
+        pair_column: Name of the pair identifier column.
+        periods_per_year: Number of periods per year used to annualize returns and volatilities.
+        risk_free_rate: Annual risk-free rate (as a decimal).
+
+    Returns:
+        Pandas DataFrame with one row per pair (in order of first appearance) and columns pair_column,
+        'observations', 'total_return', 'benchmark_total_return', 'excess_return', 'sharpe_ratio'
+        and 'benchmark_sharpe_ratio'. Sharpe ratios of pairs with fewer than two observations or
+        zero volatility are NaN.
+
+    Raises:
+        TypeError: If curves is not a Pandas DataFrame.
+        KeyError: If required columns are missing.
+        ValueError: If curves is empty, a pair identifier is missing or periods_per_year is not positive.
+    """
+    if not isinstance(curves, pd.DataFrame):
+        raise TypeError("Curves must be a Pandas DataFrame.")
+    for col in [pair_column, 'pair_portfolio', 'benchmark']:
+        if col not in curves.columns:
+            raise KeyError(f"DataFrame must contain '{col}' column.")
+    if curves.empty:
+        raise ValueError("Input DataFrame cannot be empty.")
+    if periods_per_year <= 0:
+        raise ValueError("Periods per year must be positive.")
+
+    codes, pair_ids = pd.factorize(curves[pair_column], sort=False)
+    if (codes < 0).any():
+        raise ValueError(f"Column '{pair_column}' cannot contain missing pair identifiers.")
+    time_rank = np.empty(len(curves), dtype=np.intp)
+    time_rank[curves.index.argsort(kind='stable')] = np.arange(len(curves))
+    order = np.lexsort((time_rank, codes))
+    codes = codes[order]
+    num_pairs = len(pair_ids)
+    lengths = np.bincount(codes, minlength=num_pairs)
+    starts = np.r_[0, np.cumsum(lengths)[:-1]]
+
+    summary = {pair_column: np.asarray(pair_ids), 'observations': lengths}
+    for col, prefix in [('pair_portfolio', ''), ('benchmark', 'benchmark_')]:
+        values = curves[col].to_numpy(dtype='float64', na_value=np.nan)[order]
+        previous = np.roll(values, 1)
+        previous[starts] = 1.0
+        returns = values / previous - 1
+
+        mean = np.bincount(codes, returns, num_pairs) / lengths
+        squares = np.bincount(codes, (returns - mean[codes]) ** 2, num_pairs)
+        variance = np.divide(squares, lengths - 1, out=np.full(num_pairs, np.nan), where=lengths > 1)
+
+        summary[f'{prefix}total_return'] = values[starts + lengths - 1] - 1
+        summary[f'{prefix}sharpe_ratio'] = calculate_sharpe_ratios(mean * periods_per_year, risk_free_rate,
+                                                                    np.sqrt(variance * periods_per_year))
+
+    result = pd.DataFrame(summary)
+    result['excess_return'] = result['total_return'] - result['benchmark_total_return']
+    return result[[pair_column, 'observations', 'total_return', 'benchmark_total_return', 'excess_return',
+                   'sharpe_ratio', 'benchmark_sharpe_ratio']]
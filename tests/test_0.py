@@ -1,5 +1,8 @@
 import pytest
-from definition_173b2fe2462d498f812798d5d1ffb289 import load_data
+from definition_173b2fe2462d498f812798d5d1ffb289 import (load_data, load_data_chunks, TaskGraph, normalize_pair_schema,
+                                                     metrics, enable_instrumentation, disable_instrumentation)
+import threading
+import numpy as np
 import pandas as pd
 
 def test_load_data_returns_dataframe():
@@ -51,3 +54,122 @@ def test_load_data_handles_errors():
          load_data()
      except Exception as e:
          assert False, f"load_data raised an exception: {e}"
+
+
+def test_load_data_num_rows_and_seed():
+    """Test that the row count is configurable and a seed makes the data reproducible."""
+    first = load_data(1000, seed=42)
+    second = load_data(1000, seed=42)
+    assert len(first) == 1000
+    pd.testing.assert_frame_equal(first, second)
+    assert not first.equals(load_data(1000, seed=43))
+
+def test_load_data_compact_dtypes():
+    """Test that compact mode uses small integer and float dtypes."""
+    result = load_data(500, seed=0, compact=True)
+    assert result['feature1'].dtype == 'int8'
+    assert result['feature2'].dtype == 'float32'
+    assert result['target'].dtype == 'int8'
+
+def test_load_data_pairs_schema():
+    """Test that the pair-universe schema has the columns the other functions expect."""
+    result = load_data(600, seed=0, schema='pairs', periods_per_pair=100)
+    for col in ['pair_id', 'asset_class', 'signal_type', 'pair_performance', 'asset1', 'asset2', 'pair_returns']:
+        assert col in result.columns, f"Expected column '{col}' is missing."
+    assert result['pair_id'].nunique() == 6
+    assert (result.groupby('pair_id')['asset_class'].nunique() == 1).all()
+    assert result.isnull().sum().sum() == 0
+
+def test_load_data_chunks_concatenate_to_single_load():
+    """Test that chunked generation matches a single load with the same seed."""
+    chunks = list(load_data_chunks(1000, chunk_size=1000, seed=7, schema='pairs', periods_per_pair=50))
+    pd.testing.assert_frame_equal(chunks[0], load_data(1000, seed=7, schema='pairs', periods_per_pair=50))
+
+def test_load_data_chunks_sizes_and_continuity():
+    """Test chunk sizes, the continuing index and price paths across chunk boundaries."""
+    chunks = list(load_data_chunks(1000, chunk_size=300, seed=1, schema='pairs', periods_per_pair=250))
+    assert [len(chunk) for chunk in chunks] == [300, 300, 300, 100]
+    result = pd.concat(chunks)
+    assert result.index.equals(pd.RangeIndex(1000))
+    assert (result.groupby('pair_id')['pair_performance'].nunique() == 1).all()
+    log_returns = np.log(result['asset1']).diff()[result['pair_id'].diff() == 0]
+    assert log_returns.abs().max() < 0.1
+
+def test_load_data_chunks_instrumentation_covers_each_chunk():
+    """Test that chunk generation, not the creation of the generator, is recorded."""
+    metrics.reset()
+    enable_instrumentation()
+    try:
+        chunks = load_data_chunks(1000, chunk_size=300, seed=1, schema='pairs')
+        assert 'load_data_chunks' not in metrics.snapshot()
+        list(chunks)
+        stats = metrics.snapshot()['load_data_chunks']
+    finally:
+        disable_instrumentation()
+        metrics.reset()
+    assert stats['calls'] == 4
+    assert stats['rows'] == 1000
+
+@pytest.mark.parametrize("kwargs, error", [
+    ({'num_rows': -1}, ValueError),
+    ({'num_rows': 1.5}, TypeError),
+    ({'schema': 'unknown'}, ValueError),
+])
+def test_load_data_invalid_arguments(kwargs, error):
+    with pytest.raises(error):
+        load_data(**kwargs)
+
+def test_task_graph_runs_independent_tasks_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+    graph = TaskGraph(max_workers=2)
+    graph.add('data', load_data, 500, seed=0, schema='pairs')
+    graph.add('left', lambda data: barrier.wait() is not None and len(data), depends_on=['data'])
+    graph.add('right', lambda data: barrier.wait() is not None and data['pair_id'].nunique(), depends_on=['data'])
+    graph.add('total', lambda left, right: (left, right), depends_on=['left', 'right'])
+    order = [result.name for result in graph.run()]
+    assert order[0] == 'data' and order[-1] == 'total'
+    assert graph.results()['total'].value == (500, 2)
+
+def test_task_graph_propagates_failures():
+    graph = TaskGraph()
+    graph.add('bad', lambda: 1 / 0)
+    graph.add('dependent', lambda value: value, depends_on=['bad'])
+    graph.add('independent', lambda: 'ok')
+    results = graph.results()
+    assert isinstance(results['dependent'].error, ZeroDivisionError)
+    assert results['independent'].value == 'ok'
+    with pytest.raises(KeyError):
+        graph.add('orphan', len, depends_on=['missing'])
+    with pytest.raises(ValueError):
+        graph.add('bad', len)
+
+def test_normalize_pair_schema_matches_compact_load():
+    """Test that normalizing the wide pair universe gives the compact layout of load_data."""
+    wide = load_data(600, seed=3, schema='pairs', periods_per_pair=100)
+    compact = load_data(600, seed=3, compact=True, schema='pairs', periods_per_pair=100)
+    result = normalize_pair_schema(wide, required=['asset_class', 'pair_performance'])
+    assert dict(result.dtypes) == dict(compact.dtypes)
+    assert list(result['asset_class'].cat.categories) == list(compact['asset_class'].cat.categories)
+    pd.testing.assert_frame_equal(result, compact, rtol=1e-6)
+    assert not isinstance(wide['asset_class'].dtype, pd.CategoricalDtype), "The input must not be modified."
+    assert normalize_pair_schema(compact) is compact
+
+def test_normalize_pair_schema_keeps_imprecise_floats_and_shares_categories():
+    """Test the float32 round-trip check and dictionaries shared between chunks."""
+    data = pd.DataFrame({'asset_class': ['Equity', 'Crypto'], 'Pair': ['b', 'a'],
+                         'pair_performance': [0.1, 1e-50], 'pair_id': [1, 2 ** 40]})
+    result = normalize_pair_schema(data)
+    assert list(result['asset_class'].cat.categories) == ['Equity', 'Fixed Income', 'Commodity', 'FX', 'Crypto']
+    assert result['pair_performance'].dtype == 'float64'
+    assert result['pair_id'].dtype == 'int64'
+    chunk = normalize_pair_schema(data.iloc[:1], categories={'Pair': result['Pair'].cat.categories})
+    assert pd.concat([result, chunk])['Pair'].dtype == result['Pair'].dtype
+
+@pytest.mark.parametrize("data, error", [
+    (pd.DataFrame({'signal_type': ['Value', 'Carry'], 'asset_class': [1, 2]}), TypeError),
+    (pd.DataFrame({'signal_type': ['Value', 'Carry'], 'pair_performance': ['high', 'low']}), TypeError),
+    (pd.DataFrame({'asset_class': ['Equity']}), KeyError),
+])
+def test_normalize_pair_schema_invalid_input(data, error):
+    with pytest.raises(error):
+        normalize_pair_schema(data, required=['signal_type'])
@@ -1,6 +1,11 @@
 import pytest
+import numpy as np
 import pandas as pd
-from definition_c583382de86a464f92de10349df9dd46 import filter_data
+from definition_c583382de86a464f92de10349df9dd46 import (filter_data, FilterIndex, FilterCache, dataset_fingerprint,
+                                                     PartitionedDataset, write_partitioned_dataset, metrics,
+                                                     enable_instrumentation, disable_instrumentation, SharedCache,
+                                                     screen_universe)
+import threading
 
 # Mock DataFrame for testing
 @pytest.fixture
@@ -81,3 +86,273 @@ def test_filter_data_no_pair_performance_column(sample_data):
     df = pd.DataFrame(data)
     with pytest.raises(KeyError):
         filter_data(df, 'Equity', 'Momentum', 0.5)
+
+@pytest.mark.parametrize("selectivity_level", [0.01, 0.25, 0.5, 0.95, 1.0])
+def test_filter_data_matches_full_sort_ordering(selectivity_level):
+    rng = np.random.default_rng(0)
+    n = 5000
+    df = pd.DataFrame({'asset_class': rng.choice(['Equity', 'equity', 'Fixed Income'], n),
+                       'signal_type': rng.choice(['Momentum', 'Value'], n),
+                       'pair_performance': rng.integers(0, 40, n).astype(float)})
+    df.loc[rng.choice(n, 200, replace=False), 'pair_performance'] = np.nan
+
+    expected = df[df['asset_class'].str.lower() == 'equity']
+    expected = expected[expected['signal_type'].str.lower() == 'momentum']
+    expected = expected.sort_values(by='pair_performance', ascending=False, kind='stable')
+    expected = expected.head(int(len(expected) * selectivity_level))
+
+    filtered_data = filter_data(df, 'Equity', 'Momentum', selectivity_level)
+    pd.testing.assert_frame_equal(filtered_data, expected)
+
+def test_filter_data_does_not_modify_input(sample_data):
+    original = sample_data.copy()
+    filter_data(sample_data, 'Equity', 'Momentum', 1.0)
+    pd.testing.assert_frame_equal(sample_data, original)
+
+@pytest.mark.parametrize("asset_class, signal_type", [('EQUITY', 'momentum'), ('fixed income', 'Carry'), ('Commodity', 'Value')])
+@pytest.mark.parametrize("selectivity_level", [0.0, 0.3, 1.0])
+def test_filter_data_with_index_matches_scan(asset_class, signal_type, selectivity_level):
+    rng = np.random.default_rng(1)
+    n = 2000
+    df = pd.DataFrame({'asset_class': rng.choice(['Equity', 'equity', 'Fixed Income', None], n),
+                       'signal_type': rng.choice(['Momentum', 'Value', 'Carry'], n),
+                       'pair_performance': rng.integers(0, 30, n).astype(float)})
+    df.loc[rng.choice(n, 100, replace=False), 'pair_performance'] = np.nan
+    index = FilterIndex(df)
+
+    expected = filter_data(df, asset_class, signal_type, selectivity_level)
+    pd.testing.assert_frame_equal(filter_data(df, asset_class, signal_type, selectivity_level, index=index), expected)
+
+def test_filter_index_groups(sample_data):
+    index = FilterIndex(sample_data)
+    assert set(index.groups) == {('equity', 'momentum'), ('equity', 'value'), ('fixed income', 'carry'),
+                                 ('fixed income', 'momentum'), ('equity', 'growth')}
+    assert list(index.positions('Fixed Income', 'Momentum')) == [3]
+    assert len(index.positions('Commodity', 'Momentum')) == 0
+
+def test_filter_data_index_for_other_data(sample_data):
+    index = FilterIndex(sample_data.iloc[:3])
+    with pytest.raises(ValueError):
+        filter_data(sample_data, 'Equity', 'Momentum', 0.5, index=index)
+
+def test_filter_data_index_without_pair_performance(sample_data):
+    df = sample_data.drop(columns='pair_performance')
+    with pytest.raises(KeyError):
+        filter_data(df, 'Equity', 'Momentum', 0.5, index=FilterIndex(df))
+
+def test_filter_cache_hits_on_repeated_calls(sample_data):
+    cache = FilterCache()
+    first = cache.filter_data(sample_data, 'Equity', 'Momentum', 1.0)
+    second = cache.filter_data(sample_data, 'equity', 'MOMENTUM', 1)
+    assert second is first
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+    pd.testing.assert_frame_equal(first, filter_data(sample_data, 'Equity', 'Momentum', 1.0))
+
+def test_filter_cache_keys_on_content(sample_data):
+    cache = FilterCache()
+    cache.filter_data(sample_data, 'Equity', 'Momentum', 1.0)
+    cache.filter_data(sample_data.copy(), 'Equity', 'Momentum', 1.0)
+    assert cache.hits == 1
+
+    changed = sample_data.copy()
+    changed.loc[0, 'pair_performance'] = 0.9
+    cache.filter_data(changed, 'Equity', 'Momentum', 1.0)
+    assert cache.misses == 2
+    assert dataset_fingerprint(changed) != dataset_fingerprint(sample_data)
+
+def test_filter_cache_lru_eviction(sample_data):
+    cache = FilterCache(max_entries=2)
+    cache.filter_data(sample_data, 'Equity', 'Momentum', 1.0)
+    cache.filter_data(sample_data, 'Equity', 'Value', 1.0)
+    cache.filter_data(sample_data, 'Equity', 'Momentum', 1.0)
+    cache.filter_data(sample_data, 'Equity', 'Growth', 1.0)
+    assert len(cache) == 2
+    cache.filter_data(sample_data, 'Equity', 'Momentum', 1.0)
+    assert cache.hits == 2
+    cache.filter_data(sample_data, 'Equity', 'Value', 1.0)
+    assert cache.misses == 4
+
+def test_filter_cache_byte_limit(sample_data):
+    cache = FilterCache(max_bytes=0)
+    cache.filter_data(sample_data, 'Equity', 'Momentum', 1.0)
+    assert len(cache) == 0
+    assert cache.stats()['bytes'] == 0
+
+def test_filter_cache_does_not_cache_errors(sample_data):
+    cache = FilterCache()
+    with pytest.raises(ValueError):
+        cache.filter_data(sample_data, 'Equity', 'Momentum', 1.5)
+    with pytest.raises(TypeError):
+        cache.filter_data(sample_data, 123, 'Momentum', 0.5)
+    assert len(cache) == 0
+
+@pytest.fixture
+def stored_dataset(tmp_path):
+    pytest.importorskip("pyarrow")
+    rng = np.random.default_rng(2)
+    n = 3000
+    df = pd.DataFrame({'pair_id': np.arange(n),
+                       'asset_class': rng.choice(['Equity', 'equity', 'Fixed Income'], n),
+                       'signal_type': rng.choice(['Momentum', 'Value'], n),
+                       'pair_performance': rng.integers(0, 25, n).astype(float)})
+    path = str(tmp_path / 'universe')
+    assert write_partitioned_dataset([df.iloc[:1000], df.iloc[1000:]], path) == n
+    return df, PartitionedDataset(path)
+
+@pytest.mark.parametrize("selectivity_level", [0.0, 0.4, 1.0])
+def test_partitioned_dataset_filter_matches_in_memory(stored_dataset, selectivity_level):
+    df, store = stored_dataset
+    expected = filter_data(df, 'EQUITY', 'momentum', selectivity_level)
+    pd.testing.assert_frame_equal(filter_data(store, 'EQUITY', 'momentum', selectivity_level), expected,
+                                  check_dtype=False, check_index_type=False)
+
+def test_partitioned_dataset_reads_only_matching_partitions(stored_dataset):
+    df, store = stored_dataset
+    assert len(store.partitions()) == 6
+    result = store.read('fixed income', 'value', columns=['pair_id'])
+    assert list(result.columns) == ['pair_id']
+    expected = df[(df['asset_class'] == 'Fixed Income') & (df['signal_type'] == 'Value')]
+    assert list(result['pair_id']) == list(expected['pair_id'])
+
+def test_partitioned_dataset_column_projection(stored_dataset):
+    _, store = stored_dataset
+    result = store.filter_data('Equity', 'Value', 0.5, columns=['pair_id'])
+    assert list(result.columns) == ['pair_id']
+    with pytest.raises(KeyError):
+        store.read(columns=['missing'])
+
+def test_write_partitioned_dataset_refuses_existing_directory(stored_dataset):
+    df, store = stored_dataset
+    with pytest.raises(FileExistsError):
+        write_partitioned_dataset(df, store.path)
+    assert write_partitioned_dataset(df.iloc[:10], store.path, overwrite=True) == 10
+
+@pytest.fixture
+def instrumentation():
+    metrics.reset()
+    yield metrics
+    disable_instrumentation()
+    metrics.reset()
+
+def test_instrumentation_disabled_by_default(sample_data, instrumentation):
+    filter_data(sample_data, 'Equity', 'Momentum', 0.5)
+    assert instrumentation.snapshot() == {}
+
+def test_instrumentation_records_calls_and_rows(sample_data, instrumentation):
+    enable_instrumentation(track_memory=True)
+    filter_data(sample_data, 'Equity', 'Momentum', 0.5)
+    filter_data(sample_data, 'Equity', 'Momentum', 0.5)
+    stats = instrumentation.snapshot()['filter_data']
+    assert stats['calls'] == 2
+    assert stats['rows'] == 2 * len(sample_data)
+    assert stats['max_seconds'] <= stats['total_seconds']
+    assert stats['peak_bytes'] > 0
+
+def test_instrumentation_records_partitioned_filter_once(stored_dataset, instrumentation):
+    df, store = stored_dataset
+    enable_instrumentation()
+    result = filter_data(store, 'Equity', 'Momentum', 0.5)
+    stats = instrumentation.snapshot()['filter_data']
+    assert stats['calls'] == 1
+    assert stats['rows'] == len(result)
+    store.filter_data('Equity', 'Momentum', 0.5)
+    assert instrumentation.snapshot()['filter_data']['calls'] == 2
+
+def test_instrumentation_records_cache_hits(sample_data, instrumentation):
+    enable_instrumentation()
+    cache = FilterCache()
+    cache.filter_data(sample_data, 'Equity', 'Momentum', 0.5)
+    cache.filter_data(sample_data, 'Equity', 'Momentum', 0.5)
+    stats = instrumentation.snapshot()['filter_data']
+    assert (stats['cache_hits'], stats['cache_misses']) == (1, 1)
+
+def test_instrumentation_dumps_slow_profiles(sample_data, instrumentation, tmp_path):
+    enable_instrumentation(profile_threshold=0.0, profile_dir=str(tmp_path))
+    filter_data(sample_data, 'Equity', 'Momentum', 0.5)
+    assert instrumentation.snapshot()['filter_data']['profiles'] == 1
+    assert len(list(tmp_path.glob('filter_data-*.prof'))) == 1
+    with pytest.raises(ValueError):
+        enable_instrumentation(profiler='perf')
+
+def test_shared_cache_loads_once_for_concurrent_sessions(sample_data):
+    cache = SharedCache()
+    calls = []
+    started = threading.Event()
+
+    def loader():
+        calls.append(1)
+        started.wait(5)
+        return sample_data
+
+    results = []
+    sessions = [threading.Thread(target=lambda: results.append(cache.get('data', loader))) for _ in range(4)]
+    for session in sessions:
+        session.start()
+    started.set()
+    for session in sessions:
+        session.join()
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (3, 1)
+    assert all(result.equals(sample_data) for result in results)
+
+def test_shared_cache_hands_out_read_only_views(sample_data):
+    cache = SharedCache()
+    view = cache.get('data', lambda: sample_data.copy())
+    view.loc[0, 'pair_performance'] = -1.0
+    assert cache.get('data', lambda: None).loc[0, 'pair_performance'] == 0.1
+    with pd.option_context('mode.copy_on_write', True):
+        view = cache.get('data', lambda: None)
+        view.loc[1, 'pair_performance'] = -1.0
+        assert cache.get('data', lambda: None).loc[1, 'pair_performance'] == 0.2
+    array = cache.get('array', lambda: np.arange(3))
+    with pytest.raises(ValueError):
+        array[0] = 5
+
+def test_shared_cache_evicts_only_unpinned_entries():
+    cache = SharedCache(max_bytes=100_000)
+    with cache.lease('pinned', lambda: np.zeros(10_000)):
+        cache.get('other', lambda: np.zeros(10_000))
+        assert 'pinned' in cache and 'other' not in cache
+    cache.get('third', lambda: np.zeros(5_000))
+    assert 'pinned' not in cache and 'third' in cache
+    assert cache.evictions == 2
+
+def test_shared_cache_refreshes_invalidated_entries_in_background():
+    cache = SharedCache()
+    versions = iter(range(10))
+    assert cache.get('data', lambda: next(versions)) == 0
+    cache.invalidate('data')
+    assert cache.get('data', lambda: next(versions)) == 0     # served stale while reloading
+    cache.wait_for_refreshes(5)
+    assert cache.get('data', lambda: next(versions)) == 1
+    assert cache.refreshes == 1
+
+def test_screen_universe_matches_filter_data_per_combination(sample_data):
+    result = screen_universe(sample_data, 0.5, asset_classes=['Equity', 'Fixed Income'],
+                             signal_types=['Momentum', 'Carry'], max_workers=2)
+    expected = pd.concat([filter_data(sample_data, asset_class, signal_type, 0.5)
+                          for asset_class in ['Equity', 'Fixed Income'] for signal_type in ['Momentum', 'Carry']])
+    pd.testing.assert_frame_equal(result, expected)
+    assert screen_universe(sample_data, 1, asset_classes=[]).empty
+
+def test_screen_universe_reads_partitioned_dataset(stored_dataset):
+    df, dataset = stored_dataset
+    result = screen_universe(dataset, 0.3, asset_classes=['Equity'], signal_types=['Momentum', 'Value'])
+    expected = screen_universe(df, 0.3, asset_classes=['Equity'], signal_types=['Momentum', 'Value'])
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False, check_index_type=False)
+
+def test_screen_universe_invalid_input(sample_data):
+    with pytest.raises(TypeError):
+        screen_universe(sample_data.to_dict(), 0.5)
+    with pytest.raises(ValueError):
+        screen_universe(sample_data, 1.5)
+
+def test_filter_data_preserves_categorical_columns(sample_data):
+    compact = sample_data.astype({'asset_class': 'category', 'signal_type': 'category', 'pair_performance': 'float32'})
+    for index in [None, FilterIndex(compact)]:
+        result = filter_data(compact, 'EQUITY', 'momentum', 1, index=index)
+        assert result['asset_class'].dtype == compact['asset_class'].dtype
+        assert result['pair_performance'].dtype == 'float32'
+        pd.testing.assert_frame_equal(result.astype({'asset_class': object, 'signal_type': object}),
+                                      filter_data(sample_data, 'Equity', 'Momentum', 1), check_dtype=False)
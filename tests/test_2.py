@@ -1,5 +1,7 @@
 import pytest
-from definition_40601a87688f499da1ab9afe2c25af8d import calculate_sharpe_ratio
+import numpy as np
+import pandas as pd
+from definition_40601a87688f499da1ab9afe2c25af8d import calculate_sharpe_ratio, calculate_sharpe_ratios
 
 @pytest.mark.parametrize("returns, risk_free_rate, std_dev, expected", [
     (0.10, 0.02, 0.05, 1.6),
@@ -38,3 +40,56 @@ def test_calculate_sharpe_ratio(returns, risk_free_rate, std_dev, expected):
             assert round(result, 5) == round(expected, 5)
         except Exception as e:
             raise e
+
+
+def test_calculate_sharpe_ratios_matches_scalar():
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0.05, 0.02, (50, 4))
+    std_dev = rng.uniform(0.01, 0.2, (50, 4))
+    result = calculate_sharpe_ratios(returns, 0.02, std_dev)
+    assert result.shape == (50, 4)
+    assert result[3, 2] == pytest.approx(calculate_sharpe_ratio(float(returns[3, 2]), 0.02, float(std_dev[3, 2])))
+
+def test_calculate_sharpe_ratios_broadcasts_risk_free_column():
+    returns = np.array([[0.10, 0.15], [0.08, 0.05]])
+    risk_free_rate = np.array([[0.02], [0.03]])
+    result = calculate_sharpe_ratios(returns, risk_free_rate, 0.05)
+    np.testing.assert_allclose(result, [[1.6, 2.6], [1.0, 0.4]])
+
+def test_calculate_sharpe_ratios_masks_zero_std_dev():
+    result = calculate_sharpe_ratios(np.array([0.10, 0.10, 0.10]), 0.02, np.array([0.05, 0.0, 0.04]))
+    np.testing.assert_allclose(result[[0, 2]], [1.6, 2.0])
+    assert np.isnan(result[1])
+
+def test_calculate_sharpe_ratios_preserves_pandas_labels():
+    returns = pd.DataFrame({'pair1': [0.10, 0.08], 'pair2': [0.15, 0.05]}, index=['2024-01', '2024-02'])
+    result = calculate_sharpe_ratios(returns, np.array([[0.02], [0.03]]), 0.05)
+    assert isinstance(result, pd.DataFrame)
+    assert list(result.columns) == ['pair1', 'pair2']
+    assert list(result.index) == ['2024-01', '2024-02']
+
+def test_calculate_sharpe_ratios_aligns_pandas_labels():
+    returns = pd.Series([0.10, 0.20, 0.30], index=['a', 'b', 'c'])
+    std_dev = pd.Series([0.10, 0.05, 0.02], index=['c', 'a', 'b'])
+    result = calculate_sharpe_ratios(returns, 0.0, std_dev)
+    assert list(result.index) == ['a', 'b', 'c']
+    np.testing.assert_allclose(result, [2.0, 10.0, 3.0])
+
+    frame = pd.DataFrame({'pair1': [0.10, 0.08], 'pair2': [0.15, 0.05]}, index=['2024-01', '2024-02'])
+    result = calculate_sharpe_ratios(frame, 0.0, pd.Series([0.05, 0.10], index=['pair2', 'pair1']))
+    np.testing.assert_allclose(result[['pair1', 'pair2']], [[1.0, 3.0], [0.8, 1.0]])
+    result = calculate_sharpe_ratios(frame, 0.0, frame.iloc[::-1, ::-1] * 2)
+    np.testing.assert_allclose(result.loc[frame.index, frame.columns], 0.5)
+
+    result = calculate_sharpe_ratios(returns, 0.0, std_dev.drop('a'))
+    assert np.isnan(result['a'])
+    with pytest.raises(ValueError):
+        calculate_sharpe_ratios(returns, 0.0, pd.Series([0.1, 0.1], index=['a', 'a']))
+
+@pytest.mark.parametrize("returns, risk_free_rate, std_dev", [
+    (np.array(['a', 'b']), 0.02, 0.05),
+    (np.array([0.1, 0.2]), None, 0.05),
+])
+def test_calculate_sharpe_ratios_type_errors(returns, risk_free_rate, std_dev):
+    with pytest.raises(TypeError):
+        calculate_sharpe_ratios(returns, risk_free_rate, std_dev)
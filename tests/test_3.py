@@ -1,7 +1,8 @@
 import pytest
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
-from definition_882361b862964d70bbfc44c68eb58e9d import generate_line_chart
+from definition_882361b862964d70bbfc44c68eb58e9d import generate_line_chart, calculate_performance_metrics, FigureCache
 
 @pytest.fixture
 def sample_data():
@@ -85,4 +86,119 @@ def test_generate_line_chart_nan_values():
     }
     df = pd.DataFrame(data)
     fig = generate_line_chart(df)
-    assert isinstance(fig, go.Figure), "The function should return a Plotly figure object even with NaN values."
\ No newline at end of file
+    assert isinstance(fig, go.Figure), "The function should return a Plotly figure object even with NaN values."
+
+@pytest.fixture
+def daily_returns():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2015-01-01', periods=500, freq='B')
+    returns = pd.Series(0.001 + rng.normal(0, 0.01, len(dates)), index=dates)
+    returns.iloc[[10, 200]] = np.nan
+    return returns
+
+@pytest.mark.parametrize("window", [1, 5, 63, 1000])
+def test_calculate_performance_metrics_rolling_matches_pandas(daily_returns, window):
+    metrics = calculate_performance_metrics(daily_returns, window=window, risk_free_rate=0.0001)
+    rolling = daily_returns.rolling(window)
+    np.testing.assert_allclose(metrics['Average Returns'], rolling.mean(), equal_nan=True, atol=1e-12)
+    np.testing.assert_allclose(metrics['Volatility'], rolling.std(), equal_nan=True, atol=1e-12)
+    expected_sharpe = (rolling.mean() - 0.0001) / rolling.std()
+    np.testing.assert_allclose(metrics['Sharpe Ratio'], expected_sharpe, equal_nan=True, rtol=1e-8)
+
+def test_calculate_performance_metrics_expanding_matches_pandas(daily_returns):
+    metrics = calculate_performance_metrics(daily_returns)
+    expanding = daily_returns.expanding(min_periods=2)
+    np.testing.assert_allclose(metrics['Average Returns'], expanding.mean(), equal_nan=True, atol=1e-12)
+    np.testing.assert_allclose(metrics['Volatility'], expanding.std(), equal_nan=True, atol=1e-12)
+
+def test_calculate_performance_metrics_feeds_line_chart(daily_returns):
+    metrics = calculate_performance_metrics(daily_returns, window=20)
+    assert list(metrics.columns) == ['Date', 'Average Returns', 'Volatility', 'Sharpe Ratio']
+    fig = generate_line_chart(metrics)
+    assert len(fig.data) == 3
+
+def test_calculate_performance_metrics_zero_volatility():
+    returns = pd.Series([0.01] * 5, index=pd.date_range('2023-01-01', periods=5))
+    metrics = calculate_performance_metrics(returns, window=3)
+    assert metrics['Sharpe Ratio'].isna().all()
+
+def test_calculate_performance_metrics_invalid_inputs(daily_returns):
+    with pytest.raises(TypeError):
+        calculate_performance_metrics(daily_returns.reset_index(drop=True))
+    with pytest.raises(ValueError):
+        calculate_performance_metrics(daily_returns, window=0)
+
+@pytest.fixture
+def long_metrics():
+    rng = np.random.default_rng(3)
+    n = 100_000
+    return pd.DataFrame({
+        'Date': pd.date_range('2015-01-01', periods=n, freq='min'),
+        'Average Returns': rng.normal(0, 0.01, n),
+        'Volatility': rng.uniform(0.01, 0.05, n),
+        'Sharpe Ratio': rng.normal(0, 1, n),
+    })
+
+def test_generate_line_chart_downsampled(long_metrics):
+    fig = generate_line_chart(long_metrics, max_points=1000)
+    assert [trace['name'] for trace in fig.data] == ['Average Returns', 'Volatility', 'Sharpe Ratio']
+    for trace, col in zip(fig.data, ['Average Returns', 'Volatility', 'Sharpe Ratio']):
+        assert len(trace['y']) <= 1000
+        assert max(trace['y']) == long_metrics[col].max()
+        assert min(trace['y']) == long_metrics[col].min()
+    assert np.issubdtype(np.asarray(fig.data[0]['x']).dtype, np.datetime64)
+
+def test_generate_line_chart_webgl(sample_data):
+    fig = generate_line_chart(sample_data, webgl=True)
+    assert all(isinstance(trace, go.Scattergl) for trace in fig.data)
+    assert len(fig.data[0]['x']) == len(sample_data)
+
+def test_generate_line_chart_short_data_not_downsampled(sample_data):
+    fig = generate_line_chart(sample_data, max_points=100)
+    np.testing.assert_allclose(fig.data[0]['y'], sample_data['Average Returns'])
+
+def test_generate_line_chart_invalid_max_points(sample_data):
+    with pytest.raises(ValueError):
+        generate_line_chart(sample_data, max_points=1)
+
+def test_figure_cache_returns_cached_figure(sample_data):
+    cache = FigureCache()
+    first = cache.get(generate_line_chart, sample_data)
+    second = cache.get(generate_line_chart, sample_data.copy())
+    assert second is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.get_json(generate_line_chart, sample_data) == first.to_json()
+
+def test_figure_cache_keys_on_arguments(long_metrics):
+    cache = FigureCache()
+    cache.get(generate_line_chart, long_metrics, max_points=500)
+    cache.get(generate_line_chart, long_metrics, max_points=1000)
+    assert cache.misses == 2
+
+def test_figure_cache_appends_new_rows(daily_returns):
+    metrics = calculate_performance_metrics(daily_returns, window=20)
+    cache = FigureCache()
+    cache.get(generate_line_chart, metrics.iloc[:300])
+    grown = cache.get(generate_line_chart, metrics)
+    assert cache.incremental_updates == 1
+    assert cache.misses == 1
+
+    expected = generate_line_chart(metrics)
+    for trace, expected_trace in zip(grown.data, expected.data):
+        assert list(trace.x) == list(expected_trace.x)
+        np.testing.assert_allclose(np.asarray(trace.y, dtype=float), np.asarray(expected_trace.y, dtype=float), equal_nan=True)
+    assert cache.get_json(generate_line_chart, metrics) == grown.to_json()
+
+def test_figure_cache_rebuilds_when_history_changes(sample_data):
+    cache = FigureCache()
+    cache.get(generate_line_chart, sample_data.iloc[:3])
+    changed = sample_data.copy()
+    changed.loc[0, 'Volatility'] = 0.5
+    cache.get(generate_line_chart, changed)
+    assert (cache.misses, cache.incremental_updates) == (2, 0)
+
+def test_figure_cache_lru_eviction(sample_data):
+    cache = FigureCache(max_entries=1)
+    cache.get(generate_line_chart, sample_data)
+    cache.get(generate_line_chart, sample_data, webgl=True)
+    assert len(cache) == 1
@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from definition_3a06065f4d89461080d8772a81ba4d78 import generate_bar_chart
@@ -98,4 +99,47 @@ def test_generate_bar_chart_duplicate_driver_pair():
     })
 
     fig = generate_bar_chart(duplicate_df)
-    assert isinstance(fig, go.Figure)
\ No newline at end of file
+    assert isinstance(fig, go.Figure)
+
+def test_generate_bar_chart_traces_match_pair_rows():
+    data = pd.DataFrame({'Pair': ['B', 'A', 'B', 'C', 'A'],
+                         'Driver': ['D1', 'D1', 'D2', 'D1', 'D2'],
+                         'Contribution': [1.0, 2.0, 3.0, 4.0, 5.0]})
+    fig = generate_bar_chart(data)
+    assert [trace.name for trace in fig.data] == ['B', 'A', 'C']
+    assert list(fig.data[0].x) == ['D1', 'D2']
+    assert list(fig.data[0].y) == [1.0, 3.0]
+    assert list(fig.data[1].y) == [2.0, 5.0]
+
+def test_generate_bar_chart_top_n_aggregates_tail():
+    data = pd.DataFrame({'Pair': ['A', 'A', 'B', 'B', 'C', 'C', 'D'],
+                         'Driver': ['D1', 'D2', 'D1', 'D2', 'D1', 'D2', 'D2'],
+                         'Contribution': [1.0, -1.0, 10.0, 5.0, 0.5, 0.5, -8.0]})
+    fig = generate_bar_chart(data, top_n=2)
+    assert [trace.name for trace in fig.data] == ['B', 'D', 'Other']
+    other = fig.data[-1]
+    assert list(other.x) == ['D1', 'D2']
+    np.testing.assert_allclose(other.y, [1.5, -0.5])
+
+def test_generate_bar_chart_top_n_covers_all_pairs():
+    data = pd.DataFrame({'Pair': ['A', 'B'], 'Driver': ['D1', 'D1'], 'Contribution': [1.0, 2.0]})
+    fig = generate_bar_chart(data, top_n=5)
+    assert [trace.name for trace in fig.data] == ['A', 'B']
+
+def test_generate_bar_chart_invalid_top_n():
+    data = pd.DataFrame({'Pair': ['A'], 'Driver': ['D1'], 'Contribution': [1.0]})
+    with pytest.raises(ValueError):
+        generate_bar_chart(data, top_n=0)
+
+def test_generate_bar_chart_drops_rows_without_pair():
+    pairs = pd.Categorical(['A', None, 'B', 'Z', 'A'], categories=['A', 'B'])
+    data = pd.DataFrame({'Pair': pairs, 'Driver': ['D1', 'D1', 'D1', 'D2', 'D2'],
+                         'Contribution': [1.0, 7.0, 2.0, 9.0, 3.0]})
+    fig = generate_bar_chart(data)
+    assert [trace.name for trace in fig.data] == ['A', 'B']
+    assert list(fig.data[0].y) == [1.0, 3.0]
+    fig = generate_bar_chart(data.assign(Pair=data['Pair'].astype(object)), top_n=1)
+    assert [trace.name for trace in fig.data] == ['A', 'Other']
+    assert list(fig.data[1].y) == [2.0]
+    with pytest.raises(ValueError):
+        generate_bar_chart(pd.DataFrame({'Pair': [np.nan], 'Driver': ['D1'], 'Contribution': [1.0]}))
@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from definition_b731dfcbba3b488bbf9cf92643e6a0e7 import generate_scatter_plot
@@ -65,4 +66,28 @@ def test_generate_scatter_plot_nan_values(sample_dataframe):
     import numpy as np
     sample_dataframe['x'][2] = np.nan
     fig = generate_scatter_plot(sample_dataframe, 'x', 'y')
-    assert isinstance(fig, go.Figure)
\ No newline at end of file
+    assert isinstance(fig, go.Figure)
+
+@pytest.fixture
+def large_dataframe():
+    rng = np.random.default_rng(0)
+    n = 5000
+    return pd.DataFrame({'x': rng.normal(0, 1, n), 'y': rng.normal(0, 1, n)})
+
+def test_generate_scatter_plot_webgl_above_threshold(large_dataframe):
+    fig = generate_scatter_plot(large_dataframe, 'x', 'y', webgl_threshold=1000)
+    assert fig.data[0]['type'] == 'scattergl'
+    assert len(fig.data[0]['x']) == len(large_dataframe)
+
+def test_generate_scatter_plot_density_above_threshold(large_dataframe):
+    large_dataframe.loc[0, 'x'] = np.inf
+    fig = generate_scatter_plot(large_dataframe, 'x', 'y', webgl_threshold=1000, density_threshold=2000, bins=50)
+    assert fig.data[0]['type'] == 'heatmap'
+    z = np.asarray(fig.data[0]['z'], dtype=float)
+    assert z.shape == (50, 50)
+    assert np.nansum(z) == len(large_dataframe) - 1
+
+def test_generate_scatter_plot_density_requires_numeric_axes(large_dataframe):
+    large_dataframe['label'] = 'a'
+    fig = generate_scatter_plot(large_dataframe, 'label', 'y', webgl_threshold=1000, density_threshold=2000)
+    assert fig.data[0]['type'] == 'scattergl'
@@ -1,6 +1,11 @@
 import pytest
 import pandas as pd
-from definition_6823ae508aa3491086fd295dfc2fd2c1 import compare_to_benchmark
+import numpy as np
+from definition_6823ae508aa3491086fd295dfc2fd2c1 import (compare_to_benchmark, compare_to_benchmark_batch, rebalancing_window_returns,
+                                                     write_price_panel, PricePanel, compare_to_benchmark_panel, BenchmarkTracker,
+                                                     compare_to_benchmark_parallel, BENCHMARK_STRATEGIES, BenchmarkStrategy,
+                                                     register_benchmark_strategy, rolling_ols_hedge_ratios, kalman_hedge_ratios,
+                                                     hedged_pair_returns, compute_pair_spreads, summarize_pair_curves)
 
 def test_compare_to_benchmark_empty_dataframe():
     data = pd.DataFrame()
@@ -97,4 +102,449 @@ def test_compare_to_benchmark_all_zeros_returns():
     assert isinstance(result, pd.DataFrame)
     assert not result.empty
     assert 'pair_portfolio' in result.columns
-    assert 'benchmark' in result.columns
\ No newline at end of file
+    assert 'benchmark' in result.columns
+
+def _loop_rebalancing_window(data, window):
+    # Reference implementation of the original per-row loop: 0.5/0.5 of the last price change within
+    # the trailing `window` rows. That is every-period rebalancing (window=1 now) only for window >= 2
+    # and gaps shorter than the window; with window=1 the loop's curve was flat.
+    benchmark_returns = pd.Series(index=data.index, dtype='float64')
+    for i in range(len(data)):
+        start = 0 if i < window else i - window + 1
+        asset1_returns = data['asset1'].iloc[start:i+1].pct_change().fillna(0)
+        asset2_returns = data['asset2'].iloc[start:i+1].pct_change().fillna(0)
+        benchmark_returns.iloc[i] = 0.5 * asset1_returns.iloc[-1] + 0.5 * asset2_returns.iloc[-1]
+    return (1 + benchmark_returns).cumprod()
+
+@pytest.fixture
+def price_data():
+    rng = np.random.default_rng(0)
+    n = 250
+    return pd.DataFrame({
+        'pair_returns': rng.normal(0, 0.01, n),
+        'asset1': 100 * np.cumprod(1 + rng.normal(0, 0.02, n)),
+        'asset2': 50 * np.cumprod(1 + rng.normal(0, 0.02, n)),
+    })
+
+@pytest.mark.parametrize("loop_window", [2, 5, 20])
+def test_compare_to_benchmark_rebalancing_window_parity_with_loop(price_data, loop_window):
+    expected = _loop_rebalancing_window(price_data, loop_window)
+    result = compare_to_benchmark(price_data, "rebalancing_window", {"window": 1})
+    np.testing.assert_allclose(result['benchmark'].to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+@pytest.mark.filterwarnings("ignore:The default fill_method:FutureWarning")
+@pytest.mark.parametrize("loop_window", [5, 20])
+def test_compare_to_benchmark_rebalancing_window_parity_with_loop_missing_prices(price_data, loop_window):
+    # The loop's pct_change pads missing prices (pandas < 3); gaps are shorter than its window.
+    price_data = price_data.copy()
+    price_data.loc[[0, 30, 31, 100], 'asset1'] = np.nan
+    price_data.loc[[60, 249], 'asset2'] = np.nan
+    expected = _loop_rebalancing_window(price_data, loop_window)
+    result = compare_to_benchmark(price_data, "rebalancing_window", {"window": 1})
+    np.testing.assert_allclose(result['benchmark'].to_numpy(), expected.to_numpy(), rtol=1e-12)
+
+@pytest.mark.parametrize("window", [1, 3, 7, 250, 1000])
+def test_rebalancing_window_returns_matches_simulated_portfolio(price_data, window):
+    prices = price_data[['asset1', 'asset2']].to_numpy()
+    target = np.array([0.3, 0.7])
+    holdings = target / prices[0]
+    values = [1.0]
+    for i in range(1, len(prices)):
+        value = holdings @ prices[i]
+        values.append(value)
+        if i % window == 0:
+            holdings = value * target / prices[i]
+    expected = np.array(values)
+
+    returns = rebalancing_window_returns(prices[:, 0], prices[:, 1], window, [0.3, 0.7])
+    np.testing.assert_allclose(np.cumprod(1 + returns), expected, rtol=1e-10)
+
+def test_rebalancing_window_returns_two_dimensional(price_data):
+    prices1 = np.column_stack([price_data['asset1'], price_data['asset2']])
+    prices2 = prices1[:, ::-1]
+    result = rebalancing_window_returns(prices1, prices2, 10)
+    assert result.shape == prices1.shape
+    for j in range(2):
+        np.testing.assert_allclose(result[:, j], rebalancing_window_returns(prices1[:, j], prices2[:, j], 10))
+
+def test_compare_to_benchmark_rebalancing_window_invalid_window():
+    data = pd.DataFrame({'pair_returns': [0.01, 0.02, -0.01], 'asset1': [100, 101, 99], 'asset2':[50,51,49]})
+    with pytest.raises(ValueError):
+        compare_to_benchmark(data, "rebalancing_window", {"window": 0})
+
+@pytest.fixture
+def long_pair_data():
+    rng = np.random.default_rng(1)
+    frames = []
+    for k, n in enumerate([30, 45, 12]):
+        frames.append(pd.DataFrame({
+            'pair_id': f'pair{k}',
+            'pair_returns': rng.normal(0, 0.01, n),
+            'asset1': 100 * np.cumprod(1 + rng.normal(0, 0.02, n)),
+            'asset2': 50 * np.cumprod(1 + rng.normal(0, 0.02, n)),
+        }))
+    return frames
+
+@pytest.mark.parametrize("benchmark_strategy, benchmark_parameters", [
+    ("static_weights", {"weights": [0.4, 0.6]}),
+    ("rebalancing_window", {"window": 5}),
+])
+def test_compare_to_benchmark_batch_long_matches_single(long_pair_data, benchmark_strategy, benchmark_parameters):
+    data = pd.concat(long_pair_data, ignore_index=True)
+    result = compare_to_benchmark_batch(data, benchmark_strategy, benchmark_parameters)
+    assert list(result.pair_ids) == ['pair0', 'pair1', 'pair2']
+    assert list(result.lengths) == [30, 45, 12]
+
+    frame = result.to_frame()
+    for k, pair_data in enumerate(long_pair_data):
+        expected = compare_to_benchmark(pair_data, benchmark_strategy, benchmark_parameters)
+        actual = frame[frame['pair_id'] == f'pair{k}']
+        np.testing.assert_allclose(actual['pair_portfolio'].to_numpy(), expected['pair_portfolio'].to_numpy())
+        np.testing.assert_allclose(actual['benchmark'].to_numpy(), expected['benchmark'].to_numpy())
+
+    assert np.isnan(result.benchmark[2, 12:]).all()
+
+def test_compare_to_benchmark_batch_panel(long_pair_data):
+    pairs = [pair_data.iloc[:12] for pair_data in long_pair_data]
+    panel = {col: np.vstack([pair_data[col].to_numpy() for pair_data in pairs]) for col in ['asset1', 'asset2', 'pair_returns']}
+    result = compare_to_benchmark_batch(panel, "rebalancing_window", {"window": 3})
+    assert result.benchmark.shape == (3, 12)
+    for k, pair_data in enumerate(pairs):
+        expected = compare_to_benchmark(pair_data, "rebalancing_window", {"window": 3})
+        np.testing.assert_allclose(result.benchmark[k], expected['benchmark'].to_numpy())
+
+def test_compare_to_benchmark_batch_missing_pair_column(long_pair_data):
+    with pytest.raises(KeyError):
+        compare_to_benchmark_batch(long_pair_data[0].drop(columns='pair_id'), "static_weights", {"weights": [0.5, 0.5]})
+
+def test_compare_to_benchmark_batch_mismatched_panel():
+    panel = {'asset1': np.ones((2, 5)), 'asset2': np.ones((2, 4)), 'pair_returns': np.zeros((2, 5))}
+    with pytest.raises(ValueError):
+        compare_to_benchmark_batch(panel, "static_weights", {"weights": [0.5, 0.5]})
+
+@pytest.fixture
+def price_panel(tmp_path, price_data):
+    timestamps = pd.date_range('2024-01-01', periods=len(price_data), freq='min')
+    path = str(tmp_path / 'panel')
+    write_price_panel(path, timestamps, {'AAA': price_data['asset1'].to_numpy(), 'BBB': price_data['asset2'].to_numpy()})
+    return PricePanel(path)
+
+def test_price_panel_is_memory_mapped(price_panel, price_data):
+    assert price_panel.assets == ['AAA', 'BBB']
+    assert len(price_panel) == len(price_data)
+    prices = price_panel.prices('AAA')
+    assert isinstance(prices, np.memmap)
+    assert not prices.flags.writeable
+    np.testing.assert_array_equal(prices, price_data['asset1'].to_numpy())
+    with pytest.raises(KeyError):
+        price_panel.prices('CCC')
+
+@pytest.mark.parametrize("benchmark_strategy, benchmark_parameters", [
+    ("static_weights", {"weights": [0.3, 0.7]}),
+    ("rebalancing_window", {"window": 10}),
+])
+def test_compare_to_benchmark_panel_matches_frame(price_panel, price_data, benchmark_strategy, benchmark_parameters):
+    rows = price_data.iloc[20:120]
+    result = compare_to_benchmark_panel(price_panel, 'AAA', 'BBB', rows['pair_returns'], benchmark_strategy,
+                                        benchmark_parameters, start=20, end=120)
+    expected = compare_to_benchmark(rows, benchmark_strategy, benchmark_parameters)
+    assert isinstance(result.index, pd.DatetimeIndex)
+    np.testing.assert_allclose(result['benchmark'].to_numpy(), expected['benchmark'].to_numpy())
+    np.testing.assert_allclose(result['pair_portfolio'].to_numpy(), expected['pair_portfolio'].to_numpy())
+
+def test_compare_to_benchmark_panel_length_mismatch(price_panel):
+    with pytest.raises(ValueError):
+        compare_to_benchmark_panel(price_panel, 'AAA', 'BBB', [0.01, 0.02], "static_weights", {"weights": [0.5, 0.5]})
+
+def test_write_price_panel_float32(tmp_path):
+    path = str(tmp_path / 'panel32')
+    write_price_panel(path, pd.date_range('2024-01-01', periods=3), {'AAA': [1.0, 2.0, 3.0]}, dtype='float32')
+    assert PricePanel(path).prices('AAA').dtype == np.float32
+    with pytest.raises(ValueError):
+        write_price_panel(path, pd.date_range('2024-01-01', periods=3), {'AAA': [1.0, 2.0]})
+
+@pytest.mark.parametrize("benchmark_strategy, benchmark_parameters", [
+    ("static_weights", {"weights": [0.3, 0.7]}),
+    ("rebalancing_window", {"window": 1}),
+    ("rebalancing_window", {"window": 7}),
+    ("rebalancing_window", {"window": 40, "weights": [0.6, 0.6]}),
+    ("rebalancing_window", {"window": 1000}),
+])
+def test_benchmark_tracker_matches_batch(price_data, benchmark_strategy, benchmark_parameters):
+    price_data = price_data.copy()
+    price_data.loc[[5, 120], 'asset1'] = np.nan
+    price_data.loc[9, 'pair_returns'] = np.nan
+    expected = compare_to_benchmark(price_data, benchmark_strategy, benchmark_parameters)
+
+    tracker = BenchmarkTracker(benchmark_strategy, benchmark_parameters)
+    cuts = [0, 1, 2, 10, 11, 47, 100, 101, 180, 250]
+    result = pd.concat([tracker.update(price_data.iloc[start:end]) for start, end in zip(cuts[:-1], cuts[1:])])
+
+    np.testing.assert_array_equal(result.to_numpy(), expected.to_numpy())
+    assert result.index.equals(expected.index)
+    assert tracker.num_rows == len(price_data)
+
+@pytest.mark.filterwarnings("ignore:The default fill_method:FutureWarning")
+def test_benchmark_tracker_static_weights_missing_prices_across_batches(price_data):
+    price_data = price_data.copy()
+    price_data.loc[[9, 10, 46], 'asset1'] = np.nan
+    price_data.loc[[0, 100], 'asset2'] = np.nan
+    # The original static_weights formula, with pct_change padding missing prices (pandas < 3).
+    expected = (1 + 0.3 * price_data['asset1'].pct_change().fillna(0)
+                + 0.7 * price_data['asset2'].pct_change().fillna(0)).cumprod()
+
+    tracker = BenchmarkTracker("static_weights", {"weights": [0.3, 0.7]})
+    cuts = [0, 1, 10, 11, 47, 100, 250]
+    result = pd.concat([tracker.update(price_data.iloc[start:end]) for start, end in zip(cuts[:-1], cuts[1:])])
+    np.testing.assert_allclose(result['benchmark'].to_numpy(), expected.to_numpy(), rtol=1e-12)
+    np.testing.assert_array_equal(result.to_numpy(),
+                                  compare_to_benchmark(price_data, "static_weights", {"weights": [0.3, 0.7]}).to_numpy())
+
+def test_benchmark_tracker_single_row_updates(price_data):
+    expected = compare_to_benchmark(price_data.iloc[:30], "rebalancing_window", {"window": 4})
+    tracker = BenchmarkTracker("rebalancing_window", {"window": 4})
+    rows = [tracker.update(price_data.iloc[i:i + 1]) for i in range(30)]
+    np.testing.assert_array_equal(pd.concat(rows).to_numpy(), expected.to_numpy())
+
+def test_benchmark_tracker_invalid_input():
+    with pytest.raises(ValueError):
+        BenchmarkTracker("invalid_strategy", {})
+    tracker = BenchmarkTracker("static_weights", {"weights": [0.5, 0.5]})
+    with pytest.raises(KeyError):
+        tracker.update(pd.DataFrame({'asset1': [1.0], 'pair_returns': [0.0]}))
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_compare_to_benchmark_parallel_matches_batch(long_pair_data, max_workers):
+    data = pd.concat(long_pair_data, ignore_index=True)
+    data = data.iloc[np.argsort(data.groupby('pair_id').cumcount().to_numpy(), kind='stable')]   # interleave the pairs
+    expected = compare_to_benchmark_batch(data, "rebalancing_window", {"window": 5}).to_frame()
+    result = compare_to_benchmark_parallel(data, "rebalancing_window", {"window": 5},
+                                           max_workers=max_workers, shards_per_worker=2)
+    pd.testing.assert_frame_equal(result, expected)
+
+def test_compare_to_benchmark_parallel_invalid_input(long_pair_data):
+    data = pd.concat(long_pair_data, ignore_index=True)
+    with pytest.raises(ValueError):
+        compare_to_benchmark_parallel(data, "static_weights", {"weights": [0.5, 0.5]}, max_workers=0)
+    with pytest.raises(KeyError):
+        compare_to_benchmark_parallel(data.drop(columns='pair_id'), "static_weights", {"weights": [0.5, 0.5]})
+
+def _simulate_benchmark(prices, rebalance, targets):
+    """Reference loop tracking the holdings; rebalance(i, drifted_weights) decides at the close of row i."""
+    returns = np.nan_to_num(prices[1:] / prices[:-1] - 1)
+    holdings, cash = targets(0), 1 - targets(0).sum()
+    benchmark = [1.0]
+    for i, period_returns in enumerate(returns, start=1):
+        holdings = holdings * (1 + period_returns)
+        value = holdings.sum() + cash
+        benchmark.append(value)
+        if rebalance(i, holdings / value):
+            holdings, cash = targets(i) * value, (1 - targets(i).sum()) * value
+    return np.asarray(benchmark) / np.asarray(benchmark)[0]
+
+@pytest.fixture
+def dated_price_data(price_data):
+    return price_data.assign(Date=pd.bdate_range('2023-01-02', periods=len(price_data)))
+
+def test_buy_and_hold_matches_simulation(dated_price_data):
+    prices = dated_price_data[['asset1', 'asset2']].to_numpy()
+    expected = _simulate_benchmark(prices, lambda i, w: False, lambda i: np.array([0.7, 0.3]))
+    result = compare_to_benchmark(dated_price_data, "buy_and_hold", {"weights": [0.7, 0.3]})
+    np.testing.assert_allclose(result['benchmark'], expected, rtol=1e-12)
+
+@pytest.mark.parametrize("frequency", ["monthly", "quarterly"])
+def test_calendar_rebalancing_matches_simulation(dated_price_data, frequency):
+    prices = dated_price_data[['asset1', 'asset2']].to_numpy()
+    periods = dated_price_data['Date'].dt.to_period('M' if frequency == 'monthly' else 'Q').to_numpy()
+    expected = _simulate_benchmark(prices, lambda i, w: i + 1 < len(periods) and periods[i] != periods[i + 1],
+                                   lambda i: np.array([0.5, 0.5]))
+    result = compare_to_benchmark(dated_price_data, "calendar_rebalancing", {"frequency": frequency})
+    np.testing.assert_allclose(result['benchmark'], expected, rtol=1e-12)
+
+    indexed = compare_to_benchmark(dated_price_data.set_index('Date'), "calendar_rebalancing", {"frequency": frequency})
+    np.testing.assert_allclose(indexed['benchmark'].to_numpy(), expected, rtol=1e-12)
+
+def test_drift_threshold_matches_simulation(price_data):
+    prices = price_data[['asset1', 'asset2']].to_numpy()
+    target = np.array([0.6, 0.4])
+    expected = _simulate_benchmark(prices, lambda i, w: np.abs(w - target).max() > 0.02, lambda i: target)
+    result = compare_to_benchmark(price_data, "drift_threshold", {"threshold": 0.02, "weights": [0.6, 0.4]})
+    np.testing.assert_allclose(result['benchmark'], expected, rtol=1e-12)
+
+def test_inverse_volatility_matches_simulation(price_data):
+    prices = price_data[['asset1', 'asset2']].to_numpy()
+    volatility = price_data[['asset1', 'asset2']].pct_change().rolling(20).std().to_numpy()
+
+    def targets(i):
+        if np.isnan(volatility[i]).any():
+            return np.array([0.5, 0.5])
+        return (1 / volatility[i]) / (1 / volatility[i]).sum()
+
+    expected = _simulate_benchmark(prices, lambda i, w: i % 5 == 0, targets)
+    result = compare_to_benchmark(price_data, "inverse_volatility", {"lookback": 20, "window": 5})
+    np.testing.assert_allclose(result['benchmark'], expected, rtol=1e-12)
+
+@pytest.mark.parametrize("benchmark_strategy, benchmark_parameters", [
+    ("calendar_rebalancing", {"frequency": "monthly"}),
+    ("drift_threshold", {"threshold": 0.01}),
+    ("inverse_volatility", {"lookback": 10, "window": 3}),
+])
+def test_new_strategies_batch_matches_single(dated_price_data, benchmark_strategy, benchmark_parameters):
+    data = pd.concat([dated_price_data.assign(pair_id='a'), dated_price_data.iloc[:90].assign(pair_id='b')], ignore_index=True)
+    frame = compare_to_benchmark_batch(data, benchmark_strategy, benchmark_parameters).to_frame()
+    for pair_id, pair_data in data.groupby('pair_id'):
+        expected = compare_to_benchmark(pair_data, benchmark_strategy, benchmark_parameters)
+        np.testing.assert_allclose(frame.loc[frame['pair_id'] == pair_id, 'benchmark'], expected['benchmark'], rtol=1e-12)
+    parallel = compare_to_benchmark_parallel(data, benchmark_strategy, benchmark_parameters, max_workers=1)
+    np.testing.assert_allclose(parallel['benchmark'], frame['benchmark'], rtol=1e-12)
+
+def test_new_strategies_invalid_parameters(price_data):
+    with pytest.raises(ValueError):
+        compare_to_benchmark(price_data, "calendar_rebalancing", {"frequency": "monthly"})
+    with pytest.raises(ValueError):
+        compare_to_benchmark(price_data, "calendar_rebalancing", {"frequency": "weekly"})
+    with pytest.raises(KeyError):
+        compare_to_benchmark(price_data, "drift_threshold", {})
+    with pytest.raises(ValueError):
+        compare_to_benchmark(price_data, "drift_threshold", {"threshold": 0})
+    with pytest.raises(TypeError):
+        compare_to_benchmark(price_data, "inverse_volatility", {"lookback": 2.5})
+    with pytest.raises(TypeError):
+        compare_to_benchmark(price_data, "rebalancing_window", {"window": True})
+    with pytest.raises(TypeError):
+        compare_to_benchmark(price_data, "inverse_volatility", {"window": False})
+    with pytest.raises(ValueError):
+        BenchmarkTracker("drift_threshold", {"threshold": 0.05})
+
+def test_static_weights_pads_missing_prices():
+    data = pd.DataFrame({'pair_returns': [0.0] * 4, 'asset1': [100, np.nan, 110, 121], 'asset2': [50.0] * 4})
+    result = compare_to_benchmark(data, "static_weights", {"weights": [0.5, 0.5]})
+    np.testing.assert_allclose(result['benchmark'], [1.0, 1.0, 1.05, 1.1025], rtol=1e-12)
+    batch = compare_to_benchmark_batch(data.assign(pair_id='a'), "static_weights", {"weights": [0.5, 0.5]})
+    np.testing.assert_allclose(batch.to_frame()['benchmark'], result['benchmark'], rtol=1e-12)
+
+def test_register_benchmark_strategy(price_data):
+    @register_benchmark_strategy("asset1_only")
+    class Asset1Only(BenchmarkStrategy):
+        def weights(self, asset_returns, timestamps=None):
+            return np.broadcast_to([1.0, 0.0], asset_returns.shape)
+
+    try:
+        result = compare_to_benchmark(price_data, "asset1_only", {})
+        np.testing.assert_allclose(result['benchmark'], price_data['asset1'] / price_data['asset1'].iloc[0])
+        with pytest.raises(ValueError):
+            register_benchmark_strategy("asset1_only")(Asset1Only)
+    finally:
+        BENCHMARK_STRATEGIES.pop("asset1_only")
+
+@pytest.fixture
+def cointegrated_prices():
+    rng = np.random.default_rng(5)
+    n = 400
+    asset2 = 50 * np.cumprod(1 + rng.normal(0, 0.01, n))
+    asset1 = 3 + 1.7 * asset2 + rng.normal(0, 0.5, n)
+    return pd.DataFrame({'asset1': asset1, 'asset2': asset2})
+
+def test_rolling_ols_hedge_ratios_match_polyfit(cointegrated_prices):
+    asset1 = cointegrated_prices['asset1'].to_numpy().copy()
+    asset2 = cointegrated_prices['asset2'].to_numpy()
+    asset1[50] = np.nan
+    result = rolling_ols_hedge_ratios(asset1, asset2, window=30, min_periods=20)
+    assert np.isnan(result.hedge_ratio[:19]).all()
+    for t in [19, 60, 75, 399]:
+        rows = slice(max(0, t - 29), t + 1)
+        valid = ~np.isnan(asset1[rows])
+        slope, intercept = np.polyfit(asset2[rows][valid], asset1[rows][valid], 1)
+        assert result.hedge_ratio[t] == pytest.approx(slope, rel=1e-9)
+        assert result.intercept[t] == pytest.approx(intercept, rel=1e-9)
+
+def test_kalman_hedge_ratios_track_relationship(cointegrated_prices):
+    result = kalman_hedge_ratios(cointegrated_prices['asset1'], cointegrated_prices['asset2'])
+    assert abs(result.hedge_ratio[-50:].mean() - 1.7) < 0.1
+    panel = kalman_hedge_ratios(np.column_stack([cointegrated_prices['asset1']] * 2),
+                                np.column_stack([cointegrated_prices['asset2']] * 2))
+    np.testing.assert_allclose(panel.hedge_ratio[:, 1], result.hedge_ratio, rtol=1e-12)
+
+def test_hedged_pair_returns_use_previous_hedge_ratio():
+    returns = hedged_pair_returns([10.0, 11.0, 12.0], [5.0, 6.0, 4.0], [2.0, 1.0, 3.0])
+    assert np.isnan(returns[0])
+    assert returns[1] == pytest.approx((1.0 - 2.0 * 1.0) / (10.0 + 2.0 * 5.0))
+    assert returns[2] == pytest.approx((1.0 - 1.0 * -2.0) / (11.0 + 1.0 * 6.0))
+
+@pytest.mark.parametrize("method", ["rolling_ols", "kalman"])
+def test_compute_pair_spreads_long_format_feeds_benchmark(cointegrated_prices, method):
+    data = pd.concat([cointegrated_prices.assign(pair_id='a'), cointegrated_prices.iloc[:150].assign(pair_id='b')],
+                     ignore_index=True)
+    data = data.iloc[np.argsort(data.groupby('pair_id').cumcount().to_numpy(), kind='stable')]
+    result = compute_pair_spreads(data, method=method, window=40, pair_column='pair_id')
+    assert result.index.equals(data.index)
+    assert list(result.columns) == ['hedge_ratio', 'intercept', 'spread', 'zscore', 'pair_returns']
+
+    single = compute_pair_spreads(cointegrated_prices, method=method, window=40)
+    np.testing.assert_allclose(result.loc[data['pair_id'] == 'a'].sort_index().to_numpy(), single.to_numpy(),
+                               rtol=1e-9, equal_nan=True)
+
+    curves = compare_to_benchmark(cointegrated_prices.assign(pair_returns=single['pair_returns']),
+                                  "static_weights", {"weights": [0.5, 0.5]})
+    assert np.isfinite(curves['pair_portfolio']).all()
+
+@pytest.mark.parametrize("method", ["rolling_ols", "kalman"])
+def test_compute_pair_spreads_returns_keep_curve_level_without_position(cointegrated_prices, method):
+    prices = cointegrated_prices.copy()
+    prices.loc[200, 'asset2'] = np.nan
+    result = compute_pair_spreads(prices, method=method, window=40)
+    raw = hedged_pair_returns(prices['asset1'], prices['asset2'], result['hedge_ratio'])
+    assert np.isnan(raw[[0, 200, 201]]).all()
+    assert (result['pair_returns'].to_numpy()[np.isnan(raw)] == 0).all()
+
+    curves = compare_to_benchmark(prices.assign(pair_returns=result['pair_returns']), "static_weights",
+                                  {"weights": [0.5, 0.5]})
+    expected = np.cumprod(1 + np.nan_to_num(raw))
+    np.testing.assert_allclose(curves['pair_portfolio'], expected, rtol=1e-12)
+    assert curves['pair_portfolio'].iloc[201] == pytest.approx(curves['pair_portfolio'].iloc[199])
+
+def test_compute_pair_spreads_invalid_input(cointegrated_prices):
+    with pytest.raises(ValueError):
+        compute_pair_spreads(cointegrated_prices, method='polyfit')
+    with pytest.raises(ValueError):
+        compute_pair_spreads(cointegrated_prices, window=1)
+    with pytest.raises(KeyError):
+        compute_pair_spreads(cointegrated_prices, pair_column='pair_id')
+    with pytest.raises(ValueError):
+        kalman_hedge_ratios([1.0, 2.0], [1.0, 2.0], delta=1.5)
+
+def test_summarize_pair_curves_matches_single_pairs(long_pair_data):
+    data = pd.concat(long_pair_data, ignore_index=True)
+    curves = compare_to_benchmark_parallel(data, "rebalancing_window", {"window": 5}, max_workers=1)
+    summary = summarize_pair_curves(curves.iloc[::-1].sort_values('pair_id', kind='stable'))
+    assert list(summary['pair_id']) == ['pair0', 'pair1', 'pair2']
+    assert list(summary['observations']) == [30, 45, 12]
+
+    for k, pair in enumerate(long_pair_data):
+        curve = compare_to_benchmark(pair, "rebalancing_window", {"window": 5})['pair_portfolio'].to_numpy()
+        returns = curve / np.r_[1.0, curve[:-1]] - 1
+        row = summary.iloc[k]
+        assert row['total_return'] == pytest.approx(curve[-1] - 1)
+        assert row['sharpe_ratio'] == pytest.approx(returns.mean() * np.sqrt(252) / returns.std(ddof=1))
+    assert np.allclose(summary['excess_return'], summary['total_return'] - summary['benchmark_total_return'])
+
+def test_summarize_pair_curves_invalid_input():
+    curves = pd.DataFrame({'pair_id': ['a', 'b'], 'pair_portfolio': [1.1, 0.9], 'benchmark': [1.0, 1.0]})
+    assert summarize_pair_curves(curves)['sharpe_ratio'].isna().all()
+    with pytest.raises(KeyError):
+        summarize_pair_curves(curves.drop(columns='benchmark'))
+    with pytest.raises(ValueError):
+        summarize_pair_curves(curves, periods_per_year=0)
+    with pytest.raises(TypeError):
+        summarize_pair_curves(curves.to_numpy())
+
+def test_compare_to_benchmark_compounds_float32_returns_in_float64():
+    rng = np.random.default_rng(6)
+    n = 100_000
+    data = pd.DataFrame({'pair_returns': rng.normal(0.0005, 0.01, n).astype('float32'),
+                         'asset1': (100 * np.cumprod(1 + rng.normal(0, 0.01, n))).astype('float32'),
+                         'asset2': (50 * np.cumprod(1 + rng.normal(0, 0.01, n))).astype('float32')})
+    result = compare_to_benchmark(data, "static_weights", {"weights": [0.5, 0.5]})
+    assert (result.dtypes == 'float64').all()
+    np.testing.assert_allclose(result['pair_portfolio'], np.cumprod(1 + data['pair_returns'].to_numpy('float64')),
+                               rtol=1e-12)
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+import pandas as pd
+import numpy as np
+import batch
+from definition_6823ae508aa3491086fd295dfc2fd2c1 import load_data, BENCHMARK_STRATEGIES
+
+@pytest.fixture
+def universe_file(tmp_path):
+    path = str(tmp_path / 'universe.parquet')
+    load_data(num_rows=2_000, seed=3, compact=True, schema='pairs', periods_per_pair=50).to_parquet(path)
+    return path
+
+def test_default_parameters_cover_every_strategy():
+    assert set(batch.DEFAULT_PARAMETERS) == set(BENCHMARK_STRATEGIES)
+
+@pytest.mark.parametrize('strategy', sorted(batch.DEFAULT_PARAMETERS))
+def test_batch_benchmark_runs_every_strategy_with_defaults(universe_file, tmp_path, strategy):
+    output = str(tmp_path / 'curves.parquet')
+    assert batch.main(['benchmark', universe_file, '--output', output, '--strategy', strategy, '--workers', '1']) == 0
+    curves = pd.read_parquet(output)
+    assert not curves.empty
+    assert curves.groupby('pair_id', observed=True).size().eq(50).all()
+    assert np.isfinite(curves['benchmark']).all()
+
+def test_with_business_dates_numbers_rows_per_pair():
+    histories = pd.DataFrame({'pair_id': [7, 7, 3, 7, 3]})
+    dates = batch.with_business_dates(histories)['Date']
+    calendar = pd.bdate_range('2020-01-01', periods=3)
+    assert list(dates) == [calendar[0], calendar[1], calendar[0], calendar[2], calendar[1]]
+
+def test_batch_summarize_writes_html_figures_by_default(universe_file, tmp_path):
+    output = str(tmp_path / 'summary.csv')
+    figures = str(tmp_path / 'figures')
+    assert batch.main(['summarize', universe_file, '--output', output, '--workers', '1', '--figures', figures]) == 0
+    assert os.path.exists(output)
+    assert sorted(os.listdir(figures)) == ['best_pair_metrics.html', 'sharpe_ratios.html']
+
+def test_batch_rejects_image_figures_without_kaleido(universe_file, tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, 'image_export_available', lambda: False)
+    output = str(tmp_path / 'summary.csv')
+    with pytest.raises(SystemExit):
+        batch.main(['summarize', universe_file, '--output', output, '--figures', str(tmp_path / 'figures'),
+                    '--figure-format', 'png'])
+    assert not os.path.exists(output)